@@ -0,0 +1,62 @@
+# Hilfsfunktionen für Release-Assets (GitHub REST API), per "source" in den Workflow-Schritten.
+# Erwartet GH_TOKEN und GITHUB_REPOSITORY. Jeder Aufruf schlägt bei HTTP-Fehlern fehl (curl --fail).
+
+API="https://api.github.com/repos/${GITHUB_REPOSITORY}"
+UPLOADS="https://uploads.github.com/repos/${GITHUB_REPOSITORY}"
+
+gh_curl() {
+  curl -sS --fail --retry 3 -H "Authorization: token $GH_TOKEN" "$@"
+}
+
+# ID des Releases mit Tag $1; leer, wenn es (noch) nicht existiert
+release_id() {
+  local status
+  status=$(curl -sS --retry 3 -o /tmp/release.json -w '%{http_code}' \
+    -H "Authorization: token $GH_TOKEN" "$API/releases/tags/$1")
+  case "$status" in
+    200) jq -r '.id' /tmp/release.json ;;
+    404) ;;
+    *) echo "GitHub API: HTTP $status für Release $1" >&2; return 1 ;;
+  esac
+}
+
+# ID des Releases mit Tag $1, bei Bedarf angelegt
+ensure_release() {
+  local id
+  id=$(release_id "$1")
+  if [ -z "$id" ]; then
+    echo "Creating release '$1'..." >&2
+    id=$(gh_curl -X POST -d "{\"tag_name\": \"$1\", \"name\": \"$1\"}" "$API/releases" | jq -r '.id')
+  fi
+  echo "$id"
+}
+
+# Alle Assets des Releases $1 (ID) als "id name", seitenweise (100 je Seite)
+list_assets() {
+  local page=1 json
+  while :; do
+    json=$(gh_curl "$API/releases/$1/assets?per_page=100&page=$page")
+    [ "$(echo "$json" | jq 'length')" -eq 0 ] && break
+    echo "$json" | jq -r '.[] | "\(.id) \(.name)"'
+    page=$((page + 1))
+  done
+}
+
+# Asset $1 (ID) nach $2 herunterladen
+download_asset() {
+  gh_curl -L -H "Accept: application/octet-stream" "$API/releases/assets/$1" -o "$2"
+}
+
+# Datei $2 als Asset $3 an Release $1 (ID) hängen; Ausgabe: Asset-ID
+upload_asset() {
+  gh_curl -X POST -H "Content-Type: application/octet-stream" --data-binary @"$2" \
+    "$UPLOADS/releases/$1/assets?name=$3" | jq -r '.id'
+}
+
+delete_asset() {
+  gh_curl -X DELETE "$API/releases/assets/$1"
+}
+
+rename_asset() {
+  gh_curl -X PATCH -d "{\"name\": \"$2\"}" "$API/releases/assets/$1" >/dev/null
+}
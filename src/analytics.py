@@ -0,0 +1,284 @@
+"""Auswertungen über die gespeicherten Tabellen (SQL-Aggregate statt Python-Schleifen).
+
+Alle Funktionen erwarten einen Cursor und liefern strukturierte Ergebnisse
+(dicts/Listen). Zeitfenster `since`/`until` sind ISO-Strings (UTC) und
+optional; Vergleiche laufen als String-Vergleich auf den ISO-Zeitstempeln.
+
+Innerhalb von partitions.fanout() lesen die Funktionen über die Rohtabellen
+{tabelle}_all und damit auch die versiegelten Monate (history_table).
+"""
+import health
+
+FAILED_CHECKIN = "Charging Not Possible"
+SUCCESS_CHECKIN = "Successfully Charged"
+
+# Bucket-Breite → Länge des ISO-Präfixes ("2024-05-01T13")
+BUCKETS = {"hour": 13, "day": 10, "month": 7}
+
+
+def history_table(c, table):
+    """{table}_all, wenn partitions.fanout() es bereitstellt (inkl. versiegelter Monate), sonst table."""
+    c.execute("SELECT 1 FROM temp.sqlite_master WHERE name = ?", (f"{table}_all",))
+    return f"{table}_all" if c.fetchone() else table
+
+
+def window_clause(column, since, until):
+    """WHERE-Fragment + Parameter für ein optionales Zeitfenster."""
+    parts, params = [], []
+    if since is not None:
+        parts.append(f"{column} >= ?")
+        params.append(since)
+    if until is not None:
+        parts.append(f"{column} < ?")
+        params.append(until)
+    return (" AND ".join(parts) or "1"), params
+
+
+def bucket_window(column, width, since, until):
+    """window_clause für Bucket-Spalten ("2024-05-01", "2024-05-01T13"): ein Bucket zählt, sobald er das Fenster berührt."""
+    if since is not None:
+        since = since[:width]
+    if until is not None:
+        # Fenster endet mitten im Bucket → den angebrochenen Bucket mitnehmen
+        until = until[:width] + ("~" if until[width + 1:19].strip("0:") else "")
+    return window_clause(column, since, until)
+
+
+def payload_counts(data):
+    """(stations, stations_with_comments, total_comments) einer API-Antwort."""
+    counts = [len(d.get("UserComments") or []) for d in data]
+    return len(counts), sum(1 for n in counts if n), sum(counts)
+
+
+def comment_stats(c, since=None, until=None):
+    """Kennzahlen über comments_history: Stationen, Kommentare, Ø und Max je Station."""
+    where, params = window_clause("comment_date", since, until)
+    comments = history_table(c, "comments_history")
+    c.execute(f"""
+        SELECT COUNT(*), COALESCE(SUM(cnt), 0), COALESCE(AVG(cnt), 0), COALESCE(MAX(cnt), 0)
+        FROM (
+            SELECT COUNT(*) AS cnt FROM {comments}
+            WHERE {where}
+            GROUP BY station_id
+        )
+    """, params)
+    stations, total, avg, max_comments = c.fetchone()
+    return {"stations": stations, "total_comments": total, "avg_comments": avg, "max_comments": max_comments}
+
+
+def comment_histogram(c, since=None, until=None):
+    """{Kommentare pro Station: Anzahl Stationen}."""
+    where, params = window_clause("comment_date", since, until)
+    comments = history_table(c, "comments_history")
+    c.execute(f"""
+        SELECT cnt, COUNT(*)
+        FROM (
+            SELECT COUNT(*) AS cnt FROM {comments}
+            WHERE {where}
+            GROUP BY station_id
+        )
+        GROUP BY cnt
+        ORDER BY cnt
+    """, params)
+    return dict(c.fetchall())
+
+
+def top_stations(c, n=10, since=None, until=None):
+    """Die n meistkommentierten Stationen."""
+    where, params = window_clause("h.comment_date", since, until)
+    comments = history_table(c, "comments_history")
+    c.execute(f"""
+        SELECT t.station_id, s.title, s.operator, t.cnt
+        FROM (
+            SELECT h.station_id, COUNT(*) AS cnt FROM {comments} h
+            WHERE {where}
+            GROUP BY h.station_id
+            ORDER BY cnt DESC, h.station_id
+            LIMIT ?
+        ) t
+        LEFT JOIN stations s ON s.station_id = t.station_id
+        ORDER BY t.cnt DESC, t.station_id
+    """, params + [n])
+    return [
+        {"station_id": sid, "title": title, "operator": operator, "comments": cnt}
+        for sid, title, operator, cnt in c.fetchall()
+    ]
+
+
+def operator_activity(c, since=None, until=None):
+    """Kommentar- und Check-in-Aktivität je Betreiber, absteigend nach Kommentaren."""
+    where, params = window_clause("comment_date", since, until)
+    comments = history_table(c, "comments_history")
+    # Erst je Station aggregieren, dann nur noch ~Stationen-viele Zeilen joinen
+    c.execute(f"""
+        SELECT
+            COALESCE(s.operator, '(unbekannt)'),
+            COUNT(*),
+            SUM(t.cnt),
+            COALESCE(SUM(t.failed), 0),
+            COALESCE(SUM(t.ok), 0)
+        FROM (
+            SELECT
+                station_id,
+                COUNT(*) AS cnt,
+                SUM(checkin_status = ?) AS failed,
+                SUM(checkin_status = ?) AS ok
+            FROM {comments}
+            WHERE {where}
+            GROUP BY station_id
+        ) t
+        LEFT JOIN stations s ON s.station_id = t.station_id
+        GROUP BY 1
+        ORDER BY 3 DESC
+    """, [FAILED_CHECKIN, SUCCESS_CHECKIN] + params)
+    return [
+        {"operator": op, "stations": st, "comments": cm, "failed_checkins": fail, "successful_checkins": ok}
+        for op, st, cm, fail, ok in c.fetchall()
+    ]
+
+
+def region_activity_over_time(c, bucket="day", since=None, until=None):
+    """region_activity je Region und Zeit-Bucket (hour/day/month).
+
+    new_comments ist der Zuwachs von total_comments innerhalb des Buckets.
+    Für day/month kommen bereits aufgerollte Tage aus region_activity_daily
+    (siehe retention.py), der Rest aus den Rohzeilen; bei aufgerollten Tagen
+    greift das Zeitfenster tageweise. hour liest nur Rohzeilen.
+    """
+    width = BUCKETS[bucket]
+    rolled = rolled_until(c, "region_rolled_until") if bucket != "hour" else ""
+    raw_where, raw_params = window_clause("run_timestamp", since, until)
+    day_where, day_params = bucket_window("day", 10, since, until)
+    raw = history_table(c, "region_activity")
+    c.execute(f"""
+        SELECT
+            region_name,
+            substr(ts, 1, {width}) AS bucket,
+            SUM(scans),
+            SUM(sum_stations) * 1.0 / SUM(scans),
+            SUM(sum_with_comments) * 1.0 / SUM(scans),
+            MAX(max_total),
+            MAX(max_total) - MIN(min_total)
+        FROM (
+            SELECT region_name, day AS ts, scans, sum_stations, sum_stations_with_comments AS sum_with_comments,
+                   min_total_comments AS min_total, max_total_comments AS max_total
+            FROM region_activity_daily
+            WHERE day < ? AND {day_where}
+            UNION ALL
+            SELECT region_name, run_timestamp, 1, stations_count, stations_with_comments,
+                   total_comments, total_comments
+            FROM {raw}
+            WHERE run_timestamp >= ? AND {raw_where}
+        )
+        GROUP BY region_name, bucket
+        ORDER BY region_name, bucket
+    """, [rolled, *day_params, rolled, *raw_params])
+    return [
+        {
+            "region": region, "bucket": b, "scans": scans, "avg_stations": avg_st,
+            "avg_stations_with_comments": avg_wc, "total_comments": total, "new_comments": new,
+        }
+        for region, b, scans, avg_st, avg_wc, total, new in c.fetchall()
+    ]
+
+
+def rolled_until(c, key):
+    """Wasserstand eines Rollups aus retention_state ("" = noch nichts aufgerollt)."""
+    c.execute("SELECT value FROM retention_state WHERE key = ?", (key,))
+    row = c.fetchone()
+    return row[0] if row else ""
+
+
+def station_downtime(c, since=None, until=None, top_n=10):
+    """Stationen mit der längsten bekannten Ausfallzeit (aus station_activity_daily, tageweise)."""
+    where, params = bucket_window("bucket", 10, since, until)
+    c.execute(f"""
+        SELECT station_id, SUM(down_seconds) AS down, SUM(transitions), SUM(failed_checkins)
+        FROM station_activity_daily
+        WHERE {where}
+        GROUP BY station_id
+        HAVING down > 0
+        ORDER BY down DESC, station_id
+        LIMIT ?
+    """, params + [top_n])
+    return [
+        {"station_id": sid, "down_hours": down / 3600, "transitions": tr, "failed_checkins": failed}
+        for sid, down, tr, failed in c.fetchall()
+    ]
+
+
+def station_activity_over_time(c, station_id, bucket="day", since=None, until=None):
+    """Ausfallzeit, Status-Übergänge und Kommentare einer Station je Bucket (aus den Rollups).
+
+    hour liest station_activity_hourly (nur innerhalb des Stunden-Fensters der Retention vorhanden),
+    day/month station_activity_daily. Buckets ohne Aktivität fehlen.
+    """
+    width = BUCKETS[bucket]
+    table = "station_activity_hourly" if bucket == "hour" else "station_activity_daily"
+    where, params = bucket_window("bucket", BUCKETS["hour"] if bucket == "hour" else 10, since, until)
+    c.execute(f"""
+        SELECT substr(bucket, 1, {width}) AS b, SUM(down_seconds), SUM(transitions),
+               SUM(comments), SUM(failed_checkins), SUM(successful_checkins)
+        FROM {table}
+        WHERE station_id = ? AND {where}
+        GROUP BY b
+        ORDER BY b
+    """, [station_id, *params])
+    return [
+        {"bucket": b, "down_seconds": down, "transitions": tr, "comments": n,
+         "failed_checkins": failed, "successful_checkins": ok}
+        for b, down, tr, n, failed, ok in c.fetchall()
+    ]
+
+
+def station_health_ranking(c, n=10, worst=True, min_checkins=1, now=None):
+    """Stationen nach Health-Score, standardmäßig die schlechtesten zuerst.
+
+    Der Score wird zum Zeitpunkt now (Standard: jetzt) aus station_health gerechnet (health.CURRENT_SQL),
+    gealtert seit dem letzten Schreiben der Station.
+    """
+    order = "ASC" if worst else "DESC"
+    health.ensure_math(c.connection)
+    c.execute(f"""
+        SELECT h.station_id, s.title, s.operator, h.score, h.failure_ratio, h.last_success, h.checkins,
+               h.is_operational
+        FROM ({health.CURRENT_SQL}) h
+        JOIN stations s ON s.station_id = h.station_id
+        WHERE h.checkins >= :min_checkins AND s.removed_at IS NULL
+        ORDER BY h.score {order}, h.station_id
+        LIMIT :n
+    """, {**health.params(now), "min_checkins": min_checkins, "n": n})
+    return [
+        {"station_id": sid, "title": title, "operator": op, "score": score, "failure_ratio": ratio,
+         "last_success": last_ok, "checkins": checkins, "is_operational": operational}
+        for sid, title, op, score, ratio, last_ok, checkins, operational in c.fetchall()
+    ]
+
+
+def print_report(c, top_n=10):
+    """Kommentar-Analyse über die gespeicherten Daten (aus fetch.run nach jedem Lauf mit Änderungen)."""
+    stats = comment_stats(c)
+
+    print("📊 Kommentar-Analyse:")
+    print(f"   ➤ Anzahl Stationen: {stats['stations']}")
+    print(f"   ➤ Gesamtanzahl Kommentare: {stats['total_comments']}")
+    print(f"   ➤ Ø Kommentare pro Station: {stats['avg_comments']:.2f}")
+    print(f"   ➤ Max Kommentare an einer Station: {stats['max_comments']}")
+    print()
+
+    print(f"🏆 Top kommentierte Stationen (Top {top_n}):")
+    for row in top_stations(c, top_n):
+        print(f"   - Station {row['station_id']}: {row['comments']} Kommentare")
+
+    print("\n📈 Histogramm der Kommentarhäufigkeit:")
+    for cnt, n in comment_histogram(c).items():
+        print(f"   {cnt} Kommentare: {n} Stationen")
+
+    worst = station_health_ranking(c, top_n)
+    if worst:
+        print(f"\n🩺 Stationen mit dem schlechtesten Health-Score (Top {top_n}):")
+        for row in worst:
+            print(f"   - Station {row['station_id']} ({row['title']}): Score {row['score']:.0f}, "
+                  f"{row['checkins']} Check-ins, letzter Erfolg {row['last_success'] or '–'}")
+
+    print("\n")
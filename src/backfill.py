@@ -0,0 +1,256 @@
+"""Bulk-Backfill aus lokalen OCM-Dumps (JSON-Export als Array, auch .gz, oder Verzeichnisse mit POI-Dateien).
+
+    python backfill.py ocm-export-gb.json.gz [weitere Dateien/Verzeichnisse] [--workers 4] [--batch 1000]
+
+Ablauf:
+    Leser (Hauptprozess)   streamt die Dateien mit jsonstream.iter_array(raw=True) und schneidet
+                           den JSON-Text jedes POIs aus, Batches zu je --batch POIs
+    Worker (Prozess-Pool)  parsen, zerlegen (records.station_record), Fingerprint, kanonisches JSON,
+                           Hashes und zlib-Kompression der Blobs — alles ohne DB-Zustand
+    Writer (Hauptprozess)  entscheidet mit known_hashes/last wie normalize_stations über Überspringen
+                           und Status-Diff, in Dump-Reihenfolge, und schreibt mit write_stations
+
+Weil der Writer dieselbe Entscheidung in derselben Reihenfolge trifft und
+dieselbe Schreibfunktion nutzt, entsteht derselbe Inhalt in stations,
+comments_history, status_history und json_blobs wie mit save_to_db (bis auf
+die Zeitstempel). Für die Dauer des Ladens laufen die Pragmas auf Bulk-Betrieb
+(synchronous=OFF, großer Cache); Sekundärindizes und FTS-Trigger werden
+entfernt und am Ende mit init_db neu angelegt, Volltextindex, R*Tree und
+Health-Score einmal komplett aufgebaut (fetch.begin_bulk_load /
+fetch.finish_bulk_load, wie die Erstbefüllung mit save_to_db). Outbox-Events entstehen beim
+Backfill keine: eine Erstbefüllung ist keine Änderung, auf die Konsumenten
+reagieren sollen.
+
+Auch die Protokoll-Trigger für Changesets ruhen während des Ladens: statt
+eines Changesets mit jeder geladenen Zeile markiert der Backfill die DB für
+eine neue Basis (changeset.require_base); export_changes schreibt sie am
+Ende nach data/base.db, veröffentlicht wird sie als ev.db.
+"""
+import argparse
+import collections
+import gzip
+import json
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import fetch
+import jsonstream
+import records
+
+READ_CHUNK = 1024 * 1024
+BATCH_SIZE = 1000  # POIs je Worker-Aufgabe
+COMMIT_EVERY = 20_000  # POIs je Transaktion
+BULK_CACHE_KB = 256 * 1024
+PROGRESS_EVERY = 50_000
+
+
+def dump_files(paths):
+    """Dateien (.json / .json.gz) aus Pfaden und Verzeichnissen, Verzeichnisse sortiert rekursiv."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith((".json", ".json.gz")):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def read_chunks(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        while True:
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                return
+            yield chunk
+
+
+def iter_poi_texts(paths):
+    """JSON-Text je POI: Arrays werden gestreamt, Einzelobjekte (eine Datei je POI) ganz gelesen."""
+    for path in dump_files(paths):
+        chunks = read_chunks(path)
+        first = next(chunks, b"")
+        if first.lstrip()[:1] == b"[":
+            yield from jsonstream.iter_array(prepend(first, chunks), raw=True)
+        elif first.strip():
+            yield (first + b"".join(chunks)).decode("utf-8")
+
+
+def prepend(first, chunks):
+    yield first
+    yield from chunks
+
+
+def iter_batches(texts, size):
+    batch = []
+    for text in texts:
+        batch.append(text)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def prepare(texts):
+    """Worker: JSON-Texte → (StationRecords, {hash: komprimierter Blob}, Fehler).
+
+    Wie normalize_stations, aber ohne known_hashes/last: Fingerprint und Status-Blob
+    werden für jede Station berechnet, der Writer verwirft, was er nicht braucht.
+    """
+    data = json.loads("[" + ",".join(texts) + "]")
+    stations = []
+    blobs = {}
+    errors = 0
+    for d in data:
+        try:
+            record = records.station_record(d)
+            if record is None:
+                continue
+            record.content_hash = fetch.station_fingerprint(record)
+            for comment in record.load_comments():
+                if comment.comment_id is None:
+                    continue
+                try:
+                    comment_json = fetch.canonical_json(comment.raw)
+                    comment.content_hash = fetch.content_hash(comment_json)
+                    blobs[comment.content_hash] = comment_json
+                except Exception as e:
+                    print(f"⚠️ Fehler beim Verarbeiten eines Kommentars an Station {record.station_id}: {e}")
+                    errors += 1
+                comment.raw = None
+            station_json = fetch.canonical_json(d)
+            record.status.raw_hash = fetch.content_hash(station_json)
+            blobs[record.status.raw_hash] = station_json
+            record.raw = None
+            stations.append(record)
+        except Exception as e:
+            print(f"⚠️ Fehler beim Verarbeiten station {d.get('ID')}: {e}")
+            errors += 1
+    compressed = {
+        h: zlib.compress(text.encode("utf-8"), fetch.BLOB_COMPRESSION_LEVEL) for h, text in blobs.items()
+    }
+    return stations, compressed, errors
+
+
+def resolve(stations, blobs, known_hashes, last):
+    """Writer: zustandsabhängiger Teil von normalize_stations. Rückgabe: Batch für write_stations."""
+    kept = []
+    kept_blobs = {}
+    skipped = 0
+    for record in stations:
+        if known_hashes.get(record.station_id) == record.content_hash:
+            skipped += 1
+            continue
+        known_hashes[record.station_id] = record.content_hash
+        kept.append(record)
+        for comment in record.comments:
+            if comment.content_hash is not None:
+                kept_blobs[comment.content_hash] = blobs[comment.content_hash]
+        status = record.status
+        current = status.key()
+        if last.get(record.station_id) != current:
+            status.previous = last.get(record.station_id)
+            last[record.station_id] = current
+            kept_blobs[status.raw_hash] = blobs[status.raw_hash]
+        else:
+            status.raw_hash = None
+    return {"stations": kept, "blobs": kept_blobs, "skipped": skipped, "compressed": True}
+
+
+def prepared_batches(paths, workers, batch_size):
+    """prepare() über alle Batches, in Dump-Reihenfolge; höchstens 2 × workers Aufgaben gleichzeitig."""
+    batches = iter_batches(iter_poi_texts(paths), batch_size)
+    if workers <= 0:
+        yield from map(prepare, batches)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending = collections.deque()
+        for batch in batches:
+            pending.append(pool.submit(prepare, batch))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def backfill(paths, workers=None, batch_size=BATCH_SIZE, commit_every=COMMIT_EVERY):
+    """Lädt die Dumps in DB_PATH. Rückgabe: dict mit Zählern wie save_to_db."""
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) - 1)  # ein Kern bleibt für Leser und Writer
+    fetch.init_db()
+    fetch.METRICS.reset()
+    laps = fetch.METRICS.laps("backfill")
+
+    conn = fetch.connect()
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(f"PRAGMA cache_size=-{BULK_CACHE_KB}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    c = conn.cursor()
+    known_hashes = fetch.load_station_hashes(c)
+    last = fetch.load_latest_status(c)
+    fetch.begin_bulk_load(conn)
+    laps.lap("prepare")
+
+    totals = {"stations": 0, "skipped": 0, "processed": 0, "new_comments": 0, "status_changes": 0}
+    t0 = time.perf_counter()
+    pending = 0
+    next_progress = PROGRESS_EVERY
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        for stations, blobs, errors in prepared_batches(paths, workers, batch_size):
+            if errors:
+                fetch.METRICS.count(errors=errors)
+            stats = fetch.write_stations(c, resolve(stations, blobs, known_hashes, last), rescore=False,
+                                         emit_events=False)
+            for k, v in stats.items():
+                totals[k] += v
+            pending += len(stations)
+            if pending >= commit_every:
+                conn.commit()
+                c.execute("BEGIN IMMEDIATE")
+                pending = 0
+            if totals["stations"] >= next_progress:
+                rate = totals["stations"] / (time.perf_counter() - t0) * 60
+                print(f"📥 {totals['stations']} POIs geladen ({rate:,.0f}/min)")
+                next_progress += PROGRESS_EVERY
+        conn.commit()
+        laps.lap("load")
+    except BaseException:
+        conn.rollback()
+        fetch.METRICS.count(errors=1)
+        raise
+    finally:
+        # Auch nach Abbruch: Indizes und Trigger wiederherstellen, sonst läuft der Live-Betrieb ohne sie weiter
+        fetch.finish_bulk_load(conn)
+        laps.lap("indexes")
+        fetch.release(conn)
+
+    elapsed = time.perf_counter() - t0
+    print(f"✅ Backfill: {totals['stations']} POIs in {elapsed:.1f} s "
+          f"({totals['stations'] / max(elapsed, 1e-9) * 60:,.0f}/min), {workers} Worker")
+    fetch.print_saved(totals)
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OCM-Dump(s) → SQLite (paralleles Bulk-Laden)")
+    parser.add_argument("paths", nargs="+", help="JSON-Exporte (.json, .json.gz) oder Verzeichnisse")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker-Prozesse (Standard: CPUs - 1, 0 = alles im Hauptprozess)")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="POIs je Worker-Aufgabe")
+    args = parser.parse_args()
+
+    try:
+        backfill(args.paths, args.workers, args.batch)
+    except (OSError, ValueError) as e:
+        print(f"❌ Backfill abgebrochen: {e}")
+        sys.exit(1)
+    finally:
+        fetch.record_metrics("backfill")
+    fetch.export_changes()
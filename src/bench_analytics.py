@@ -0,0 +1,63 @@
+"""Benchmark: analytics.py über eine synthetische DB mit Millionen comments_history-Zeilen.
+
+Aufruf:  python src/bench_analytics.py [anzahl_kommentare] [anzahl_stationen]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+import analytics
+import fetch
+
+OPERATORS = ["Pod Point", "BP Pulse", "Shell Recharge", "Ionity", "Tesla", "Source London"]
+CHECKINS = [analytics.FAILED_CHECKIN, analytics.SUCCESS_CHECKIN, None]
+
+
+def build_db(path, n_comments, n_stations, seed=3):
+    rnd = random.Random(seed)
+    fetch.DB_PATH = path
+    fetch.init_db()
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO stations (station_id, title, operator) VALUES (?, ?, ?)",
+        ((i, f"Station {i}", rnd.choice(OPERATORS)) for i in range(1, n_stations + 1)),
+    )
+    conn.executemany(
+        """INSERT INTO comments_history (station_id, comment_ocm_id, checkin_status, comment_date)
+           VALUES (?, ?, ?, ?)""",
+        (
+            (rnd.randint(1, n_stations), i, rnd.choice(CHECKINS),
+             f"20{rnd.randint(15, 24)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}T12:00:00Z")
+            for i in range(1, n_comments + 1)
+        ),
+    )
+    conn.commit()
+    return conn
+
+
+def main():
+    n_comments = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    n_stations = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = build_db(os.path.join(tmp, "bench.db"), n_comments, n_stations)
+        c = conn.cursor()
+        print(f"⏱️ Analytics Benchmark: {n_comments} Kommentare, {n_stations} Stationen\n")
+        for label, fn in [
+            ("comment_stats", lambda: analytics.comment_stats(c)),
+            ("comment_histogram", lambda: analytics.comment_histogram(c)),
+            ("top_stations", lambda: analytics.top_stations(c, 10)),
+            ("operator_activity", lambda: analytics.operator_activity(c)),
+            ("operator_activity 2024", lambda: analytics.operator_activity(c, since="2024-01-01", until="2025-01-01")),
+        ]:
+            t0 = time.perf_counter()
+            fn()
+            print(f"   {label:<24} {(time.perf_counter() - t0) * 1000:8.1f} ms")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
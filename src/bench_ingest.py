@@ -0,0 +1,217 @@
+"""Benchmark-Suite für den Ingest-Pfad gegen den lokalen OCM-Stub (ohne Live-API).
+
+Je Szenario (Anzahl Stationen × Historien-Tiefe) läuft ein eigener Prozess,
+damit Peak-RSS pro Szenario messbar ist:
+
+1. Historie aufbauen: `depth` Schnappschüsse von SyntheticOcm einspielen
+   (der erste über fetch.run(), damit das Kachel-Layout gelernt ist).
+2. `runs` gemessene Läufe: Bestand fortschreiben, dann fetch.run() → export_changes
+   gegen den Stub — derselbe Pfad wie im Betrieb (Pipeline aus OcmSource,
+   fetch/normalize/write überlappend, danach Report und Sync-Zustand), als
+   Full-Sync, damit jeder Lauf den ganzen Bestand abfragt.
+3. scan_uk_regions gegen denselben Stub.
+
+Gemeldet werden Durchsatz, p50/p95 je Lauf und Phase (Pipeline und Report
+aus den Lauf-Metriken) sowie Peak-RSS (ganzer Prozess inkl. Generator und Stub). Mit --baseline wird gegen eine frühere
+Messung verglichen; bei Regression endet das Skript mit Exit-Code 1.
+
+Aufruf:  python src/bench_ingest.py [--sizes 1000,10000,100000] [--depths 1,10] [--runs 5]
+                                    [--latency 0.1]
+                                    [--baseline PFAD] [--save-baseline] [--tolerance 0.25]
+"""
+import argparse
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import fetch
+from ocm_stub import StubOcmServer
+from synthetic import SyntheticOcm
+
+BASELINE_PATH = os.path.join(fetch.BASE_DIR, "..", "data", "bench_baseline.json")
+CHURN = 0.05
+COMMENT_RATE = 0.02
+REGION_RUNS = 3
+
+# Metrik → Toleranz-Option; höher = schlechter
+CHECKED_METRICS = {"ingest_p50": "tolerance", "ingest_p95": "tolerance", "peak_rss_mb": "rss_tolerance"}
+
+
+def percentile(values, q):
+    """Perzentil mit linearer Interpolation (q in 0..100)."""
+    values = sorted(values)
+    if not values:
+        return 0.0
+    pos = (len(values) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - t0, result
+
+
+def run_scenario(n_stations, depth, runs, seed=42, latency=0.0):
+    """Misst ein Szenario im aktuellen Prozess. Rückgabe: dict mit Metriken."""
+    gen = SyntheticOcm(n_stations, seed)
+    phases = {"run": [], "pipeline": [], "report": [], "export": []}
+    totals = []
+    fetched = 0
+
+    with tempfile.TemporaryDirectory() as tmp, StubOcmServer(gen.payload(), latency=latency) as stub:
+        fetch.DB_PATH = os.path.join(tmp, "bench.db")
+        fetch.BASE_PATH = os.path.join(tmp, "base.db")
+        fetch.CHANGESET_DIR = os.path.join(tmp, "changesets")
+        fetch.PARTITION_DIR = os.path.join(tmp, "partitions")
+        fetch.METRICS_DIR = os.path.join(tmp, "metrics")
+        fetch.OCM_BASE_URL = stub.url
+        fetch.OCM_MAX_RPS = 10_000
+        fetch.DELTA_SYNC = False  # jeder Lauf ein Full-Sync, sonst hinge die Last an der Uhr des Generators
+        fetch.POLL_BUDGET = 0
+
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            fetch.init_db()
+
+            # Historie: erster Schnappschuss über run() (Erstbefüllung, lernt das Layout), der Rest direkt
+            fetch.run()
+            for _ in range(depth - 1):
+                gen.advance(CHURN, COMMENT_RATE)
+                fetch.save_to_db(gen.payload())
+            fetch.export_changes()
+
+            for _ in range(runs):
+                gen.advance(CHURN, COMMENT_RATE)
+                stub.set_pois(gen.payload())
+
+                t_run, _ = timed(fetch.run)
+                t_export, _ = timed(fetch.export_changes)
+                phases["run"].append(t_run)
+                phases["pipeline"].append(fetch.METRICS.phases.get("run.pipeline", 0.0))
+                phases["report"].append(fetch.METRICS.phases.get("run.report", 0.0))
+                phases["export"].append(t_export)
+                totals.append(t_run + t_export)
+                fetched += fetch.METRICS.counters.get("stations_seen", 0)
+
+            region_times = [
+                timed(fetch.scan_uk_regions, max_rps=10_000)[0] for _ in range(REGION_RUNS)
+            ]
+
+    result = {
+        "stations": n_stations,
+        "depth": depth,
+        "runs": runs,
+        "throughput": fetched / sum(totals) if totals else 0.0,
+        "ingest_p50": percentile(totals, 50),
+        "ingest_p95": percentile(totals, 95),
+        "regions_p50": percentile(region_times, 50),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # Linux: KB
+    }
+    for phase, values in phases.items():
+        result[f"{phase}_p50"] = percentile(values, 50)
+    return result
+
+
+def run_isolated(n_stations, depth, runs, seed, latency=0.0):
+    """Startet ein Szenario in einem frischen Prozess (eigenes Peak-RSS)."""
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", f"{n_stations},{depth},{runs},{seed},{latency}"],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def scenario_key(result):
+    return f"n{result['stations']}_d{result['depth']}"
+
+
+def compare(results, baseline, tolerance, rss_tolerance):
+    """Liste der Regressionen gegenüber baseline: (Szenario, Metrik, alt, neu)."""
+    limits = {"tolerance": tolerance, "rss_tolerance": rss_tolerance}
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        for metric, option in CHECKED_METRICS.items():
+            if metric in old and result[metric] > old[metric] * (1 + limits[option]):
+                regressions.append((key, metric, old[metric], result[metric]))
+    return regressions
+
+
+def print_result(r):
+    print(
+        f"   {r['stations']:>7} Stationen, Tiefe {r['depth']:>3}: "
+        f"{r['throughput']:9.0f} Stationen/s | Lauf p50 {r['ingest_p50'] * 1000:8.1f} ms, "
+        f"p95 {r['ingest_p95'] * 1000:8.1f} ms "
+        f"(Pipeline {r['pipeline_p50'] * 1000:.0f} / Report {r['report_p50'] * 1000:.0f} / "
+        f"export {r['export_p50'] * 1000:.0f} ms) | Regionen p50 {r['regions_p50'] * 1000:6.1f} ms | "
+        f"Peak-RSS {r['peak_rss_mb']:7.1f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest-Benchmark gegen den OCM-Stub")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Anzahl Stationen, kommagetrennt")
+    parser.add_argument("--depths", default="1,10", help="Historien-Tiefen (Läufe vor der Messung)")
+    parser.add_argument("--runs", type=int, default=5, help="gemessene Läufe je Szenario")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="simulierte Antwortzeit des Stubs je Request in Sekunden")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Vergleichsmessung (JSON)")
+    parser.add_argument("--save-baseline", action="store_true", help="Ergebnis als neue Baseline speichern")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="erlaubter Zuwachs bei p50/p95")
+    parser.add_argument("--rss-tolerance", type=float, default=0.15, help="erlaubter Zuwachs beim Peak-RSS")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        n, depth, runs, seed, latency = args.worker.split(",")
+        print(json.dumps(run_scenario(int(n), int(depth), int(runs), int(seed), float(latency))))
+        return
+
+    sizes = [int(v) for v in args.sizes.split(",")]
+    depths = [int(v) for v in args.depths.split(",")]
+    print(f"⏱️ Ingest-Benchmark: {len(sizes) * len(depths)} Szenarien, {args.runs} Läufe je Szenario\n")
+
+    results = {}
+    for n in sizes:
+        for depth in depths:
+            r = run_isolated(n, max(1, depth), args.runs, args.seed, args.latency)
+            results[scenario_key(r)] = r
+            print_result(r)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\n💾 Baseline gespeichert: {args.baseline}")
+        return
+
+    if baseline is None:
+        print(f"\nℹ️ Keine Baseline unter {args.baseline} — Vergleich übersprungen (--save-baseline).")
+        return
+
+    regressions = compare(results, baseline, args.tolerance, args.rss_tolerance)
+    if regressions:
+        print("\n❌ Regression gegenüber Baseline:")
+        for key, metric, old, new in regressions:
+            print(f"   - {key} {metric}: {old:.3f} → {new:.3f} (+{(new / old - 1) * 100:.0f} %)")
+        sys.exit(1)
+    print("\n✅ Keine Regression gegenüber Baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Vorher/Nachher-Benchmark für save_to_db auf einem synthetischen OCM-Payload.
+
+Aufruf:  python src/bench_save.py [anzahl_stationen] [runs]
+
+Der erste Run ist die Erstbefüllung (Bulk-Laden wie der Backfill), die
+weiteren haben 5 % Status-Churn. Beide werden getrennt ausgewiesen.
+"""
+import datetime
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import timezone
+
+import fetch
+from synthetic import synthetic_payload
+
+REPEAT = 3  # Durchgänge je Variante, gewertet wird das Minimum (der Rechner rauscht stark)
+
+
+def legacy_save_to_db(data):
+    """Alte Implementierung (eine Abfrage pro Station/Kommentar) als Referenz."""
+    conn = sqlite3.connect(fetch.DB_PATH)
+    c = conn.cursor()
+    for d in data:
+        station_id = d.get("ID")
+        if station_id is None:
+            continue
+        c.execute("""
+            INSERT INTO stations (station_id, title, operator, lat, lon, max_power_kw, num_points)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(station_id) DO UPDATE SET
+                title=excluded.title, operator=excluded.operator, lat=excluded.lat,
+                lon=excluded.lon, max_power_kw=excluded.max_power_kw, num_points=excluded.num_points
+        """, (station_id, fetch.safe_get(d, "AddressInfo", "Title"), fetch.safe_get(d, "OperatorInfo", "Title"),
+              fetch.safe_get(d, "AddressInfo", "Latitude"), fetch.safe_get(d, "AddressInfo", "Longitude"),
+              fetch.max_power_kw(d), d.get("NumberOfPoints")))
+        status = fetch.safe_get(d, "StatusType", "Title")
+        is_operational = fetch.safe_get(d, "StatusType", "IsOperational")
+        comments = d.get("UserComments") or []
+        for comment in comments:
+            cid = comment.get("ID")
+            c.execute("SELECT 1 FROM comments_history WHERE station_id = ? AND comment_ocm_id = ?", (station_id, cid))
+            if not c.fetchone():
+                c.execute("""
+                    INSERT INTO comments_history (station_id, comment_ocm_id, comment_type, checkin_status,
+                                                  comment_text, comment_date, raw_json)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (station_id, cid, fetch.safe_get(comment, "CommentType", "Title"),
+                      fetch.safe_get(comment, "CheckinStatusType", "Title"), comment.get("Comment"),
+                      comment.get("DateCreated"), json.dumps(comment)))
+        ctt, cst, ctext = fetch.comment_summary(comments)
+        c.execute("""
+            SELECT status, comment_type_title, checkin_status_title, comment_text
+            FROM status_history WHERE station_id = ? ORDER BY id DESC LIMIT 1
+        """, (station_id,))
+        last = c.fetchone()
+        if last != (status, ctt, cst, ctext):
+            c.execute("""
+                INSERT INTO status_history (station_id, status, is_operational, timestamp, raw_json,
+                                            comment_type_title, checkin_status_title, comment_text)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (station_id, status, is_operational, datetime.datetime.now(timezone.utc).isoformat(),
+                  json.dumps(d), ctt, cst, ctext))
+    conn.commit()
+    conn.close()
+
+
+def bench(label, save_fn, payloads, repeat=REPEAT):
+    """Zeiten je Run, jeweils das Minimum aus repeat Durchgängen mit frischer DB."""
+    times = [float("inf")] * len(payloads)
+    for _ in range(repeat):
+        fetch.STATE_CACHE.clear()
+        with tempfile.TemporaryDirectory() as tmp:
+            fetch.DB_PATH = os.path.join(tmp, "bench.db")
+            fetch.init_db()
+            for i, data in enumerate(payloads):
+                t0 = time.perf_counter()
+                save_fn(data)
+                times[i] = min(times[i], time.perf_counter() - t0)
+    first, rest = times[0], times[1:]
+    avg_rest = sum(rest) / len(rest) if rest else 0.0
+    print(f"   {label:<8} erster Run: {first * 1000:8.1f} ms | Folge-Runs Ø: {avg_rest * 1000:8.1f} ms")
+    return times
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    # Erster Run = Erstbefüllung, danach 5 % Status-Churn pro Run
+    payloads = [synthetic_payload(n, churn=0.05 if i else 0.0, churn_seed=i) for i in range(runs)]
+
+    print(f"⏱️ save_to_db Benchmark: {n} Stationen, {runs} Runs\n")
+    before = bench("vorher", legacy_save_to_db, payloads)
+    after = bench("nachher", fetch.save_to_db, payloads)
+    # Erstbefüllung und Folge-Runs getrennt: die Erstbefüllung komprimiert und hasht jeden Blob
+    # (die Referenz speichert Roh-JSON), ihr Verhältnis ist deshalb ein anderes als im Dauerbetrieb
+    print(f"\n   ➤ Speedup erster Run: {before[0] / after[0]:.1f}x")
+    if runs > 1:
+        print(f"   ➤ Speedup Folge-Runs: {sum(before[1:]) / sum(after[1:]):.1f}x")
+    print(f"   ➤ Speedup gesamt:     {sum(before) / sum(after):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark: R*Tree-Abfragen (spatial.py) gegen naiven Full-Table-Scan.
+
+Aufruf:  python src/bench_spatial.py [anzahl_stationen] [anzahl_abfragen]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+import fetch
+import spatial
+import tiling
+
+
+def naive_within_radius(c, lat, lon, radius_km):
+    c.execute("SELECT station_id, title, operator, lat, lon FROM stations WHERE lat IS NOT NULL")
+    hits = []
+    for row in c.fetchall():
+        dist = spatial.haversine_km(lat, lon, row[3], row[4])
+        if dist <= radius_km:
+            hits.append(row + (dist,))
+    hits.sort(key=lambda r: r[5])
+    return hits
+
+
+def naive_nearest(c, lat, lon, k):
+    c.execute("SELECT station_id, title, operator, lat, lon FROM stations WHERE lat IS NOT NULL")
+    rows = [row + (spatial.haversine_km(lat, lon, row[3], row[4]),) for row in c.fetchall()]
+    rows.sort(key=lambda r: r[5])
+    return rows[:k]
+
+
+def timed(fn, queries):
+    t0 = time.perf_counter()
+    results = [fn(*q) for q in queries]
+    return (time.perf_counter() - t0) / len(queries), results
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rnd = random.Random(7)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fetch.DB_PATH = os.path.join(tmp, "bench.db")
+        fetch.init_db()
+        conn = sqlite3.connect(fetch.DB_PATH)
+        south, west, north, east = tiling.GB_BBOX
+        conn.executemany(
+            "INSERT INTO stations (station_id, title, lat, lon) VALUES (?, ?, ?, ?)",
+            ((i, f"Station {i}", rnd.uniform(south, north), rnd.uniform(west, east)) for i in range(1, n + 1)),
+        )
+        conn.commit()
+        c = conn.cursor()
+
+        points = [(rnd.uniform(50.5, 55.0), rnd.uniform(-4.0, 1.0)) for _ in range(n_queries)]
+        radius_queries = [(c, lat, lon, 5.0) for lat, lon in points]
+        knn_queries = [(c, lat, lon, 10) for lat, lon in points]
+
+        print(f"⏱️ Spatial Benchmark: {n} Stationen, {n_queries} Abfragen\n")
+        for label, naive_fn, fast_fn, queries in [
+            ("Umkreis 5 km", naive_within_radius, spatial.stations_within_radius, radius_queries),
+            ("10 nächste", naive_nearest, spatial.nearest_stations, knn_queries),
+        ]:
+            t_naive, r_naive = timed(naive_fn, queries)
+            t_fast, r_fast = timed(fast_fn, queries)
+            same = [[r[0] for r in a] for a in r_naive] == [[r[0] for r in b] for b in r_fast]
+            print(
+                f"   {label:<13} naiv: {t_naive * 1000:8.2f} ms | R*Tree: {t_fast * 1000:6.2f} ms | "
+                f"{t_naive / t_fast:6.0f}x | identisch: {same}"
+            )
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
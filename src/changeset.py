@@ -0,0 +1,362 @@
+"""Inkrementelle Changesets statt vollständiger ev.db-Uploads.
+
+Trigger (von init_db über install_changelog angelegt) protokollieren in
+`changelog`, welche Zeilen eingefügt, geändert oder gelöscht wurden. Nach
+einem Lauf schreibt export_changeset genau diese Zeilen als kompaktes,
+gzip-komprimiertes JSON mit fortlaufender Sequenznummer. Aus einer Basis-DB
+und der Kette der Changesets lässt sich die DB wieder aufbauen (rebuild) und
+zu einer neuen Basis verdichten (compact).
+
+Mit ack=False bleibt ein exportiertes Changeset vorläufig: changelog und
+last_seq ändern sich erst mit ack_changeset, also erst nachdem die Datei
+sicher hochgeladen ist. Schlägt der Upload fehl, schreibt der nächste Export
+dieselbe Sequenznummer erneut (dann mit allen Änderungen seither) — die Kette
+bekommt keine Lücke.
+
+Aufruf:
+    python src/changeset.py rebuild <base.db> <out.db> <changeset>...
+    python src/changeset.py compact <base.db> <out.db> <changeset>...
+    python src/changeset.py ack <db> <changeset>...
+
+    python src/changeset.py base <db> <base.db>
+
+Fehlt base.db, beginnt rebuild mit einer leeren DB (Kette ab Changeset 1).
+
+Bulk-Laden (backfill.py) läuft ohne Protokoll-Trigger (suspend_changelog)
+und markiert die DB mit require_base: statt eines Changesets mit jeder
+geladenen Zeile schreibt write_base (aus fetch.export_changes) eine neue
+Basis, bis dahin exportiert export_changeset nichts. last_seq läuft dabei weiter
+statt auf 0 zurückzuspringen — Changesets der alten Kette haben kleinere
+Nummern und werden beim Einspielen übersprungen, falls sie noch im Release liegen.
+"""
+import base64
+import datetime
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import sys
+from datetime import timezone
+
+FORMAT_VERSION = 1
+
+# Tabelle → Schlüsselspalte; abgeleitete Tabellen (stations_rtree) baut der Trigger beim Einspielen neu auf
+TRACKED_TABLES = {
+    "stations": "station_id",
+    "status_history": "id",
+    "comments_history": "id",
+    "json_blobs": "hash",
+    "region_activity": "id",
+    "station_latest_status": "station_id",
+    "http_validators": "url_key",
+    "sync_state": "query_key",
+    "tile_layout": "quadkey",
+    "tile_schedule": "quadkey",
+    "run_metrics": "id",
+    "station_activity_hourly": "id",
+    "station_activity_daily": "id",
+    "region_activity_daily": "id",
+    "retention_state": "key",
+    "station_health": "station_id",
+    "station_events": "seq",
+    "partition_catalog": "key",
+    "sealed_comments": "id",
+    "sealed_checkins": "station_id",
+}
+
+
+def install_changelog(c):
+    """Legt changelog, changeset_state und die Protokoll-Trigger an (idempotent)."""
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS changelog (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tbl TEXT,
+            pk,
+            op TEXT
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS changeset_state (
+            key TEXT PRIMARY KEY,
+            value INTEGER
+        )
+    """)
+    c.execute("INSERT OR IGNORE INTO changeset_state (key, value) VALUES ('last_seq', 0)")
+
+    for table, pk in TRACKED_TABLES.items():
+        for event, ref, op in (("INSERT", "NEW", "U"), ("UPDATE", "NEW", "U"), ("DELETE", "OLD", "D")):
+            c.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS changelog_{table}_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    INSERT INTO changelog (tbl, pk, op) VALUES ('{table}', {ref}.{pk}, '{op}');
+                END
+            """)
+
+
+def changelog_triggers():
+    return [f"changelog_{table}_{event}" for table in TRACKED_TABLES for event in ("insert", "update", "delete")]
+
+
+def suspend_changelog(c):
+    """Protokoll-Trigger entfernen (Bulk-Laden); install_changelog (init_db) legt sie wieder an."""
+    for name in changelog_triggers():
+        c.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def require_base(c):
+    """Nach einem Laden ohne Protokoll: changelog verwerfen, als Nächstes muss eine neue Basis her (write_base)."""
+    c.execute("DELETE FROM changelog")
+    c.execute("INSERT OR REPLACE INTO changeset_state (key, value) VALUES ('rebase', 1)")
+
+
+def base_required(c):
+    c.execute("SELECT value FROM changeset_state WHERE key = 'rebase'")
+    row = c.fetchone()
+    return bool(row and row[0])
+
+
+def encode_value(v):
+    return {"b64": base64.b64encode(v).decode("ascii")} if isinstance(v, bytes) else v
+
+
+def decode_value(v):
+    return base64.b64decode(v["b64"]) if isinstance(v, dict) else v
+
+
+def last_seq(c):
+    c.execute("SELECT value FROM changeset_state WHERE key = 'last_seq'")
+    return c.fetchone()[0]
+
+
+def export_changeset(db_path, out_dir, ack=True):
+    """Schreibt alle seit dem letzten Export protokollierten Änderungen als Changeset.
+
+    ack=False: changelog und last_seq bleiben unverändert, bis ack_changeset die Datei bestätigt.
+    Rückgabe: Pfad der Datei, oder None wenn nichts geändert wurde oder eine neue Basis fällig ist.
+    """
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        c.execute("SELECT MAX(seq) FROM changelog")
+        max_seq = c.fetchone()[0]
+        if max_seq is None or base_required(c):
+            conn.rollback()
+            return None
+
+        # Letzte Operation je Zeile gewinnt (z. B. DELETE + INSERT in tile_layout)
+        c.execute("DROP TABLE IF EXISTS temp.changed")
+        c.execute("""
+            CREATE TEMP TABLE changed AS
+            SELECT tbl, pk, op FROM changelog
+            WHERE seq IN (SELECT MAX(seq) FROM changelog WHERE seq <= ? GROUP BY tbl, pk)
+        """, (max_seq,))
+
+        tables = {}
+        for table, pk in TRACKED_TABLES.items():
+            c.execute("SELECT pk FROM temp.changed WHERE tbl = ? AND op = 'D'", (table,))
+            deletes = [row[0] for row in c.fetchall()]
+            c.execute(f"""
+                SELECT * FROM {table}
+                WHERE {pk} IN (SELECT pk FROM temp.changed WHERE tbl = ? AND op = 'U')
+            """, (table,))
+            columns = [col[0] for col in c.description]
+            upserts = [[encode_value(v) for v in row] for row in c.fetchall()]
+            if deletes or upserts:
+                tables[table] = {"columns": columns, "upserts": upserts, "deletes": deletes}
+        c.execute("DROP TABLE temp.changed")
+
+        seq = last_seq(c) + 1
+        changeset = {
+            "version": FORMAT_VERSION,
+            "seq": seq,
+            "created": datetime.datetime.now(timezone.utc).isoformat(),
+            "through": max_seq,  # letzte enthaltene changelog.seq (für ack_changeset)
+            "tables": tables,
+        }
+
+        os.makedirs(out_dir, exist_ok=True)
+        path = os.path.join(out_dir, f"changeset-{seq:08d}.json.gz")
+        tmp = path + ".tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(changeset, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+        if ack:
+            confirm(c, seq, max_seq)
+        conn.commit()
+        return path
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def confirm(c, seq, through):
+    """changelog bis through leeren und last_seq auf seq setzen (offene Transaktion)."""
+    c.execute("DELETE FROM changelog WHERE seq <= ?", (through,))
+    c.execute("UPDATE changeset_state SET value = ? WHERE key = 'last_seq'", (seq,))
+
+
+def ack_changeset(db_path, path):
+    """Bestätigt ein mit ack=False exportiertes Changeset (nach erfolgreichem Upload).
+
+    Rückgabe: False, wenn es schon bestätigt war. ValueError, wenn es nicht auf den DB-Stand folgt.
+    """
+    changeset = read_changeset(path)
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        current = last_seq(c)
+        if changeset["seq"] <= current:
+            conn.rollback()
+            return False
+        if changeset["seq"] != current + 1:
+            raise ValueError(f"Changeset {changeset['seq']} passt nicht auf DB-Stand (erwartet {current + 1})")
+        confirm(c, changeset["seq"], changeset["through"])
+        conn.commit()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def read_changeset(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def apply_changeset(conn, changeset):
+    """Spielt ein Changeset ein; es muss direkt auf den Stand der DB folgen."""
+    c = conn.cursor()
+    expected = last_seq(c) + 1
+    if changeset["seq"] != expected:
+        raise ValueError(f"Changeset {changeset['seq']} passt nicht auf DB-Stand (erwartet {expected})")
+
+    for table, entry in changeset["tables"].items():
+        pk = TRACKED_TABLES[table]
+        c.executemany(f"DELETE FROM {table} WHERE {pk} = ?", [(k,) for k in entry["deletes"]])
+        if entry["upserts"]:
+            cols = entry["columns"]
+            placeholders = ",".join("?" * len(cols))
+            c.executemany(
+                f"INSERT OR REPLACE INTO {table} ({','.join(cols)}) VALUES ({placeholders})",
+                ([decode_value(v) for v in row] for row in entry["upserts"]),
+            )
+
+    c.execute("UPDATE changeset_state SET value = ? WHERE key = 'last_seq'", (changeset["seq"],))
+
+
+def rebuild(base_path, out_path, changeset_paths, init_schema=None):
+    """Kopiert base nach out und spielt die Changesets (nach Sequenz sortiert) ein. Rückgabe: letzte Sequenz.
+
+    init_schema(path) bringt das Schema der Kopie vorab auf den aktuellen Stand.
+    Fehlt base_path, wird in eine leere DB eingespielt.
+    """
+    if os.path.exists(base_path):
+        shutil.copyfile(base_path, out_path)
+    elif os.path.exists(out_path):
+        os.remove(out_path)
+    if init_schema is not None:
+        init_schema(out_path)
+    conn = sqlite3.connect(out_path)
+    # INSERT OR REPLACE soll die DELETE-Trigger auslösen, sonst behalten die FTS-Indizes den alten Text
+    conn.execute("PRAGMA recursive_triggers=ON")
+    install_changelog(conn.cursor())
+    conn.commit()
+
+    changesets = sorted((read_changeset(p) for p in changeset_paths), key=lambda cs: cs["seq"])
+    c = conn.cursor()
+    current = last_seq(c)
+    for cs in changesets:
+        if cs["seq"] <= current:
+            continue  # schon in der Basis enthalten
+        apply_changeset(conn, cs)
+        current = cs["seq"]
+
+    # Eingespielte Änderungen sind kein neuer Export
+    c.execute("DELETE FROM changelog")
+    conn.commit()
+    conn.close()
+    return current
+
+
+def write_base(db_path, out_path):
+    """Schreibt db_path kompaktiert (VACUUM INTO) als neue Basis nach out_path. Rückgabe: last_seq der Basis.
+
+    Die Basis hat ein leeres changelog; in db_path werden die darin enthaltenen
+    Einträge gelöscht und eine Markierung von require_base aufgehoben. Changesets
+    bis zur zurückgegebenen Sequenz sind danach überflüssig.
+    """
+    if os.path.exists(out_path):
+        os.remove(out_path)
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("VACUUM INTO ?", (out_path,))
+    finally:
+        conn.close()
+
+    base = sqlite3.connect(out_path)
+    try:
+        c = base.cursor()
+        c.execute("SELECT COALESCE(MAX(seq), 0) FROM changelog")
+        through = c.fetchone()[0]
+        c.execute("DELETE FROM changelog")
+        c.execute("DELETE FROM changeset_state WHERE key = 'rebase'")
+        seq = last_seq(c)
+        base.commit()
+        base.execute("VACUUM")
+    finally:
+        base.close()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM changelog WHERE seq <= ?", (through,))
+        conn.execute("DELETE FROM changeset_state WHERE key = 'rebase'")
+        conn.commit()
+    finally:
+        conn.close()
+    return seq
+
+
+def compact(base_path, out_path, changeset_paths, init_schema=None):
+    """rebuild + VACUUM: neue Basis, ab der ältere Changesets entfallen können."""
+    seq = rebuild(base_path, out_path, changeset_paths, init_schema)
+    conn = sqlite3.connect(out_path)
+    conn.execute("VACUUM")
+    conn.close()
+    return seq
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 4 and sys.argv[1] == "ack":
+        for path in sys.argv[3:]:
+            done = ack_changeset(sys.argv[2], path)
+            print(f"✅ {os.path.basename(path)} bestätigt" if done else f"ℹ️ {os.path.basename(path)} war schon bestätigt")
+        sys.exit(0)
+    if len(sys.argv) == 4 and sys.argv[1] == "base":
+        seq = write_base(sys.argv[2], sys.argv[3])
+        print(f"✅ Neue Basis {sys.argv[3]} auf Stand Changeset {seq}")
+        sys.exit(0)
+    if len(sys.argv) < 4 or sys.argv[1] not in ("rebuild", "compact"):
+        print(__doc__)
+        sys.exit(2)
+
+    import fetch  # Schema der Basis vor dem Einspielen auf aktuellen Stand bringen
+
+    def init_schema(path):
+        fetch.DB_PATH = path
+        fetch.init_db()
+
+    command, base, out, paths = sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4:]
+    fn = rebuild if command == "rebuild" else compact
+    seq = fn(base, out, paths, init_schema=init_schema)
+    print(f"✅ {command}: {out} auf Stand Changeset {seq}")
@@ -0,0 +1,190 @@
+"""Outbox für Änderungs-Events: wer auf Ausfälle reagieren will, liest Events statt status_history zu scannen.
+
+write_stations hängt in derselben Transaktion wie die Daten je geänderter
+Station ein Event an station_events an (Status alt → neu, neue Kommentar-IDs,
+Zeitpunkt); plugshare.save_details ebenso für Standorte mit neuen
+PlugShare-Kommentaren. seq ist streng monoton; ein Konsument merkt sich die letzte
+verarbeitete seq (Cursor) und liest nur, was danach kam — die Kosten hängen an
+der Zahl der Änderungen, nicht an der Größe der Historie.
+
+    read_events(c, after_seq)        Events nach einem Cursor
+    poll(c, consumer) / ack(...)     benannte Cursor in event_cursors
+    relay_ndjson(conn, path)         Events als NDJSON an eine Datei anhängen (eigener Cursor)
+
+Stationen, die ein vollständiger Full-Sync nicht mehr liefert, bekommen ein
+Event mit new_status REMOVED_STATUS (append_removed, aus fetch.mark_removed).
+
+Eine Datei kann nicht an der SQLite-Transaktion teilnehmen; das NDJSON
+entsteht deshalb nach dem Commit aus der Tabelle (Transactional Outbox) und
+ist damit mindestens einmal, bei sauberem Ende genau einmal geschrieben.
+Events älter als RETENTION_RAW_DAYS löscht retention.py.
+
+    python events.py [--after SEQ] [--consumer NAME] [--ndjson PFAD]
+"""
+import argparse
+import datetime
+import json
+import os
+from datetime import timezone
+
+NDJSON_CONSUMER = "ndjson"
+REMOVED_STATUS = "Removed"  # new_status für Stationen, die OCM nicht mehr liefert
+
+
+def install(c):
+    """station_events und event_cursors anlegen (idempotent, aus init_db)."""
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS station_events (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            station_id INTEGER,
+            created TEXT,
+            old_status TEXT,
+            new_status TEXT,
+            is_operational BOOLEAN,
+            new_comment_ids TEXT
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS event_cursors (
+            consumer TEXT PRIMARY KEY,
+            seq INTEGER,
+            updated TEXT
+        )
+    """)
+
+
+def append(c, stations, comments_after_id, timestamp):
+    """Events für einen Schreib-Batch (in der offenen Transaktion). Rückgabe: Anzahl Events.
+
+    comments_after_id: MAX(comments_history.id) vor dem Einfügen — alles danach ist in diesem Batch neu.
+    """
+    c.execute("""
+        SELECT station_id, comment_ocm_id FROM comments_history
+        WHERE id > ?
+        ORDER BY id
+    """, (comments_after_id,))
+    new_comments = {}
+    for station_id, comment_id in c.fetchall():
+        new_comments.setdefault(station_id, []).append(comment_id)
+
+    rows = []
+    for record in stations:
+        status = record.status
+        changed = status.raw_hash is not None  # neue status_history-Zeile
+        comment_ids = new_comments.pop(record.station_id, None)
+        if not changed and not comment_ids:
+            continue
+        if changed:
+            old_status = status.previous[0] if status.previous else None
+        else:
+            old_status = status.status
+        rows.append((
+            record.station_id,
+            timestamp,
+            old_status,
+            status.status,
+            status.is_operational,
+            json.dumps(comment_ids) if comment_ids else None,
+        ))
+
+    c.executemany("""
+        INSERT INTO station_events (station_id, created, old_status, new_status, is_operational, new_comment_ids)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, rows)
+    return len(rows)
+
+
+def append_removed(c, removed, timestamp):
+    """Events für entfernte Stationen (in der offenen Transaktion); removed: [(station_id, letzter Status)]."""
+    c.executemany("""
+        INSERT INTO station_events (station_id, created, old_status, new_status, is_operational, new_comment_ids)
+        VALUES (?, ?, ?, ?, 0, NULL)
+    """, [(station_id, timestamp, status, REMOVED_STATUS) for station_id, status in removed])
+    return len(removed)
+
+
+def read_events(c, after_seq=0, limit=1000, station_id=None):
+    """Events mit seq > after_seq, aufsteigend. Rückgabe: Liste von dicts."""
+    where = "seq > ?"
+    params = [after_seq]
+    if station_id is not None:
+        where += " AND station_id = ?"
+        params.append(station_id)
+    c.execute(f"""
+        SELECT seq, station_id, created, old_status, new_status, is_operational, new_comment_ids
+        FROM station_events
+        WHERE {where}
+        ORDER BY seq
+        LIMIT ?
+    """, params + [limit])
+    return [
+        {"seq": seq, "station_id": sid, "created": created, "old_status": old, "new_status": new,
+         "is_operational": operational, "new_comment_ids": json.loads(ids) if ids else []}
+        for seq, sid, created, old, new, operational, ids in c.fetchall()
+    ]
+
+
+def get_cursor(c, consumer):
+    c.execute("SELECT seq FROM event_cursors WHERE consumer = ?", (consumer,))
+    row = c.fetchone()
+    return row[0] if row else 0
+
+
+def poll(c, consumer, limit=1000):
+    """Events nach dem gespeicherten Cursor des Konsumenten (Cursor bleibt, bis ack())."""
+    return read_events(c, get_cursor(c, consumer), limit)
+
+
+def ack(c, consumer, seq):
+    """Cursor des Konsumenten auf seq setzen (nur vorwärts); committen muss der Aufrufer."""
+    c.execute("""
+        INSERT INTO event_cursors (consumer, seq, updated) VALUES (?, ?, ?)
+        ON CONFLICT(consumer) DO UPDATE SET seq = max(seq, excluded.seq), updated = excluded.updated
+    """, (consumer, seq, datetime.datetime.now(timezone.utc).isoformat()))
+
+
+def relay_ndjson(conn, path, consumer=NDJSON_CONSUMER, batch_size=1000):
+    """Hängt alle noch nicht weitergegebenen Events als NDJSON an path an. Rückgabe: Anzahl Events."""
+    c = conn.cursor()
+    total = 0
+    while True:
+        batch = poll(c, consumer, batch_size)
+        if not batch:
+            return total
+        with open(path, "a", encoding="utf-8") as f:
+            for event in batch:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        ack(c, consumer, batch[-1]["seq"])
+        conn.commit()
+        total += len(batch)
+
+
+if __name__ == "__main__":
+    import fetch  # DB-Pfad und Schema
+
+    parser = argparse.ArgumentParser(description="Änderungs-Events aus station_events lesen")
+    parser.add_argument("--after", type=int, help="Events nach dieser seq (ohne Cursor)")
+    parser.add_argument("--consumer", help="benannter Cursor: lesen und danach vorrücken")
+    parser.add_argument("--ndjson", help="Events an diese Datei anhängen (Cursor 'ndjson')")
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    fetch.init_db()
+    conn = fetch.connect()
+    c = conn.cursor()
+    if args.ndjson:
+        n = relay_ndjson(conn, args.ndjson)
+        print(f"📤 {n} Events nach {args.ndjson} geschrieben")
+    else:
+        events = poll(c, args.consumer, args.limit) if args.consumer else read_events(c, args.after or 0, args.limit)
+        for event in events:
+            comments = f", {len(event['new_comment_ids'])} neue Kommentare" if event["new_comment_ids"] else ""
+            print(f"   #{event['seq']} {event['created']} Station {event['station_id']}: "
+                  f"{event['old_status']} → {event['new_status']}{comments}")
+        if args.consumer and events:
+            ack(c, args.consumer, events[-1]["seq"])
+            conn.commit()
+        print(f"📬 {len(events)} Events")
+    fetch.release(conn)
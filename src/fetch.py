@@ -1,17 +1,100 @@
 # src/fetch.py
 import requests
 import sqlite3
+import argparse
 import datetime
+import hashlib
 import json
 import os
+import random
+import signal
+import threading
 import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import timezone
 
+import analytics
+import changeset
+import events
+import fulltext
+import health
+import metrics
+import partitions
+import pipeline
+import records
+import retention
+import scheduler
+import tiling
+from http_client import HttpClient
+from ratelimit import TokenBucket
+
 API_KEY = os.environ.get("OCM_API_KEY")
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # src/
 DB_PATH = os.path.join(BASE_DIR, "..", "data", "ev.db")
-MAX_RESULTS = 500
+CHANGESET_DIR = os.path.join(BASE_DIR, "..", "data", "changesets")
+BASE_PATH = os.path.join(BASE_DIR, "..", "data", "base.db")  # neue Basis nach einem Laden ohne Änderungsprotokoll
+# 0 = Changesets erst nach dem Upload per "changeset.py ack" bestätigen (Workflow), sonst sofort
+CHANGESET_ACK = os.environ.get("OCM_CHANGESET_ACK", "1") == "1"
+MAX_RESULTS = int(os.environ.get("OCM_MAX_RESULTS", "500"))  # Kachel-Limit je Request
 REQUEST_TIMEOUT = 15  # Sekunden
+OCM_BASE_URL = os.environ.get("OCM_BASE_URL", "https://api.openchargemap.io/v3/poi/")
+OCM_MAX_RPS = float(os.environ.get("OCM_MAX_RPS", "2"))  # Requests/Sekunde gegen OCM
+SCAN_WORKERS = 4
+
+# Streaming: POI-Antworten elementweise parsen und in Batches weiterreichen statt r.json()
+STREAM_JSON = os.environ.get("OCM_STREAM_JSON", "1") == "1"
+STREAM_BATCH = 500  # POIs je Pipeline-Batch beim Streaming (höchstens so viele im Speicher je Kachel)
+
+# Delta-Sync: nur seit dem letzten Lauf geänderte POIs, regelmäßig ein Full-Resync
+DELTA_SYNC = os.environ.get("OCM_DELTA_SYNC", "1") == "1"
+FULL_SYNC_INTERVAL = datetime.timedelta(hours=24)
+DELTA_OVERLAP = datetime.timedelta(minutes=10)  # Puffer gegen Uhrenabweichung OCM ↔ Runner
+SYNC_QUERY_KEY = "poi:bbox:mincomments=1"
+# Adaptiver Modus (scheduler.py): je Lauf höchstens so viele volle Kachel-Abfragen, 0 = aus
+POLL_BUDGET = int(os.environ.get("OCM_POLL_BUDGET", "0"))
+
+# Abgedeckte Fläche (south, west, north, east), z. B. OCM_BBOX="51.28,-0.51,51.69,0.33" für London
+COVERAGE_BBOX = (
+    tuple(float(v) for v in os.environ["OCM_BBOX"].split(","))
+    if os.environ.get("OCM_BBOX") else tiling.GB_BBOX
+)
+
+# Daemon-Modus: eine dauerhafte, getunte Verbindung (None = pro Aufruf neu verbinden)
+SHARED_CONN = None
+DAEMON_CACHE_KB = 64 * 1024
+STATE_CACHE = {}  # nur im Daemon-Modus befüllt, siehe cached_state()
+
+# Messwerte je Lauf (Prometheus-Textfile + run_metrics), optional Profiling einzelner Läufe
+METRICS = metrics.Metrics()
+METRICS_DIR = os.environ.get("METRICS_DIR", os.path.join(BASE_DIR, "..", "data", "metrics"))
+PROFILE_DIR = os.path.join(BASE_DIR, "..", "data", "profiles")
+
+# Gemeinsamer HTTP-Client (Keep-Alive-Pool, Retries, ETag/If-Modified-Since)
+OCM_CLIENT = HttpClient(timeout=REQUEST_TIMEOUT, pool_size=SCAN_WORKERS)
+VERBOSE = os.environ.get("FETCH_VERBOSE") == "1"
+CANONICAL_ENCODER = json.JSONEncoder(sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+SQL_CHUNK = 500  # max. Parameter pro IN (...)-Abfrage
+BLOB_COMPRESSION_LEVEL = 6
+
+# Erstbefüllung (leere DB) und Backfill: während des Ladens entfernt, danach von init_db neu angelegt
+BULK_DEFERRED_INDEXES = (
+    "idx_status_history_station",
+    "idx_comments_history_date",
+    "idx_comments_history_station_checkin",
+)
+BULK_DEFERRED_TRIGGERS = ("stations_rtree_insert", "stations_rtree_update") + tuple(
+    f"{fts}_{event}" for fts in fulltext.SOURCES for event in ("insert", "delete", "update")
+)
+
+# Retention: Rohdaten älter als RAW_DAYS nur noch als Rollup, Stunden-Rollups RETENTION_HOURLY_DAYS lang
+RETENTION_RAW_DAYS = int(os.environ.get("RETENTION_RAW_DAYS", "30"))
+RETENTION_HOURLY_DAYS = int(os.environ.get("RETENTION_HOURLY_DAYS", "90"))
+# Abgeschlossene Monate nach der Retention in schreibgeschützte Monatsdateien auslagern (partitions.py)
+SEAL_PARTITIONS = os.environ.get("OCM_SEAL_PARTITIONS") == "1"
+PARTITION_DIR = os.path.join(BASE_DIR, "..", "data", "partitions")
+# "0": versiegelte Monate erst nach "partitions.py ack" aus ev.db löschen (Workflow: nach dem Upload der Datei)
+PARTITION_ACK = os.environ.get("OCM_PARTITION_ACK", "1") == "1"
 
 UK_REGIONS = [
     ("London", 51.5074, -0.1278),
@@ -26,10 +109,40 @@ UK_REGIONS = [
     ("Reading", 51.4543, -0.9781),
 ]
 
+def connect():
+    """SQLite-Verbindung: im Daemon-Modus die dauerhafte, sonst eine neue (Statements werden gezählt)."""
+    if SHARED_CONN is not None:
+        return SHARED_CONN
+    return metrics.connect(DB_PATH, METRICS)
+
+
+def release(conn):
+    """Gegenstück zu connect(): schließt nur kurzlebige Verbindungen."""
+    if conn is not SHARED_CONN:
+        conn.close()
+
+
+def tune_connection(conn):
+    """Pragmas für eine langlebige Verbindung: WAL (Leser parallel zum Schreiber), weniger fsyncs, großer Cache."""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{DAEMON_CACHE_KB}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+def ensure_column(c, table, column, decl):
+    """Fügt eine Spalte hinzu, falls sie in einer bestehenden Tabelle noch fehlt."""
+    c.execute(f"PRAGMA table_info({table})")
+    if column not in {row[1] for row in c.fetchall()}:
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
 def init_db():
     """Erstellt die SQLite-Datenbank und Tabellen falls nicht vorhanden."""
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect()
     c = conn.cursor()
 
     # --- Tabelle stations ---
@@ -41,7 +154,10 @@ def init_db():
             lat REAL,
             lon REAL,
             max_power_kw REAL,
-            num_points INTEGER
+            num_points INTEGER,
+            content_hash TEXT,
+            source TEXT DEFAULT 'ocm',
+            removed_at TEXT
         )
     """)
 
@@ -56,7 +172,8 @@ def init_db():
             comment_text TEXT,
             is_operational BOOLEAN,
             timestamp TEXT,
-            raw_json TEXT
+            raw_json TEXT,
+            raw_hash TEXT
         )
     """)
 
@@ -71,10 +188,29 @@ def init_db():
             comment_text TEXT,
             comment_date TEXT,
             raw_json TEXT,
+            content_hash TEXT,
             UNIQUE(station_id, comment_ocm_id)
         )
     """)
 
+    # --- Blob Store: komprimierte Roh-Payloads, adressiert über ihren Hash ---
+    # status_history.raw_hash und comments_history.content_hash zeigen hierauf,
+    # raw_json bleibt nur noch für nicht migrierte Altzeilen gefüllt.
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS json_blobs (
+            hash TEXT PRIMARY KEY,
+            data BLOB
+        ) WITHOUT ROWID
+    """)
+
+    # Migration älterer DBs: Fingerprint-Spalten nachrüsten
+    ensure_column(c, "stations", "content_hash", "TEXT")
+    ensure_column(c, "comments_history", "content_hash", "TEXT")
+    ensure_column(c, "status_history", "raw_hash", "TEXT")
+    # Herkunft der Station: 'ocm' oder 'plugshare' (PlugShare-Standorte mit negativer station_id, siehe plugshare.py)
+    ensure_column(c, "stations", "source", "TEXT DEFAULT 'ocm'")
+    ensure_column(c, "stations", "removed_at", "TEXT")  # gesetzt von mark_removed
+
     # --- TEMP: Region Activity (Testphase) ---
     c.execute("""
         CREATE TABLE IF NOT EXISTS region_activity (
@@ -90,50 +226,345 @@ def init_db():
         )
     """)
 
+    # --- Letzter Status je Station (Change Detection ohne History-Scan) ---
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS station_latest_status (
+            station_id INTEGER PRIMARY KEY,
+            status TEXT,
+            comment_type_title TEXT,
+            checkin_status_title TEXT,
+            comment_text TEXT,
+            is_operational BOOLEAN,
+            timestamp TEXT
+        )
+    """)
+
+    # --- HTTP-Validatoren (ETag/Last-Modified) für Conditional Requests ---
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS http_validators (
+            url_key TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT
+        )
+    """)
+
+    # --- Delta-Sync: Wasserstand je Abfrage ---
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS sync_state (
+            query_key TEXT PRIMARY KEY,
+            watermark TEXT,
+            last_full_sync TEXT
+        )
+    """)
+
+    # --- Gelerntes Kachel-Layout (Quadtree-Blätter) ---
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS tile_layout (
+            quadkey TEXT PRIMARY KEY,
+            result_count INTEGER,
+            updated TEXT
+        )
+    """)
+
+    # --- Messwerte je Lauf (Phasen, Zähler, SQL-Statements) ---
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS run_metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_started TEXT,
+            job TEXT,
+            kind TEXT,
+            name TEXT,
+            value REAL
+        )
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_run_metrics_name
+        ON run_metrics (job, kind, name, run_started)
+    """)
+
+    # --- Räumlicher Index (R*Tree) über stations.lat/lon, per Trigger synchron ---
+    c.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS stations_rtree USING rtree(
+            station_id,
+            min_lat, max_lat,
+            min_lon, max_lon
+        )
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS stations_rtree_insert
+        AFTER INSERT ON stations
+        WHEN NEW.lat IS NOT NULL AND NEW.lon IS NOT NULL
+        BEGIN
+            INSERT OR REPLACE INTO stations_rtree VALUES (NEW.station_id, NEW.lat, NEW.lat, NEW.lon, NEW.lon);
+        END
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS stations_rtree_update
+        AFTER UPDATE OF lat, lon ON stations
+        BEGIN
+            DELETE FROM stations_rtree WHERE station_id = OLD.station_id;
+            INSERT INTO stations_rtree
+            SELECT NEW.station_id, NEW.lat, NEW.lat, NEW.lon, NEW.lon
+            WHERE NEW.lat IS NOT NULL AND NEW.lon IS NOT NULL;
+        END
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS stations_rtree_delete
+        AFTER DELETE ON stations
+        BEGIN
+            DELETE FROM stations_rtree WHERE station_id = OLD.station_id;
+        END
+    """)
+
+    # Bestehende DBs: R*Tree einmalig aus stations befüllen
+    c.execute("SELECT 1 FROM stations_rtree LIMIT 1")
+    if c.fetchone() is None:
+        c.execute("""
+            INSERT INTO stations_rtree
+            SELECT station_id, lat, lat, lon, lon FROM stations
+            WHERE lat IS NOT NULL AND lon IS NOT NULL
+        """)
+
+    # --- Indizes ---
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_status_history_station
+        ON status_history (station_id, id)
+    """)
+    # Covering-Indizes für analytics.py (Zeitfenster bzw. Aggregation je Station)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_comments_history_date
+        ON comments_history (comment_date, station_id, checkin_status)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_comments_history_station_checkin
+        ON comments_history (station_id, checkin_status)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_region_activity_region_ts
+        ON region_activity (region_name, run_timestamp)
+    """)
+
+    # Bestehende DBs: station_latest_status einmalig aus der Historie befüllen
+    c.execute("SELECT 1 FROM station_latest_status LIMIT 1")
+    if c.fetchone() is None:
+        c.execute("""
+            INSERT INTO station_latest_status (
+                station_id,
+                status,
+                comment_type_title,
+                checkin_status_title,
+                comment_text,
+                is_operational,
+                timestamp
+            )
+            SELECT h.station_id, h.status, h.comment_type_title, h.checkin_status_title,
+                   h.comment_text, h.is_operational, h.timestamp
+            FROM status_history h
+            JOIN (
+                SELECT station_id, MAX(id) AS max_id
+                FROM status_history
+                GROUP BY station_id
+            ) m ON h.id = m.max_id
+        """)
+
+    # --- Outbox für Änderungs-Events (station_events, siehe events.py) ---
+    events.install(c)
+
+    # --- Abfrage-Plan je Kachel für den adaptiven Modus (siehe scheduler.py) ---
+    scheduler.install(c)
+
+    # --- Health-Score je Station (inkrementell in write_stations, siehe health.py) ---
+    health.install(c)
+    c.execute("SELECT 1 FROM station_health LIMIT 1")
+    if c.fetchone() is None:
+        health.rebuild(c)  # bestehende DBs: einmalig aus der Historie befüllen
+
+    # --- Volltextsuche über comment_text (FTS5, per Trigger synchron, siehe fulltext.py) ---
+    fulltext.install(c)
+
+    # --- Rollups für die Retention (station_activity_*, region_activity_daily, retention_state) ---
+    retention.install(c)
+
+    # --- Katalog der versiegelten Monats-Partitionen (siehe partitions.py) ---
+    partitions.install(c)
+
+    # --- Änderungsprotokoll für inkrementelle Changesets ---
+    changeset.install_changelog(c)
+
     conn.commit()
-    conn.close()
+    release(conn)
 
-def scan_uk_regions(radius_km=15, max_results=300):
-    print("🇬🇧 Starte UK Region Scan (OCM)...\n")
 
-    conn = sqlite3.connect(DB_PATH)
+def begin_bulk_load(conn):
+    """Bulk-Laden vorbereiten: Sekundärindizes, R*Tree-, FTS- und Protokoll-Trigger entfernen.
+
+    Die DB wird sofort für eine neue Basis markiert (changeset.require_base), damit auch ein
+    abgebrochenes Laden nicht als Changeset-Kette weiterläuft. Gegenstück: finish_bulk_load.
+    """
+    c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        for name in BULK_DEFERRED_INDEXES:
+            c.execute(f"DROP INDEX IF EXISTS {name}")
+        for name in BULK_DEFERRED_TRIGGERS:
+            c.execute(f"DROP TRIGGER IF EXISTS {name}")
+        changeset.suspend_changelog(c)
+        changeset.require_base(c)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def finish_bulk_load(conn):
+    """Indizes/Trigger via init_db zurück, Volltext, R*Tree und Health-Score einmal komplett aufbauen.
+
+    Auch nach einem Abbruch aufrufen, sonst läuft der Live-Betrieb ohne Indizes und Trigger weiter.
+    """
+    init_db()
     c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        if fulltext.available(c):
+            fulltext.backfill(c)
+        c.execute("DELETE FROM stations_rtree")
+        c.execute("""
+            INSERT INTO stations_rtree
+            SELECT station_id, lat, lat, lon, lon FROM stations
+            WHERE lat IS NOT NULL AND lon IS NOT NULL
+        """)
+        health.rebuild(c)
+        changeset.require_base(c)  # Protokoll aus rebuild verwerfen, steckt in der neuen Basis
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def mark_removed(c, seen, removed_at, unchanged=(), tiles=None):
+    """Nach einem vollständigen Full-Sync bzw. vollen Kachel-Abfragen: OCM-Stationen, die nicht geliefert wurden.
+
+    Sie werden mit stations.removed_at markiert statt gelöscht (Historie und
+    Analysen bleiben erhalten) und bekommen ein Outbox-Event; taucht eine
+    Station wieder auf, wird die Markierung aufgehoben. Nur in der offenen
+    Transaktion des Aufrufers und nur nach einem Full-Sync ohne Abbruch
+    aufrufen, sonst gelten nicht abgefragte Stationen als entfernt.
+    unchanged: Bounding Boxes der Kacheln mit HTTP 304 — ihre Antwort ist die
+    des letzten erfolgreichen Laufs, ihre nicht entfernten Stationen gelten
+    also als geliefert. tiles: nur diese voll abgefragten Bounding Boxes prüfen
+    (adaptiver Modus) statt des ganzen Abdeckungsgebiets.
+    Rückgabe: (entfernt, wieder aufgetaucht).
+    """
+    c.execute("CREATE TEMP TABLE IF NOT EXISTS sync_seen (station_id INTEGER PRIMARY KEY)")
+    c.execute("DELETE FROM temp.sync_seen")
+    c.executemany("INSERT OR IGNORE INTO temp.sync_seen VALUES (?)", ((sid,) for sid in seen))
+    for south, west, north, east in unchanged:
+        c.execute("""
+            INSERT OR IGNORE INTO temp.sync_seen
+            SELECT station_id FROM stations
+            WHERE source = 'ocm' AND removed_at IS NULL
+              AND lat BETWEEN ? AND ? AND lon BETWEEN ? AND ?
+        """, (south, north, west, east))
+
+    removed = {}  # Stationen auf gemeinsamen Kachelrändern nur einmal
+    for south, west, north, east in tiles or [COVERAGE_BBOX]:
+        c.execute("""
+            SELECT s.station_id, l.status FROM stations s
+            LEFT JOIN station_latest_status l ON l.station_id = s.station_id
+            WHERE s.source = 'ocm' AND s.removed_at IS NULL
+              AND s.lat BETWEEN ? AND ? AND s.lon BETWEEN ? AND ?
+              AND s.station_id NOT IN (SELECT station_id FROM temp.sync_seen)
+        """, (south, north, west, east))
+        removed.update(c.fetchall())
+    removed = list(removed.items())
+    c.executemany("UPDATE stations SET removed_at = ? WHERE station_id = ?",
+                  [(removed_at.isoformat(), sid) for sid, _ in removed])
+    events.append_removed(c, removed, removed_at.isoformat())
 
-    for name, lat, lon in UK_REGIONS:
-        print(f"🔍 Region: {name}")
-
-        url = (
-            "https://api.openchargemap.io/v3/poi/"
-            "?output=json"
-            "&countrycode=GB"
-            f"&latitude={lat}"
-            f"&longitude={lon}"
-            f"&distance={radius_km}"
-            "&distanceunit=KM"
-            f"&maxresults={max_results}"
-            f"&key={API_KEY}"
-        )
+    c.execute("""
+        UPDATE stations SET removed_at = NULL
+        WHERE removed_at IS NOT NULL AND station_id IN (SELECT station_id FROM temp.sync_seen)
+    """)
+    revived = c.rowcount
+    c.execute("DELETE FROM temp.sync_seen")
+    return len(removed), revived
 
-        try:
-            r = requests.get(url, timeout=REQUEST_TIMEOUT)
-            r.raise_for_status()
-            data = r.json()
-        except Exception as e:
-            print(f"❌ Fehler bei {name}: {e}")
-            continue
 
-        stations_count = len(data)
-        stations_with_comments = 0
-        total_comments = 0
+def fetch_region(lat, lon, radius_km, max_results, limiter):
+    """Zählt die POIs im Umkreis von radius_km um lat/lon.
+
+    Rückgabe: (stations, stations_with_comments, total_comments). Mit STREAM_JSON
+    wird die Antwort beim Lesen gezählt und nie als Ganzes dekodiert.
+    """
+    url = (
+        f"{OCM_BASE_URL}"
+        "?output=json"
+        "&countrycode=GB"
+        f"&latitude={lat}"
+        f"&longitude={lon}"
+        f"&distance={radius_km}"
+        "&distanceunit=KM"
+        f"&maxresults={max_results}"
+        f"&key={API_KEY}"
+    )
 
-        for d in data:
-            comments = d.get("UserComments") or []
-            if comments:
-                stations_with_comments += 1
-                total_comments += len(comments)
+    limiter.acquire()  # API-freundlich: globales Requests/Sekunde-Budget
+    if STREAM_JSON:
+        return analytics.payload_counts(OCM_CLIENT.stream_json(url).data)
+    return analytics.payload_counts(OCM_CLIENT.get_json(url).data)
 
-        ts = datetime.datetime.now(timezone.utc).isoformat()
 
+def region_row(name, lat, lon, counts):
+    """region_activity-Zeile aus den Kennzahlen von fetch_region."""
+    stations_count, stations_with_comments, total_comments = counts
+
+    ts = datetime.datetime.now(timezone.utc).isoformat()
+    return (name, "GB", lat, lon, stations_count, stations_with_comments, total_comments, ts)
+
+
+def scan_region(name, lat, lon, radius_km, max_results, limiter):
+    """Holt eine Region und zählt Stationen/Kommentare. Rückgabe: region_activity-Zeile."""
+    return region_row(name, lat, lon, fetch_region(lat, lon, radius_km, max_results, limiter))
+
+
+class RegionSource(pipeline.Source):
+    """UK_REGIONS als Pipeline-Quelle: je Region eine Rohseite und eine region_activity-Zeile."""
+
+    name = "regions"
+
+    def __init__(self, radius_km=15, max_results=300, workers=SCAN_WORKERS, limiter=None):
+        self.radius_km = radius_km
+        self.max_results = max_results
+        self.workers = workers
+        self.limiter = limiter or TokenBucket(OCM_MAX_RPS, capacity=max(1, int(OCM_MAX_RPS)))
+
+    def produce(self, emit):
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {
+                pool.submit(fetch_region, lat, lon, self.radius_km, self.max_results, self.limiter): (name, lat, lon)
+                for name, lat, lon in UK_REGIONS
+            }
+            for future in as_completed(futures):
+                name, lat, lon = futures[future]
+                try:
+                    counts = future.result()
+                except Exception as e:
+                    print(f"❌ Fehler bei {name}: {e}")
+                    METRICS.count(errors=1)
+                    continue
+                emit((name, lat, lon, counts))
+
+    def normalize(self, page):
+        row = region_row(*page)
+        print(f"🔍 Region: {row[0]}")
+        print(
+            f"   ➤ Stationen: {row[4]} | "
+            f"mit Kommentaren: {row[5]} | "
+            f"Kommentare gesamt: {row[6]}"
+        )
+        return row
+
+    def write(self, c, row):
         c.execute("""
             INSERT INTO region_activity (
                 region_name,
@@ -146,115 +577,201 @@ def scan_uk_regions(radius_km=15, max_results=300):
                 run_timestamp
             )
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            name,
-            "GB",
-            lat,
-            lon,
-            stations_count,
-            stations_with_comments,
-            total_comments,
-            ts
-        ))
-
-        print(
-            f"   ➤ Stationen: {stations_count} | "
-            f"mit Kommentaren: {stations_with_comments} | "
-            f"Kommentare gesamt: {total_comments}"
-        )
-
-        time.sleep(2)  # API-freundlich
+        """, row)
+        METRICS.count(regions_scanned=1, stations_seen=row[4])
+        return {"regions": 1, "stations": row[4]}
 
-    conn.commit()
-    conn.close()
 
-    print("\n✅ UK Region Scan abgeschlossen.\n")
+def scan_uk_regions(radius_km=15, max_results=300, workers=SCAN_WORKERS, max_rps=OCM_MAX_RPS):
+    """Scannt alle UK_REGIONS parallel (max. `workers` gleichzeitig, max. `max_rps` Requests/Sekunde)."""
+    print("🇬🇧 Starte UK Region Scan (OCM)...\n")
 
+    METRICS.reset()
+    http_before = dict(OCM_CLIENT.stats)
+    limiter = TokenBucket(max_rps, capacity=max(1, int(max_rps)))
 
-def fetch_from_api(max_results=300):
-    """Ruft kommentierte Ladepunkte im Berliner Raum ab und zeigt Analyse über Kommentaraktivität."""
+    conn = connect()
+    try:
+        pipeline.run_pipeline(conn, [RegionSource(radius_km, max_results, workers, limiter)], METRICS)
+    finally:
+        release(conn)
+        count_http(http_before, "regions.json_decode")
+        record_metrics("regions")
 
-    # Berlin Zentrum
-    #latitude = 52.5200
-    #longitude = 13.4050
-    #radius_km = 20
+    print("\n✅ UK Region Scan abgeschlossen.\n")
 
-    #London
-    Latitude = 51.5074
-    Longitude = -0.1278
-    radius_km = 15
 
+def tile_url(bbox, max_results, modified_since):
+    south, west, north, east = bbox
     url = (
-        "https://api.openchargemap.io/v3/poi/"
+        f"{OCM_BASE_URL}"
         "?output=json"
         "&countrycode=GB"
-        f"&latitude={Latitude}"
-        f"&longitude={Longitude}"
-        f"&distance={radius_km}"
-        "&distanceunit=KM"
+        f"&boundingbox=({south},{west}),({north},{east})"
         "&mincomments=1"
         f"&maxresults={max_results}"
         f"&key={API_KEY}"
     )
+    if modified_since is not None:
+        url += f"&modifiedsince={modified_since.strftime('%Y-%m-%dT%H:%M:%S')}"
+    return url
+
+
+def fetch_tile(bbox, max_results, modified_since, limiter):
+    """Eine Kachel (south, west, north, east) abfragen. None = unverändert (HTTP 304)."""
+    limiter.acquire()
+    result = OCM_CLIENT.get_json(tile_url(bbox, max_results, modified_since), conditional=True)
+    return None if result.not_modified else result.data
+
+
+def stream_tile(bbox, max_results, modified_since, limiter, emit, batch_size=STREAM_BATCH):
+    """Wie fetch_tile, reicht die POIs aber schon beim Lesen in Batches an emit weiter.
+
+    Rückgabe: Anzahl POIs der Kachel (für die Teilungsentscheidung) oder None bei 304.
+    Im Speicher liegt höchstens ein Batch, unabhängig von max_results.
+    """
+    limiter.acquire()
+    result = OCM_CLIENT.stream_json(tile_url(bbox, max_results, modified_since), conditional=True)
+    if result.not_modified:
+        return None
+
+    n = 0
+    batch = []
+    for poi in result.data:
+        batch.append(poi)
+        if len(batch) >= batch_size:
+            emit(batch)
+            n += len(batch)
+            batch = []
+    if batch:
+        emit(batch)
+        n += len(batch)
+    return n
+
+
+def count_http(before, decode_phase="fetch.json_decode"):
+    """Überträgt die HTTP-Statistik seit `before` in METRICS. Rückgabe: die Differenz."""
+    delta = {k: v - before.get(k, 0) for k, v in OCM_CLIENT.stats.items()}
+    METRICS.count(
+        http_requests=delta["requests"],
+        http_retries=delta["retries"],
+        http_not_modified=delta["not_modified"],
+        http_errors=delta["errors"],
+        bytes_downloaded=delta["bytes"],
+    )
+    # Summe über alle Worker-Threads, nicht Wanduhrzeit
+    METRICS.add_phase(decode_phase, delta["decode_seconds"])
+    return delta
+
 
-    print(f"\n🌐 API URL:\n{url}\n")
+def load_http_validators(client):
+    """Setzt die ETag/Last-Modified-Werte des HTTP-Clients auf den gespeicherten Stand zurück.
 
+    Was ein abgebrochener Lauf gemerkt, aber nie gespeichert hat, verfällt dabei:
+    ein 304 darauf würde die nicht geschriebenen Stationen im nächsten Lauf überspringen.
+    """
+    conn = connect()
     try:
-        r = requests.get(url, timeout=REQUEST_TIMEOUT)
-        r.raise_for_status()
-        data = r.json()
-
-        n = len(data)
-        print(f"✅ API Response OK — {n} Stationen mit mindestens einem Kommentar erhalten.\n")
-
-        # ------------------------
-        # COMMENT ANALYTICS
-        # ------------------------
-
-        comment_counts = []
-        station_summaries = []
-
-        for d in data:
-            sid = d.get("ID")
-            comments = d.get("UserComments") or []
-            cnt = len(comments)
-            comment_counts.append(cnt)
-            station_summaries.append((sid, cnt))
-
-        total_comments = sum(comment_counts)
-        max_comments = max(comment_counts) if comment_counts else 0
-        avg_comments = total_comments / n if n > 0 else 0
-
-        # Sortieren nach Anzahl Kommentare
-        station_summaries.sort(key=lambda x: x[1], reverse=True)
-
-        print("📊 Kommentar-Analyse:")
-        print(f"   ➤ Anzahl Stationen: {n}")
-        print(f"   ➤ Gesamtanzahl Kommentare: {total_comments}")
-        print(f"   ➤ Ø Kommentare pro Station: {avg_comments:.2f}")
-        print(f"   ➤ Max Kommentare an einer Station: {max_comments}")
-        print()
-
-        # Top 10 Stationen
-        print("🏆 Top kommentierte Stationen (Top 10):")
-        for sid, cnt in station_summaries[:10]:
-            print(f"   - Station {sid}: {cnt} Kommentare")
-
-        # Optionales Histogramm
-        print("\n📈 Histogramm der Kommentarhäufigkeit:")
-        hist = {}
-        for cnt in comment_counts:
-            hist[cnt] = hist.get(cnt, 0) + 1
-        for cnt in sorted(hist):
-            print(f"   {cnt} Kommentare: {hist[cnt]} Stationen")
-
-        print("\n")
-
-        return data
-
-    except requests.RequestException as e:
-        print("❌ API request failed:", e)
+        c = conn.cursor()
+        c.execute("SELECT url_key, etag, last_modified FROM http_validators")
+        stored = {key: (etag, lm) for key, etag, lm in c.fetchall()}
+    finally:
+        release(conn)
+    with client.lock:
+        client.validators.clear()
+        client.validators.update(stored)
+
+
+def save_http_validators(client):
+    """Speichert die Validatoren des HTTP-Clients (erst nach erfolgreichem save_to_db aufrufen)."""
+    conn = connect()
+    conn.executemany("""
+        INSERT INTO http_validators (url_key, etag, last_modified)
+        VALUES (?, ?, ?)
+        ON CONFLICT(url_key) DO UPDATE SET
+            etag=excluded.etag,
+            last_modified=excluded.last_modified
+    """, [(key, etag, lm) for key, (etag, lm) in client.validators.items()])
+    conn.commit()
+    release(conn)
+
+
+def reset_http_validators(client):
+    """Nach einem fehlgeschlagenen Lauf: Validatoren aus der DB, notfalls ganz ohne (nie ein falscher 304)."""
+    try:
+        load_http_validators(client)
+    except sqlite3.Error as e:
+        print("⚠️ HTTP-Validatoren nicht ladbar, nächster Lauf ohne Conditional Requests:", e)
+        with client.lock:
+            client.validators.clear()
+
+
+def load_sync_state(query_key):
+    """(watermark, last_full_sync) einer Abfrage als datetime, oder (None, None)."""
+    conn = connect()
+    c = conn.cursor()
+    c.execute("SELECT watermark, last_full_sync FROM sync_state WHERE query_key = ?", (query_key,))
+    row = c.fetchone()
+    release(conn)
+    if row is None:
+        return None, None
+    return tuple(datetime.datetime.fromisoformat(v) if v else None for v in row)
+
+
+def save_sync_state(query_key, watermark, full_sync):
+    """Setzt den Wasserstand; bei full_sync auch den Zeitpunkt des letzten Full-Resyncs."""
+    conn = connect()
+    conn.execute("""
+        INSERT INTO sync_state (query_key, watermark, last_full_sync)
+        VALUES (?, ?, ?)
+        ON CONFLICT(query_key) DO UPDATE SET
+            watermark=excluded.watermark,
+            last_full_sync=COALESCE(excluded.last_full_sync, sync_state.last_full_sync)
+    """, (query_key, watermark.isoformat(), watermark.isoformat() if full_sync else None))
+    conn.commit()
+    release(conn)
+
+
+def plan_sync(query_key, now):
+    """Entscheidet Delta- vs. Full-Sync. Rückgabe: modified_since (None = Full-Sync)."""
+    if not DELTA_SYNC:
         return None
+    watermark, last_full_sync = load_sync_state(query_key)
+    if watermark is None or last_full_sync is None or now - last_full_sync >= FULL_SYNC_INTERVAL:
+        return None
+    return watermark - DELTA_OVERLAP
+
+
+def plan_adaptive(now, budget=None):
+    """Adaptiver Modus: (modified_since, Kachel-Plan) oder None, wenn ein normaler Lauf nötig ist.
+
+    Der Delta-Sync läuft weiter (ein Request für alle geänderten POIs), statt des
+    täglichen Full-Syncs fragt jeder Lauf höchstens budget fällige Kacheln voll ab;
+    entfernte Stationen erkennt mark_removed dann je voll abgefragter Kachel.
+    Ohne Wasserstand bzw. ohne gelerntes Layout kommt zuerst ein Full-Sync.
+    """
+    budget = POLL_BUDGET if budget is None else budget
+    if budget <= 0:
+        return None
+    watermark, _ = load_sync_state(SYNC_QUERY_KEY)
+    if DELTA_SYNC and watermark is None:
+        return None
+    conn = connect()
+    c = conn.cursor()
+    try:
+        layout = tiling.load_layout(c)
+        if not layout:
+            return None
+        c.execute("BEGIN IMMEDIATE")
+        refresh, stats = scheduler.plan(c, COVERAGE_BBOX, layout, budget, now)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release(conn)
+    METRICS.count(poll_tiles_due=stats["due"], poll_tiles_skipped=stats["skipped"])
+    return (watermark - DELTA_OVERLAP if DELTA_SYNC else None), refresh
 
 
 def safe_get(dct, *keys):
@@ -272,221 +789,833 @@ def safe_get(dct, *keys):
 
 def get_last_status(c, station_id):
     c.execute("""
-        SELECT status FROM status_history
+        SELECT status FROM station_latest_status
         WHERE station_id = ?
-        ORDER BY id DESC
-        LIMIT 1
     """, (station_id,))
     row = c.fetchone()
     return row[0] if row else None
 
 
-def save_to_db(data):
-    """Speichert API-Daten in SQLite."""
-    if not data:
-        print("⚠️ Keine Daten zu speichern.")
-        return
+def canonical_json(obj):
+    """Deterministische JSON-Serialisierung (sortierte Keys, ohne Whitespace)."""
+    return CANONICAL_ENCODER.encode(obj)
 
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+
+def content_hash(canonical):
+    """Fingerprint eines kanonischen JSON-Strings."""
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def station_fingerprint(record):
+    """Fingerprint aller Werte, die save_to_db aus einem POI übernimmt.
+
+    Gehasht wird die kanonische Projektion statt des kompletten Payloads:
+    Key-Reihenfolge und Felder, die nie gespeichert werden, lösen so keine
+    Scheinänderung aus, und unveränderte Stationen werden nie serialisiert.
+    """
+    return content_hash(canonical_json(record.fingerprint_source()))
+
+
+def store_blobs(c, blobs, compressed=False):
+    """Schreibt {hash: json_text} komprimiert in json_blobs; bereits vorhandene Hashes werden übersprungen.
+
+    compressed=True: die Werte sind schon zlib-komprimierte Bytes (z. B. aus backfill-Workern).
+    Rückgabe: Anzahl neu gespeicherter Blobs.
+    """
+    hashes = list(blobs)
+    existing = set()
+    for i in range(0, len(hashes), SQL_CHUNK):
+        chunk = hashes[i:i + SQL_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        c.execute(f"SELECT hash FROM json_blobs WHERE hash IN ({placeholders})", chunk)
+        existing.update(row[0] for row in c.fetchall())
+
+    rows = [
+        (h, blobs[h] if compressed else zlib.compress(blobs[h].encode("utf-8"), BLOB_COMPRESSION_LEVEL))
+        for h in hashes if h not in existing
+    ]
+    c.executemany("INSERT OR IGNORE INTO json_blobs (hash, data) VALUES (?, ?)", rows)
+    return len(rows)
+
+
+def read_blob(c, blob_hash):
+    """Liest einen Blob und gibt den JSON-Text zurück (None, falls unbekannt)."""
+    if blob_hash is None:
+        return None
+    c.execute("SELECT data FROM json_blobs WHERE hash = ?", (blob_hash,))
+    row = c.fetchone()
+    return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+
+def get_raw_json(c, table, row_id):
+    """Roh-JSON einer History-Zeile, egal ob noch inline (raw_json) oder im Blob Store."""
+    hash_column = {"status_history": "raw_hash", "comments_history": "content_hash"}[table]
+    c.execute(f"SELECT raw_json, {hash_column} FROM {table} WHERE id = ?", (row_id,))
+    row = c.fetchone()
+    if row is None:
+        return None
+    raw_json, blob_hash = row
+    return raw_json if raw_json is not None else read_blob(c, blob_hash)
+
+
+def cached_state(key, loader, c):
+    """Im Daemon-Modus bleiben Hashes/letzte Status zwischen Läufen im Speicher, sonst frisch laden."""
+    if SHARED_CONN is None:
+        return loader(c)
+    if key not in STATE_CACHE:
+        STATE_CACHE[key] = loader(c)
+    return STATE_CACHE[key]
+
+
+def load_station_hashes(c):
+    """{station_id: content_hash} aller bekannten Stationen."""
+    c.execute("SELECT station_id, content_hash FROM stations WHERE content_hash IS NOT NULL")
+    return dict(c.fetchall())
+
+
+def max_power_kw(d):
+    """Größte Ladeleistung (kW) über alle Connections einer Station."""
+    power_vals = []
+    for fconn in d.get("Connections") or []:
+        pw = fconn.get("PowerKW") if isinstance(fconn, dict) else None
+        if pw:
+            power_vals.append(pw)
+    return max(power_vals) if power_vals else None
+
+
+def comment_summary(comments):
+    """Erster CommentType / CheckinStatus / Freitext über alle Kommentare (alte Status-Logik)."""
+    comment_type_title = None
+    checkin_status_title = None
+    comment_text = None
+
+    for comment in comments:
+        # CommentType (z. B. "General Comment", "Problem Report")
+        ct = comment.get("CommentType", {})
+        if not comment_type_title and ct:
+            comment_type_title = ct.get("Title")
+
+        # CheckinStatusType (z. B. "Successfully Charged", "Charging Not Possible")
+        cs = comment.get("CheckinStatusType", {})
+        if not checkin_status_title and cs:
+            checkin_status_title = cs.get("Title")
+
+        # Freitext des Nutzers
+        if not comment_text:
+            comment_text = comment.get("Comment")
+
+        # Wenn alle Felder gefunden → abbrechen
+        if comment_type_title and checkin_status_title and comment_text:
+            break
+
+    return comment_type_title, checkin_status_title, comment_text
+
+
+def load_latest_status(c):
+    """Lädt den letzten Status aller Stationen mit einer Abfrage.
+
+    Rückgabe: {station_id: (status, comment_type_title, checkin_status_title, comment_text)}
+    """
+    c.execute("""
+        SELECT station_id, status, comment_type_title, checkin_status_title, comment_text
+        FROM station_latest_status
+    """)
+    return {row[0]: tuple(row[1:]) for row in c.fetchall()}
+
+
+def normalize_stations(data, known_hashes, last):
+    """Phase 1 von save_to_db: POIs → StationRecords inkl. Status-Diff, ohne SQL.
+
+    Stationen, deren Fingerprint in known_hashes steht, werden übersprungen;
+    known_hashes wird um die neuen Fingerprints ergänzt. Hat sich der Status
+    gegenüber last ({station_id: status-Tupel}) geändert, wird last
+    fortgeschrieben und der POI als Blob serialisiert (status.raw_hash).
+    Danach hält der Batch keine Referenz mehr auf die Roh-dicts.
+    Rückgabe: Batch-dict (stations, blobs, skipped).
+    """
+    stations = []
+    blobs = {}
+    skipped = 0
 
     for d in data:
         try:
-            station_id = d.get("ID")
-            if station_id is None:
+            record = records.station_record(d)
+            if record is None:
                 continue
 
-            # Statische Daten (einmalig oder upsert)
-            title = safe_get(d, "AddressInfo", "Title")
-            operator = safe_get(d, "OperatorInfo", "Title")
-            lat = safe_get(d, "AddressInfo", "Latitude")
-            lon = safe_get(d, "AddressInfo", "Longitude")
-
-            # Ladeleistungen extrahieren
-            connections = d.get("Connections") or []
-            max_power = None
-            if connections:
-                power_vals = []
-                for fconn in connections:
-                    pw = fconn.get("PowerKW") if isinstance(fconn, dict) else None
-                    if pw:
-                        power_vals.append(pw)
-                if power_vals:
-                    max_power = max(power_vals)
-
-            num_points = d.get("NumberOfPoints", None)
-
-            # Upsert für stations (SQLite >= 3.24 für ON CONFLICT DO UPDATE)
-            c.execute("""
-                INSERT INTO stations (station_id, title, operator, lat, lon, max_power_kw, num_points)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(station_id) DO UPDATE SET
-                    title=excluded.title,
-                    operator=excluded.operator,
-                    lat=excluded.lat,
-                    lon=excluded.lon,
-                    max_power_kw=excluded.max_power_kw,
-                    num_points=excluded.num_points
-            """, (station_id, title, operator, lat, lon, max_power, num_points))
-
-            # Dynamische Statusdaten
-            status = safe_get(d, "StatusType", "Title")
-            is_operational = safe_get(d, "StatusType", "IsOperational")
-
-            # === Kommentare separat verarbeiten (NEUE Event-Tabelle) ===
-
-            comments = d.get("UserComments") or []
-
-            for comment in comments:
+            # Unveränderte Stationen früh überspringen (vor Serialisierung und SQL)
+            station_hash = station_fingerprint(record)
+            if known_hashes.get(record.station_id) == station_hash:
+                skipped += 1
+                continue
+            known_hashes[record.station_id] = station_hash
+            record.content_hash = station_hash
+            stations.append(record)
+
+            # === Kommentare (Event-Tabelle comments_history) ===
+            for comment in record.load_comments():
+                if comment.comment_id is None:
+                    continue  # Kommentar kann nur mit ID gespeichert werden
                 try:
-                    comment_ocm_id = comment.get("ID")  # OCM interne Kommentar-ID
-                    if comment_ocm_id is None:
-                        continue  # Kommentar kann nur mit ID gespeichert werden
-
-                    comment_type = safe_get(comment, "CommentType", "Title")
-                    checkin_status = safe_get(comment, "CheckinStatusType", "Title")
-                    comment_text = comment.get("Comment")
-                    comment_date = comment.get("DateCreated") or comment.get("DateLastModified")
-
-                    # Prüfe, ob dieser Kommentar schon existiert
-                    c.execute("""
-                        SELECT 1 FROM comments_history
-                        WHERE station_id = ? AND comment_ocm_id = ?
-                    """, (station_id, comment_ocm_id))
-
-                    exists = c.fetchone()
-
-                    if not exists:
-                        # Neuer Kommentar → speichern
-                        c.execute("""
-                            INSERT INTO comments_history (
-                                station_id,
-                                comment_ocm_id,
-                                comment_type,
-                                checkin_status,
-                                comment_text,
-                                comment_date,
-                                raw_json
-                            )
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            station_id,
-                            comment_ocm_id,
-                            comment_type,
-                            checkin_status,
-                            comment_text,
-                            comment_date,
-                            json.dumps(comment)
-                        ))
-
-                        print(f"💬 Neuer Kommentar gespeichert: Station {station_id}, CommentID={comment_ocm_id}")
-
+                    comment_json = canonical_json(comment.raw)
+                    comment.content_hash = content_hash(comment_json)
+                    blobs[comment.content_hash] = comment_json
                 except Exception as e:
-                    print(f"⚠️ Fehler beim Verarbeiten eines Kommentars an Station {station_id}: {e}")
-
-            # Alter Code-Block: Noch behalten, bis MVP fertig ist
-            # === User Comments & Check-In Feedback aus OCM extrahieren ===
-            comment_type_title = None
-            checkin_status_title = None
-            comment_text = None
-
-            comments = d.get("UserComments") or []
-
-            for comment in comments:
-                # CommentType (z. B. "General Comment", "Problem Report")
-                ct = comment.get("CommentType", {})
-                if not comment_type_title and ct:
-                    comment_type_title = ct.get("Title")
-
-                # CheckinStatusType (z. B. "Successfully Charged", "Charging Not Possible")
-                cs = comment.get("CheckinStatusType", {})
-                if not checkin_status_title and cs:
-                    checkin_status_title = cs.get("Title")
-
-                # Freitext des Nutzers
-                if not comment_text:
-                    comment_text = comment.get("Comment")
-
-                # Wenn alle Felder gefunden → abbrechen
-                if comment_type_title and checkin_status_title and comment_text:
-                    break
-
-            # Debug-Ausgabe
-            if comment_type_title or checkin_status_title:
-                print(f"✅ Station {station_id} | Checkin='{checkin_status_title}' | Type='{comment_type_title}' | Text='{comment_text}'")
-
-            # Letzten Status laden
-            c.execute("""
-                SELECT status, comment_type_title, checkin_status_title, comment_text
-                FROM status_history
-                WHERE station_id = ?
-                ORDER BY id DESC
-                LIMIT 1
-            """, (station_id,))
-            last_row = c.fetchone()
-
-            last_status = last_row[0] if last_row else None
-            last_comment_type = last_row[1] if last_row else None
-            last_checkin_status = last_row[2] if last_row else None
-            last_comment_text = last_row[3] if last_row else None
-
-            # Prüfen, ob eine neue Zeile notwendig ist
-            changed = (
-                last_status != status or
-                last_comment_type != comment_type_title or
-                last_checkin_status != checkin_status_title or
-                last_comment_text != comment_text
-            )
-
-            if changed:
-                timestamp = datetime.datetime.now(timezone.utc).isoformat()
-                c.execute("""
-                    INSERT INTO status_history (
-                        station_id,
-                        status,
-                        is_operational,
-                        timestamp,
-                        raw_json,
-                        comment_type_title,
-                        checkin_status_title,
-                        comment_text
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    station_id,
-                    status,
-                    is_operational,
-                    timestamp,
-                    json.dumps(d),
-                    comment_type_title,
-                    checkin_status_title,
-                    comment_text
-                ))
+                    print(f"⚠️ Fehler beim Verarbeiten eines Kommentars an Station {record.station_id}: {e}")
+                    METRICS.count(errors=1)
+                comment.raw = None
+
+            # Prüfen, ob eine neue status_history-Zeile notwendig ist
+            status = record.status
+            current = status.key()
+            if last.get(record.station_id) != current:
+                status.previous = last.get(record.station_id)
+                last[record.station_id] = current  # Station kann mehrfach im Payload vorkommen
+                station_json = canonical_json(d)
+                status.raw_hash = content_hash(station_json)
+                blobs[status.raw_hash] = station_json
+            record.raw = None
+
+            if VERBOSE and (status.comment_type or status.checkin_status):
+                print(f"✅ Station {record.station_id} | Checkin='{status.checkin_status}' | Type='{status.comment_type}' | Text='{status.comment_text}'")
 
         except Exception as e:
             print(f"⚠️ Fehler beim Verarbeiten station {d.get('ID')}: {e}")
+            METRICS.count(errors=1)
 
-    conn.commit()
-    conn.close()
+    return {"stations": stations, "blobs": blobs, "skipped": skipped}
 
 
-def run():
+INSERT_COMMENT_SQL = """
+    INSERT OR IGNORE INTO comments_history (
+        station_id,
+        comment_ocm_id,
+        comment_type,
+        checkin_status,
+        comment_text,
+        comment_date,
+        content_hash
+    )
+    SELECT ?1, ?2, ?3, ?4, ?5, ?6, ?7
+    WHERE NOT EXISTS (SELECT 1 FROM sealed_comments WHERE station_id = ?1 AND comment_ocm_id = ?2)
+"""
+
+
+def write_stations(c, batch, rescore=True, emit_events=True):
+    """Phase 2 von save_to_db: Schreiben per executemany in der offenen Transaktion des Aufrufers.
+
+    rescore=False lässt den Health-Score aus (Bulk-Laden: einmal health.rebuild am Ende),
+    emit_events=False die Outbox-Events (Erstbefüllung ist keine Änderung, siehe events.py).
+    Rückgabe: dict mit Zählern wie save_to_db.
+    """
+    laps = METRICS.laps("save")
+    stations = batch["stations"]
+    blobs = batch["blobs"]
+    skipped = batch["skipped"]
+
+    now = datetime.datetime.now(timezone.utc)
+    timestamp = now.isoformat()
+    status_rows = []
+    latest_rows = {}
+    for record in stations:
+        status = record.status
+        if status.raw_hash is None:
+            continue
+        latest_rows[record.station_id] = (record.station_id, status.status, status.comment_type,
+                                          status.checkin_status, status.comment_text, status.is_operational,
+                                          timestamp)
+        status_rows.append((
+            record.station_id,
+            status.status,
+            status.is_operational,
+            timestamp,
+            status.raw_hash,
+            status.comment_type,
+            status.checkin_status,
+            status.comment_text,
+        ))
+    station_rows = [record.row() + (record.content_hash,) for record in stations]
+    comment_rows = [
+        comment.row(record.station_id)
+        for record in stations
+        for comment in record.comments
+        if comment.content_hash is not None
+    ]
+
+    # Upsert für stations (SQLite >= 3.24 für ON CONFLICT DO UPDATE)
+    c.executemany("""
+        INSERT INTO stations (station_id, title, operator, lat, lon, max_power_kw, num_points, content_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(station_id) DO UPDATE SET
+            title=excluded.title,
+            operator=excluded.operator,
+            lat=excluded.lat,
+            lon=excluded.lon,
+            max_power_kw=excluded.max_power_kw,
+            num_points=excluded.num_points,
+            content_hash=excluded.content_hash
+    """, station_rows)
+
+    # Alles mit höherer id ist in diesem Batch neu (für die Events)
+    c.execute("SELECT COALESCE(MAX(id), 0) FROM comments_history")
+    comments_before = c.fetchone()[0]
+
+    # Bereits bekannte Kommentare verwirft der UNIQUE-Constraint, versiegelte sealed_comments
+    c.executemany(INSERT_COMMENT_SQL, comment_rows)
+    new_comments = max(c.rowcount, 0)  # rowcount zählt im Gegensatz zu total_changes keine Trigger-Zeilen
+
+    c.executemany("""
+        INSERT INTO status_history (
+            station_id,
+            status,
+            is_operational,
+            timestamp,
+            raw_hash,
+            comment_type_title,
+            checkin_status_title,
+            comment_text
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, status_rows)
+
+    store_blobs(c, blobs, batch.get("compressed", False))
+
+    c.executemany("""
+        INSERT INTO station_latest_status (
+            station_id,
+            status,
+            comment_type_title,
+            checkin_status_title,
+            comment_text,
+            is_operational,
+            timestamp
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(station_id) DO UPDATE SET
+            status=excluded.status,
+            comment_type_title=excluded.comment_type_title,
+            checkin_status_title=excluded.checkin_status_title,
+            comment_text=excluded.comment_text,
+            is_operational=excluded.is_operational,
+            timestamp=excluded.timestamp
+    """, latest_rows.values())
+    laps.lap("write")
+
+    n_events = events.append(c, stations, comments_before, timestamp) if emit_events else 0
+    laps.lap("events")
+
+    # Nur geänderte Stationen (neue Kommentare/Check-ins oder Status) bekommen einen neuen Score
+    health_updates = health.update(c, [record.station_id for record in stations], now) if rescore else 0
+    laps.lap("health")
+
+    stats = {
+        "stations": len(station_rows) + skipped,
+        "skipped": skipped,
+        "processed": len(station_rows),
+        "new_comments": new_comments,
+        "status_changes": len(status_rows),
+    }
+    METRICS.count(
+        stations_saved=stats["stations"],
+        stations_skipped=skipped,
+        stations_changed=len(station_rows),
+        comments_inserted=new_comments,
+        status_changes=len(status_rows),
+        blobs=len(blobs),
+        health_updates=health_updates,
+        events=n_events,
+    )
+    return stats
+
+
+def print_saved(stats):
+    print(
+        f"💾 Gespeichert: {stats['processed']} Stationen verarbeitet, "
+        f"{stats['skipped']} unverändert übersprungen | "
+        f"{stats['new_comments']} neue Kommentare | "
+        f"{stats['status_changes']} Statusänderungen"
+    )
+
+
+def save_to_db(data):
+    """Speichert API-Daten in SQLite.
+
+    Zwei Phasen: zuerst werden alle Zeilen im Speicher normalisiert
+    (normalize_stations), danach in einer einzigen Transaktion per executemany
+    geschrieben (write_stations). Stationen, deren Fingerprint sich seit dem
+    letzten Lauf nicht geändert hat, werden vor Kommentar-Verarbeitung,
+    Serialisierung und SQL übersprungen. In eine leere DB wird wie beim Backfill
+    geladen (begin_bulk_load/finish_bulk_load): ohne Trigger und Sekundärindizes,
+    ohne Events, Health-Score und Indizes einmal am Ende, danach eine neue Basis
+    statt eines Changesets.
+
+    Rückgabe: dict mit Zählern (stations, skipped, processed, new_comments, status_changes).
+    """
+    if not data:
+        print("⚠️ Keine Daten zu speichern.")
+        return None
+
+    laps = METRICS.laps("save")
+    conn = connect()
+    c = conn.cursor()
+
+    known_hashes = cached_state("station_hashes", load_station_hashes, c)
+    last = cached_state("latest_status", load_latest_status, c)
+    bulk = not known_hashes
+    laps.lap("load_state")
+
+    batch = normalize_stations(data, known_hashes, last)
+    laps.lap("normalize")
+
+    try:
+        if bulk:
+            begin_bulk_load(conn)
+        c.execute("BEGIN IMMEDIATE")
+        stats = write_stations(c, batch, rescore=not bulk, emit_events=not bulk)  # misst write selbst
+        laps.restart()
+
+        conn.commit()
+        laps.lap("commit")
+    except Exception:
+        conn.rollback()
+        STATE_CACHE.clear()  # Hashes/Status wurden beim Normalisieren schon fortgeschrieben
+        METRICS.count(errors=1)
+        raise
+    finally:
+        try:
+            if bulk:
+                finish_bulk_load(conn)
+                laps.lap("bulk_indexes")
+        finally:
+            release(conn)
+
+    print_saved(stats)
+    return stats
+
+
+class OcmSource(pipeline.Source):
+    """Kachel-Scan über COVERAGE_BBOX als Pipeline-Quelle: jede Blatt-Kachel wird sofort ein Batch.
+
+    Dieselbe Normalisierung/Schreiblogik wie save_to_db (normalize_stations,
+    write_stations), nur kachelweise statt über den ganzen Payload.
+    Mit refresh (Plan aus scheduler.plan) fragt die Quelle zusätzlich zum
+    Delta — bzw. ohne Delta-Sync allein — genau diese Kacheln voll ab.
+    """
+
+    name = "ocm"
+
+    def __init__(self, max_results=MAX_RESULTS, modified_since=None, limiter=None, refresh=None):
+        self.max_results = max_results
+        self.modified_since = modified_since
+        self.refresh = refresh
+        self.full_sync = modified_since is None and refresh is None
+        # Full-Sync bzw. volle Kachel-Abfragen: nicht gelieferte Stationen gelten als entfernt
+        self.check_removed = self.full_sync or bool(refresh)
+        self.limiter = limiter or TokenBucket(OCM_MAX_RPS, capacity=max(1, int(OCM_MAX_RPS)))
+        self.start = None
+        self.leaves = {}
+        self.refreshed = {}
+        self.n_requests = 0
+        self.polled_at = datetime.datetime.now(timezone.utc)
+        self.bulk = False
+        self.seen = set()  # alle gelieferten IDs, für mark_removed
+        self.unchanged = set()  # Blatt-Kacheln mit 304 im Full-Sync bzw. in den vollen Kachel-Abfragen
+        self.removed = (0, 0)
+
+    def prepare(self, c):
+        self.known_hashes = cached_state("station_hashes", load_station_hashes, c)
+        self.last = cached_state("latest_status", load_latest_status, c)
+        # Erstbefüllung: wie save_to_db ohne Trigger laden, run() ruft danach finish_bulk_load
+        self.bulk = self.full_sync and not self.known_hashes
+        if self.bulk:
+            begin_bulk_load(c.connection)
+        # Delta-Antworten sind klein → ohne gelerntes Layout direkt bei der Wurzel beginnen
+        if self.full_sync:
+            self.start = tiling.plan_tiles(tiling.load_layout(c), self.max_results)
+        if self.refresh is None or self.modified_since is not None:
+            print(f"\n🗺️ Kachel-Scan {COVERAGE_BBOX}: {len(self.start) if self.start else 1} Start-Kacheln\n")
+        if self.refresh is not None:
+            print(f"\n🎯 Volle Abfrage von {len(self.refresh)} fälligen Kacheln\n")
+
+    def produce(self, emit):
+        if self.refresh is None or self.modified_since is not None:
+            self.leaves, n = self.scan(emit, self.start, self.modified_since)
+            self.n_requests += n
+        if self.refresh:
+            self.refreshed, n = self.scan(emit, self.refresh, None)
+            self.n_requests += n
+
+    def scan(self, emit, start, modified_since):
+        if STREAM_JSON:
+            # Batches gehen schon beim Lesen raus; Kacheln am Limit werden trotzdem geteilt,
+            # ihre Stationen kommen dann aus den Kindern erneut und werden per Fingerprint übersprungen
+            tile_fn = lambda bbox: stream_tile(bbox, self.max_results, modified_since, self.limiter, emit)
+        else:
+            tile_fn = lambda bbox: fetch_tile(bbox, self.max_results, modified_since, self.limiter)
+        _, leaves, n_requests = tiling.cover(
+            COVERAGE_BBOX,
+            tile_fn,
+            self.max_results,
+            start=start,
+            workers=SCAN_WORKERS,
+            on_leaf=lambda quadkey, data: emit(data) if data else None,
+            # 304 auf eine Delta-Abfrage heißt nur "nichts geändert", nicht "alles geliefert"
+            on_unchanged=self.unchanged.add if modified_since is None else None,
+        )
+        return leaves, n_requests
+
+    def normalize(self, page):
+        if self.check_removed:
+            self.seen.update(d.get("ID") for d in page)
+        return normalize_stations(page, self.known_hashes, self.last)
+
+    def write(self, c, batch):
+        return write_stations(c, batch, rescore=not self.bulk, emit_events=not self.bulk)
+
+    def finish(self, c):
+        if self.full_sync:
+            # finish läuft nur ohne Abbruch → jede Kachel ist vollständig abgefragt
+            if not self.bulk:
+                unchanged = [tiling.tile_bounds(COVERAGE_BBOX, q) for q in self.unchanged]
+                self.removed = mark_removed(c, self.seen, self.polled_at, unchanged)
+            tiling.save_layout(c, self.leaves)
+            if POLL_BUDGET > 0:
+                scheduler.record(c, COVERAGE_BBOX, (), self.leaves, self.polled_at, full=True)
+        if self.refresh:
+            # Jede abgefragte Kachel ist vollständig: ihre fehlenden Stationen sind entfernt
+            tiles = [tiling.tile_bounds(COVERAGE_BBOX, q) for q in self.refresh]
+            unchanged = [tiling.tile_bounds(COVERAGE_BBOX, q) for q in self.unchanged]
+            self.removed = mark_removed(c, self.seen, self.polled_at, unchanged, tiles)
+            tiling.update_layout(c, self.refresh, self.refreshed)
+            scheduler.record(c, COVERAGE_BBOX, self.refresh, self.refreshed, self.polled_at)
+
+
+def run(with_regions=False):
+    """Ein Sync-Lauf: Kachel-Scan, Normalisierung und Schreiben laufen als Pipeline gleichzeitig.
+
+    Mit with_regions läuft der UK-Region-Scan als zweite Quelle in derselben
+    Pipeline mit (gemeinsames Request-Budget, Writer und Transaktionen).
+    Der Wasserstand rückt nur vor, wenn alle Kacheln vollständig geholt wurden;
+    bei einem Abbruch bleiben bereits geschriebene Batches erhalten und werden
+    beim nächsten Lauf über die Fingerprints übersprungen.
+    """
     print("🔄 Lade Daten von OpenChargeMap...")
-    data = fetch_from_api(max_results=MAX_RESULTS)
-    if data is None:
-        print("❌ Keine Daten empfangen. Breche ab.")
+    METRICS.reset()
+    laps = METRICS.laps("run")
+    validators_saved = False
+    try:
+        load_http_validators(OCM_CLIENT)
+
+        started = datetime.datetime.now(timezone.utc)
+        adaptive = plan_adaptive(started)
+        refresh = None
+        if adaptive is not None:
+            modified_since, refresh = adaptive
+            since = f", Delta-Sync seit {modified_since.isoformat()}" if modified_since else ""
+            print(f"🔁 Adaptiver Sync: {len(refresh)} fällige Kacheln (Budget {POLL_BUDGET}){since}")
+        else:
+            modified_since = plan_sync(SYNC_QUERY_KEY, started)
+            if modified_since is None:
+                print("🔁 Full-Sync")
+            else:
+                print(f"🔁 Delta-Sync seit {modified_since.isoformat()}")
+        full_sync = adaptive is None and modified_since is None
+        METRICS.count(full_sync=int(full_sync))
+        laps.lap("plan")
+
+        limiter = TokenBucket(OCM_MAX_RPS, capacity=max(1, int(OCM_MAX_RPS)))
+        sources = [OcmSource(MAX_RESULTS, modified_since, limiter, refresh=refresh)]
+        if with_regions:
+            sources.append(RegionSource(limiter=limiter))
+        ocm = sources[0]
+        http_before = dict(OCM_CLIENT.stats)
+        conn = connect()
+        try:
+            totals = pipeline.run_pipeline(conn, sources, METRICS)
+        except requests.RequestException as e:
+            print("❌ API request failed:", e)
+            print("❌ Keine vollständigen Daten empfangen. Breche ab.")
+            STATE_CACHE.clear()
+            METRICS.count(errors=1)
+            return
+        except Exception:
+            STATE_CACHE.clear()  # Hashes/Status wurden ggf. schon für nicht committete Batches fortgeschrieben
+            raise
+        finally:
+            try:
+                if ocm.bulk:
+                    finish_bulk_load(conn)
+            finally:
+                release(conn)
+                stats = count_http(http_before)
+        laps.lap("pipeline")
+
+        saved = totals["ocm"]
+        METRICS.count(tiles=len(ocm.leaves), stations_seen=saved.get("stations", 0), requests=ocm.n_requests)
+        print(
+            f"⏱️ {ocm.n_requests} Requests | {len(ocm.leaves)} Blatt-Kacheln | "
+            f"Retries: {stats['retries']} | 304: {stats['not_modified']} | {stats['bytes']} Bytes"
+        )
+        removed, revived = ocm.removed
+        if removed or revived:
+            METRICS.count(stations_removed=removed)
+            print(f"🗑️ {removed} Stationen nicht mehr bei OCM (als entfernt markiert), {revived} wieder aufgetaucht")
+        if POLL_BUDGET > 0:
+            report_freshness(len(ocm.refreshed) if refresh is not None else len(ocm.leaves) if full_sync else 0)
+
+        if saved.get("stations"):
+            print_saved(saved)
+            conn = connect()
+            try:
+                # Kommentar-Kennzahlen über die ganze Historie, versiegelte Monate eingeschlossen
+                with partitions.fanout(conn, PARTITION_DIR, ("comments_history",)):
+                    analytics.print_report(conn.cursor())
+            finally:
+                release(conn)
+            laps.lap("report")
+        save_http_validators(OCM_CLIENT)
+        validators_saved = True
+
+        # Kachelung teilt bis unter das Limit → Antwort vollständig, Wasserstand vorrücken
+        save_sync_state(SYNC_QUERY_KEY, started, full_sync=full_sync)
+        laps.lap("sync_state")
+
+        if saved.get("stations"):
+            print("✅ Fertig! Status-Historie aktualisiert.")
+        else:
+            print("✅ Fertig! Keine Änderungen.")
+    except Exception:
+        METRICS.count(errors=1)
+        raise
+    finally:
+        if not validators_saved:
+            reset_http_validators(OCM_CLIENT)
+        record_metrics("run")
+
+
+def report_freshness(polled):
+    """Frische der Kacheln nach dem Lauf (scheduler.freshness) als Messwerte und Ausgabe."""
+    conn = connect()
+    fresh = scheduler.freshness(conn.cursor())
+    release(conn)
+    METRICS.count(
+        poll_tiles_polled=polled,
+        poll_staleness_avg_seconds=fresh["staleness_avg_seconds"],
+        poll_staleness_max_seconds=fresh["staleness_max_seconds"],
+        poll_tiles_behind=fresh["tiles_behind"],
+        poll_missed_changes=fresh["missed_changes"],
+    )
+    print(
+        f"🎯 {polled} von {fresh['tiles']} Kacheln voll abgefragt | "
+        f"Alter Ø {fresh['staleness_avg_seconds'] / 60:.0f} min, max. {fresh['staleness_max_seconds'] / 3600:.1f} h | "
+        f"{fresh['tiles_behind']} hinter Plan | "
+        f"~{fresh['missed_changes']:.1f} erwartete ungesehene Änderungen"
+    )
+
+
+def record_metrics(job):
+    """Schreibt die Messwerte des Jobs als Prometheus-Textfile und nach run_metrics."""
+    duration = METRICS.stop()
+    try:
+        path = METRICS.write_textfile(METRICS_DIR, job)
+        conn = connect()
+        METRICS.save(conn.cursor(), job)
+        conn.commit()
+        release(conn)
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️ Messwerte konnten nicht geschrieben werden: {e}")
         return
+    print(f"📏 Messwerte ({duration:.1f} s): {path}")
 
-    print(f"✅ {len(data)} Ladepunkte erhalten. Speichere in Datenbank...")
-    save_to_db(data)
-    print("✅ Fertig! Status-Historie aktualisiert.")
 
 def run_region_scan():
     init_db()
     scan_uk_regions()
 
 
-if __name__ == "__main__":
+def run_retention(seal=None):
+    """Rollups nachziehen, alte Rohdaten löschen, freien Platz zurückgeben (retention.run).
+
+    Mit seal (Standard: SEAL_PARTITIONS) werden danach abgeschlossene Monate versiegelt;
+    die Rohdaten des Vormonats bleiben dafür bis dahin stehen. Ohne PARTITION_ACK
+    bleiben die Zeilen in ev.db, bis die Datei abgelegt und bestätigt ist (partitions.py).
+    """
+    seal = SEAL_PARTITIONS if seal is None else seal
+    METRICS.reset()
+    conn = connect()
+    try:
+        raw_days = RETENTION_RAW_DAYS
+        if seal:
+            raw_days = max(raw_days, partitions.raw_days_before_seal(conn.cursor()))
+        with METRICS.phase("retention"):
+            stats = retention.run(conn, raw_days, RETENTION_HOURLY_DAYS, vacuum=not seal)
+        if seal:
+            with METRICS.phase("seal"):
+                sealed = partitions.seal_closed(conn, PARTITION_DIR, confirm=PARTITION_ACK)
+                stats["vacuumed_pages"] = retention.incremental_vacuum(conn)
+            state = "versiegelt" if PARTITION_ACK else "geschrieben (ausstehend bis partitions.py ack)"
+            for name, moved in sealed.items():
+                print(f"🗄️ {name} {state}: {moved['status_history']} Status-Zeilen, "
+                      f"{moved['comments_history']} Kommentare, {moved['region_activity']} Region-Scans, "
+                      f"{moved['json_blobs']} Blobs")
+            stats["sealed_partitions"] = len(sealed)
+        METRICS.count(**stats)
+        print(f"🧹 Retention: {stats['status_rows']} Status-Zeilen, {stats['comments']} Kommentare, "
+              f"{stats['region_days']} Region-Tage aufgerollt")
+        print(f"   ➤ gelöscht: {stats['pruned_status_history']} Status-Zeilen, {stats['pruned_json_blobs']} Blobs, "
+              f"{stats['pruned_region_activity']} Region-Scans, "
+              f"{stats['pruned_station_activity_hourly']} Stunden-Rollups")
+        print(f"   ➤ {stats['vacuumed_pages']} Seiten freigegeben")
+    except Exception:
+        METRICS.count(errors=1)
+        raise
+    finally:
+        release(conn)
+        record_metrics("retention")
+
+
+def run_health_rebuild():
+    """Alle Health-Scores neu berechnen (health.rebuild), z. B. nach einem Backfill."""
+    METRICS.reset()
+    conn = connect()
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        with METRICS.phase("health.rebuild"):
+            n = health.rebuild(c)
+        conn.commit()
+        METRICS.count(health_updates=n)
+        print(f"🩺 Health-Score für {n} Stationen neu berechnet")
+    except Exception:
+        conn.rollback()
+        METRICS.count(errors=1)
+        raise
+    finally:
+        release(conn)
+        record_metrics("health")
+
+
+def export_changes():
+    """Schreibt die Änderungen dieses Laufs als Changeset nach CHANGESET_DIR.
+
+    Nach einem Laden ohne Änderungsprotokoll (changeset.require_base) entsteht
+    stattdessen eine neue Basis unter BASE_PATH; die Kette läuft danach normal weiter.
+    """
+    if base_required():
+        seq = changeset.write_base(DB_PATH, BASE_PATH)
+        print(f"📦 Laden ohne Änderungsprotokoll — neue Basis geschrieben: {BASE_PATH} "
+              f"({os.path.getsize(BASE_PATH)} Bytes, Stand Changeset {seq})")
+        return
+    path = changeset.export_changeset(DB_PATH, CHANGESET_DIR, ack=CHANGESET_ACK)
+    if path:
+        pending = "" if CHANGESET_ACK else ", wartet auf Bestätigung nach dem Upload"
+        print(f"📦 Changeset geschrieben: {path} ({os.path.getsize(path)} Bytes{pending})")
+    else:
+        print("📦 Keine Änderungen — kein Changeset.")
+
+
+def base_required():
+    """True, wenn nach einem Bulk-Laden eine neue Basis fällig ist (changeset.require_base)."""
+    conn = connect()
+    try:
+        return changeset.base_required(conn.cursor())
+    finally:
+        release(conn)
+
+
+def run_daemon(interval=300, region_interval=3600, jitter=30, retention_interval=86400):
+    """Dauerbetrieb: run(), scan_uk_regions() und run_retention() in festen Intervallen (+ Jitter) in einem Prozess.
+
+    Jobs laufen nacheinander im Hauptthread und überlappen daher nie; verpasste
+    Termine werden zusammengefasst statt nachgeholt. SIGTERM/SIGINT beenden den
+    Daemon nach dem laufenden Job. region_interval=0 bzw. retention_interval=0
+    deaktiviert Region-Scan bzw. Retention.
+    """
+    global SHARED_CONN
+
     init_db()
-    run()
-    #run_region_scan()
\ No newline at end of file
+    SHARED_CONN = tune_connection(metrics.connect(DB_PATH, METRICS))
+    STATE_CACHE.clear()
+
+    stop = threading.Event()
+
+    def handle_signal(signum, frame):
+        print(f"🛑 Signal {signum} empfangen — beende nach dem laufenden Job...")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    # [Name, Funktion, Intervall, nächster Termin (monotonic)]
+    jobs = [["OCM", run, interval, 0.0]]
+    if region_interval:
+        jobs.append(["Regionen", scan_uk_regions, region_interval, 0.0])
+    if retention_interval:
+        # erst nach einem Intervall: der Start soll nicht mit VACUUM beginnen
+        jobs.append(["Retention", run_retention, retention_interval, time.monotonic() + retention_interval])
+
+    print(f"🚀 Daemon gestartet (PID {os.getpid()}): " + ", ".join(f"{j[0]} alle {j[2]} s" for j in jobs))
+
+    try:
+        while not stop.is_set():
+            for job in jobs:
+                name, fn, every, due = job
+                if stop.is_set() or time.monotonic() < due:
+                    continue
+                started = time.monotonic()
+                try:
+                    fn()
+                    export_changes()
+                except Exception as e:
+                    print(f"❌ Job {name} fehlgeschlagen: {e}")
+                job[3] = started + every + random.uniform(0, jitter)
+
+            next_due = min(job[3] for job in jobs)
+            stop.wait(max(0.0, next_due - time.monotonic()))
+    finally:
+        SHARED_CONN.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        SHARED_CONN.close()
+        SHARED_CONN = None
+        STATE_CACHE.clear()
+        print("✅ Daemon beendet.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenChargeMap → SQLite")
+    parser.add_argument("--daemon", action="store_true", help="dauerhaft laufen statt eines einzelnen Laufs")
+    parser.add_argument("--interval", type=float, default=300, help="Sekunden zwischen OCM-Läufen (Daemon)")
+    parser.add_argument("--region-interval", type=float, default=3600,
+                        help="Sekunden zwischen Region-Scans (Daemon, 0 = aus)")
+    parser.add_argument("--retention-interval", type=float, default=86400,
+                        help="Sekunden zwischen Retention-Läufen (Daemon, 0 = aus)")
+    parser.add_argument("--jitter", type=float, default=30, help="max. zufällige Verzögerung je Termin in Sekunden")
+    parser.add_argument("--regions", action="store_true",
+                        help="UK-Regionen im selben Lauf mitscannen (gemeinsame Pipeline)")
+    parser.add_argument("--profile", choices=["cpu", "memory"],
+                        help="einzelnen Lauf mit cProfile bzw. tracemalloc profilieren (Ausgabe nach data/profiles)")
+    parser.add_argument("--health-rebuild", action="store_true",
+                        help="nur alle Health-Scores neu berechnen (nach Backfills)")
+    parser.add_argument("--retention", action="store_true",
+                        help="nur Rollups, Pruning und VACUUM ausführen (RETENTION_RAW_DAYS, RETENTION_HOURLY_DAYS)")
+    parser.add_argument("--seal", action="store_true",
+                        help="Retention und danach abgeschlossene Monate nach data/partitions versiegeln")
+    parser.add_argument("--poll-budget", type=int, default=POLL_BUDGET,
+                        help="adaptiver Modus: max. volle Kachel-Abfragen je Lauf statt täglichem Full-Sync (0 = aus)")
+    args = parser.parse_args()
+    POLL_BUDGET = args.poll_budget
+
+    if args.daemon:
+        run_daemon(args.interval, args.region_interval, args.jitter, args.retention_interval)
+    elif args.health_rebuild:
+        init_db()
+        run_health_rebuild()
+        export_changes()
+    elif args.retention or args.seal:
+        init_db()
+        run_retention(seal=args.seal or None)
+        export_changes()
+    else:
+        init_db()
+        with metrics.profiled(args.profile, PROFILE_DIR):
+            run(with_regions=args.regions)
+        export_changes()
\ No newline at end of file
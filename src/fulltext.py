@@ -0,0 +1,235 @@
+"""Volltextsuche (FTS5) über die Freitexte in comments_history und status_history.
+
+Beide Indizes sind External-Content-Tabellen: der Text liegt nur einmal in der
+Quelltabelle, comments_fts/status_fts halten nur den invertierten Index und
+werden per Trigger synchron gehalten (auch beim Pruning durch retention.py).
+search() liefert nach bm25 sortierte Treffer samt Station, optional gefiltert
+nach Betreiber, Zeitfenster und Bounding Box (über stations_rtree). Versiegelte
+Monate tragen eigene Indizes in ihrer Partitionsdatei (partitions.seal) und
+werden mit partition_dir mit durchsucht; bm25 ist je Index gerechnet.
+
+    python fulltext.py "card reader" [--operator "BP Pulse"] [--since 2024-01-01] [--bbox 51.2,-0.5,51.7,0.3]
+    python fulltext.py --backfill
+"""
+import argparse
+import sqlite3
+
+import partitions
+
+# Index → (Quelltabelle, Zeitspalte, Art im Ergebnis)
+SOURCES = {
+    "comments_fts": ("comments_history", "comment_date", "comment"),
+    "status_fts": ("status_history", "timestamp", "status"),
+}
+TOKENIZE = "porter unicode61 remove_diacritics 2"  # "failed"/"failing" → "fail", Akzente egal
+PREFIX = "2 3"  # Präfix-Indizes für kurze Suchen wie "char*"
+SNIPPET_TOKENS = 12
+
+
+def available(c):
+    """True, wenn SQLite mit FTS5 gebaut ist."""
+    c.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+    if c.fetchone()[0]:
+        return True
+    try:
+        c.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+        c.execute("DROP TABLE temp.fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def install(c):
+    """FTS-Indizes und Trigger anlegen (idempotent, aus init_db); neue Indizes einmalig befüllen.
+
+    Rückgabe: False, wenn SQLite kein FTS5 kann (die Suche fehlt dann, alles andere läuft).
+    """
+    if not available(c):
+        print("⚠️ SQLite ohne FTS5 — Volltextsuche deaktiviert.")
+        return False
+
+    c.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    existing = {row[0] for row in c.fetchall()}
+
+    for fts, (table, _, _) in SOURCES.items():
+        c.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                comment_text,
+                content='{table}',
+                content_rowid='id',
+                tokenize='{TOKENIZE}',
+                prefix='{PREFIX}'
+            )
+        """)
+        # Ohne WHEN-Bedingung: 'rebuild' nimmt auch NULL-Texte auf, die Trigger müssen dazu passen
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO {fts} (rowid, comment_text) VALUES (NEW.id, NEW.comment_text);
+            END
+        """)
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO {fts} ({fts}, rowid, comment_text) VALUES ('delete', OLD.id, OLD.comment_text);
+            END
+        """)
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF comment_text ON {table}
+            BEGIN
+                INSERT INTO {fts} ({fts}, rowid, comment_text) VALUES ('delete', OLD.id, OLD.comment_text);
+                INSERT INTO {fts} (rowid, comment_text) VALUES (NEW.id, NEW.comment_text);
+            END
+        """)
+        if fts not in existing:
+            backfill(c, fts)
+    return True
+
+
+def install_partition(c, schema):
+    """Indizes in einer angehängten Partition anlegen und füllen (beim Versiegeln, ohne Trigger).
+
+    Rückgabe: False ohne FTS5.
+    """
+    if not available(c):
+        return False
+    for fts, (table, _, _) in SOURCES.items():
+        c.execute(f"""
+            CREATE VIRTUAL TABLE {schema}.{fts} USING fts5(
+                comment_text,
+                content='{table}',
+                content_rowid='id',
+                tokenize='{TOKENIZE}',
+                prefix='{PREFIX}'
+            )
+        """)
+        c.execute(f"INSERT INTO {schema}.{fts} ({fts}) VALUES ('rebuild')")
+    return True
+
+
+def backfill(c, fts=None):
+    """Index (bzw. alle) komplett aus der Quelltabelle neu aufbauen."""
+    for name in [fts] if fts else SOURCES:
+        c.execute(f"INSERT INTO {name} ({name}) VALUES ('rebuild')")
+
+
+def match_expression(text):
+    """Freie Eingabe → FTS5-Ausdruck: jedes Wort als Phrase (UND-verknüpft), "wort*" bleibt Präfixsuche.
+
+    Schützt vor Syntaxfehlern durch Bindestriche, Doppelpunkte usw. in Nutzereingaben.
+    """
+    terms = []
+    for word in text.split():
+        star = word.endswith("*")
+        word = word.rstrip("*").replace('"', "")
+        if word:
+            terms.append(f'"{word}"' + ("*" if star else ""))
+    return " ".join(terms)
+
+
+def search(c, query, operator=None, since=None, until=None, bbox=None, limit=20,
+           sources=("comments_fts", "status_fts"), raw=False, partition_dir=None):
+    """Nach Relevanz (bm25) sortierte Treffer für query.
+
+    operator: exakter Betreibername; since/until: ISO-Zeitfenster auf comment_date bzw. timestamp;
+    bbox: (south, west, north, east); raw=True reicht query unverändert als FTS5-Syntax durch
+    (OR, NEAR, "Phrasen"). Mit partition_dir werden auch die versiegelten Monate im Fenster
+    durchsucht (eigene Indizes je Partitionsdatei, siehe partitions.py; außerhalb einer Transaktion).
+    Rückgabe: Liste von dicts, beste zuerst.
+    """
+    expression = query if raw else match_expression(query)
+    if not expression:
+        return []
+
+    args = (expression, operator, since, until, bbox, limit, sources)
+    hits = search_schema(c, "main", *args)
+    if partition_dir is not None:
+        conn = c.connection
+        tables = [SOURCES[fts][0] for fts in sources]
+        for group in partitions.batches(conn, partitions.select_partitions(c, tables, since, until)):
+            with partitions.attached(conn, partition_dir, group) as aliases:
+                for alias, _, _ in aliases:
+                    hits += search_schema(c, alias, *args)
+        hits.sort(key=lambda hit: hit["rank"])
+    return hits[:limit]
+
+
+def search_schema(c, schema, expression, operator, since, until, bbox, limit, sources):
+    """search() in einer Datenbank: main oder eine angehängte Partition (Stationen immer aus main)."""
+    c.execute(f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table'")
+    present = {row[0] for row in c.fetchall()}
+    parts, params = [], []
+    for fts in sources:
+        if fts not in present:
+            continue
+        table, ts_column, kind = SOURCES[fts]
+        joins = ""
+        where = [f"{fts} MATCH ?"]
+        part_params = [expression]
+        if bbox is not None:
+            south, west, north, east = bbox
+            # R*Tree als Vorfilter, exakter Nachfilter auf stations (float32-Rundung, siehe spatial.py)
+            joins = "JOIN main.stations_rtree r ON r.station_id = s.station_id"
+            where.append("r.max_lat >= ? AND r.min_lat <= ? AND r.max_lon >= ? AND r.min_lon <= ?")
+            where.append("s.lat BETWEEN ? AND ? AND s.lon BETWEEN ? AND ?")
+            part_params += [south, north, west, east, south, north, west, east]
+        if operator is not None:
+            where.append("s.operator = ?")
+            part_params.append(operator)
+        if since is not None:
+            where.append(f"h.{ts_column} >= ?")
+            part_params.append(since)
+        if until is not None:
+            where.append(f"h.{ts_column} < ?")
+            part_params.append(until)
+        parts.append(f"""
+            SELECT '{kind}', h.id, s.station_id, s.title, s.operator, s.lat, s.lon, h.{ts_column},
+                   snippet({fts}, 0, '[', ']', '…', {SNIPPET_TOKENS}), bm25({fts}) AS rank
+            FROM {schema}.{fts} AS {fts}
+            JOIN {schema}.{table} h ON h.id = {fts}.rowid
+            JOIN main.stations s ON s.station_id = h.station_id
+            {joins}
+            WHERE {" AND ".join(where)}
+        """)
+        params += part_params
+    if not parts:
+        return []
+
+    c.execute(" UNION ALL ".join(parts) + " ORDER BY rank LIMIT ?", params + [limit])
+    return [
+        {"kind": kind, "id": row_id, "station_id": sid, "title": title, "operator": op, "lat": lat, "lon": lon,
+         "timestamp": ts, "snippet": snippet, "rank": rank}
+        for kind, row_id, sid, title, op, lat, lon, ts, snippet, rank in c.fetchall()
+    ]
+
+
+if __name__ == "__main__":
+    import fetch  # DB-Pfad und Schema (init_db legt die Indizes an)
+
+    parser = argparse.ArgumentParser(description="Volltextsuche über Kommentare und Status-Texte")
+    parser.add_argument("query", nargs="?", help="Suchbegriffe (alle müssen vorkommen, wort* = Präfix)")
+    parser.add_argument("--operator")
+    parser.add_argument("--since", help="ISO-Zeitpunkt (inklusive)")
+    parser.add_argument("--until", help="ISO-Zeitpunkt (exklusive)")
+    parser.add_argument("--bbox", help="south,west,north,east")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--raw", action="store_true", help="query als FTS5-Syntax durchreichen")
+    parser.add_argument("--backfill", action="store_true", help="Indizes komplett neu aufbauen")
+    args = parser.parse_args()
+
+    fetch.init_db()
+    conn = fetch.connect()
+    c = conn.cursor()
+    if args.backfill:
+        c.execute("BEGIN IMMEDIATE")
+        backfill(c)
+        conn.commit()
+        print("✅ Volltext-Indizes neu aufgebaut")
+    if args.query:
+        bbox = tuple(float(v) for v in args.bbox.split(",")) if args.bbox else None
+        hits = search(c, args.query, args.operator, args.since, args.until, bbox, args.limit, raw=args.raw)
+        print(f"🔎 {len(hits)} Treffer für {args.query!r}:")
+        for hit in hits:
+            print(f"   - [{hit['kind']}] Station {hit['station_id']} ({hit['title']}, {hit['operator']}) "
+                  f"{hit['timestamp']}: {hit['snippet']}")
+    fetch.release(conn)
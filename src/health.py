@@ -0,0 +1,243 @@
+"""Health-Score je Station: funktioniert die Ladesäule?
+
+Der Score (0–100) setzt sich zusammen aus
+
+    failure_ratio    zeitlich abgeklungenes Verhältnis der Check-ins "Charging Not Possible"
+                     zu allen Check-ins (Halbwertszeit FAILURE_HALF_LIFE_DAYS, mit Prior 1:1)
+    success_recency  0.5 ** (Tage seit dem letzten erfolgreichen Check-in / SUCCESS_HALF_LIFE_DAYS)
+    operational      is_operational aus station_latest_status (unbekannt zählt halb)
+
+    score = 100 * (W_RATIO * (1 - failure_ratio) + W_RECENCY * success_recency + W_OPERATIONAL * operational)
+
+Gespeichert wird er in station_health samt Komponenten und as_of (Bezugszeitpunkt
+des Abklingens). update() rechnet nur die Stationen eines Schreib-Batches neu
+(aus deren eigener Historie, über die Indizes je station_id), rebuild() alle in
+einem einzigen INSERT … SELECT — beide mit derselben SQL-Abfrage, also mit
+identischem Ergebnis.
+
+Ohne neue Check-ins altert der Score trotzdem (success_recency, und über den
+Prior auch failure_ratio). Leser nehmen deshalb CURRENT_SQL: sie rechnet den
+Score zum Lesezeitpunkt aus den gespeicherten Gewichten (ab as_of weiter
+abgeklungen) und last_success — gleiches Ergebnis wie ein rebuild() zu diesem
+Zeitpunkt, ohne station_health neu zu schreiben (und ohne jede Zeile ins
+nächste Changeset zu bringen).
+
+Versiegelt partitions.seal alte Kommentare in eine Monatsdatei, fasst
+seal_checkins deren Check-ins je Station in sealed_checkins zusammen (Gewichte
+zum Versiegelungszeitpunkt, letzter Erfolg/Ausfall, Anzahl). Die Abklingung ist
+multiplikativ, die Summe ab dort also exakt fortschreibbar: der Score bleibt
+derselbe wie ohne Versiegeln.
+"""
+import datetime
+import sqlite3
+from datetime import timezone
+
+FAILED_CHECKIN = "Charging Not Possible"  # wie analytics.FAILED_CHECKIN
+SUCCESS_CHECKIN = "Successfully Charged"
+FAILURE_HALF_LIFE_DAYS = 30.0
+SUCCESS_HALF_LIFE_DAYS = 90.0
+PRIOR = 0.5  # Pseudo-Check-ins je Seite: ohne Daten failure_ratio = 0.5
+W_RATIO = 0.6
+W_RECENCY = 0.25
+W_OPERATIONAL = 0.15
+
+# Check-in-Gewichte je Station zum Zeitpunkt :now_jd aus {{comments}} (ohne sealed_checkins)
+CHECKIN_SQL = f"""
+    SELECT
+        station_id,
+        SUM(CASE WHEN checkin_status = :failed THEN pow(0.5, max(0.0, :now_jd - julianday(comment_date))
+                                                               / {FAILURE_HALF_LIFE_DAYS}) ELSE 0 END) AS fw,
+        SUM(CASE WHEN checkin_status = :success THEN pow(0.5, max(0.0, :now_jd - julianday(comment_date))
+                                                                / {FAILURE_HALF_LIFE_DAYS}) ELSE 0 END) AS sw,
+        MAX(CASE WHEN checkin_status = :success THEN comment_date END) AS last_success,
+        MAX(CASE WHEN checkin_status = :failed THEN comment_date END) AS last_failure,
+        COUNT(*) AS n
+    FROM {{comments}}
+    WHERE checkin_status IN (:failed, :success) AND comment_date IS NOT NULL {{checkin_filter}}
+    GROUP BY station_id
+"""
+
+SCORE_SQL = f"""
+    WITH checkins AS (
+        SELECT station_id, SUM(fw) AS fw, SUM(sw) AS sw, MAX(last_success) AS last_success,
+               MAX(last_failure) AS last_failure, SUM(n) AS n
+        FROM (
+            {CHECKIN_SQL.format(comments="comments_history", checkin_filter="{checkin_filter}")}
+            UNION ALL
+            SELECT station_id,
+                   failure_weight * pow(0.5, max(0.0, :now_jd - julianday(as_of)) / {FAILURE_HALF_LIFE_DAYS}),
+                   success_weight * pow(0.5, max(0.0, :now_jd - julianday(as_of)) / {FAILURE_HALF_LIFE_DAYS}),
+                   last_success, last_failure, checkins
+            FROM sealed_checkins
+            WHERE true {{checkin_filter}}
+        )
+        GROUP BY station_id
+    ),
+    parts AS (
+        SELECT
+            s.station_id,
+            COALESCE(ch.fw, 0) AS fw,
+            COALESCE(ch.sw, 0) AS sw,
+            (COALESCE(ch.fw, 0) + {PRIOR}) / (COALESCE(ch.fw, 0) + COALESCE(ch.sw, 0) + 2 * {PRIOR}) AS ratio,
+            CASE WHEN ch.last_success IS NULL THEN 0.0
+                 ELSE pow(0.5, max(0.0, :now_jd - julianday(ch.last_success)) / {SUCCESS_HALF_LIFE_DAYS})
+            END AS recency,
+            ch.last_success,
+            ch.last_failure,
+            COALESCE(ch.n, 0) AS n,
+            l.is_operational
+        FROM stations s
+        LEFT JOIN checkins ch ON ch.station_id = s.station_id
+        LEFT JOIN station_latest_status l ON l.station_id = s.station_id
+        WHERE true {{station_filter}}
+    )
+    INSERT INTO station_health (
+        station_id, score, failure_ratio, failure_weight, success_weight, success_recency,
+        last_success, last_failure, checkins, is_operational, as_of
+    )
+    SELECT
+        station_id,
+        100 * ({W_RATIO} * (1 - ratio) + {W_RECENCY} * recency
+               + {W_OPERATIONAL} * CASE is_operational WHEN 1 THEN 1.0 WHEN 0 THEN 0.0 ELSE 0.5 END),
+        ratio, fw, sw, recency, last_success, last_failure, n, is_operational, :now
+    FROM parts
+    WHERE true
+    ON CONFLICT(station_id) DO UPDATE SET
+        score = excluded.score,
+        failure_ratio = excluded.failure_ratio,
+        failure_weight = excluded.failure_weight,
+        success_weight = excluded.success_weight,
+        success_recency = excluded.success_recency,
+        last_success = excluded.last_success,
+        last_failure = excluded.last_failure,
+        checkins = excluded.checkins,
+        is_operational = excluded.is_operational,
+        as_of = excluded.as_of
+"""
+TOUCHED = "IN (SELECT station_id FROM temp.health_touched)"
+
+# Score zum Zeitpunkt :now_jd aus station_health, Spalten wie dort (as_of = :now)
+CURRENT_SQL = f"""
+    SELECT
+        station_id,
+        100 * ({W_RATIO} * (1 - ratio) + {W_RECENCY} * recency
+               + {W_OPERATIONAL} * CASE is_operational WHEN 1 THEN 1.0 WHEN 0 THEN 0.0 ELSE 0.5 END) AS score,
+        ratio AS failure_ratio, fw AS failure_weight, sw AS success_weight, recency AS success_recency,
+        last_success, last_failure, checkins, is_operational, :now AS as_of
+    FROM (
+        SELECT *, (fw + {PRIOR}) / (fw + sw + 2 * {PRIOR}) AS ratio
+        FROM (
+            SELECT
+                station_id, last_success, last_failure, checkins, is_operational,
+                failure_weight * pow(0.5, max(0.0, :now_jd - julianday(as_of)) / {FAILURE_HALF_LIFE_DAYS}) AS fw,
+                success_weight * pow(0.5, max(0.0, :now_jd - julianday(as_of)) / {FAILURE_HALF_LIFE_DAYS}) AS sw,
+                CASE WHEN last_success IS NULL THEN 0.0
+                     ELSE pow(0.5, max(0.0, :now_jd - julianday(last_success)) / {SUCCESS_HALF_LIFE_DAYS})
+                END AS recency
+            FROM station_health
+        )
+    )
+"""
+
+
+def install(c):
+    """station_health anlegen (idempotent, aus init_db)."""
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS station_health (
+            station_id INTEGER PRIMARY KEY,
+            score REAL,
+            failure_ratio REAL,
+            failure_weight REAL,
+            success_weight REAL,
+            success_recency REAL,
+            last_success TEXT,
+            last_failure TEXT,
+            checkins INTEGER,
+            is_operational BOOLEAN,
+            as_of TEXT
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_station_health_score ON station_health (score, station_id)")
+    # Check-ins, die partitions.seal aus comments_history verschoben hat, zusammengefasst je Station
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS sealed_checkins (
+            station_id INTEGER PRIMARY KEY,
+            failure_weight REAL,
+            success_weight REAL,
+            last_success TEXT,
+            last_failure TEXT,
+            checkins INTEGER,
+            as_of TEXT
+        )
+    """)
+
+
+def ensure_math(conn):
+    """pow() nachrüsten, falls SQLite ohne Mathe-Funktionen gebaut ist (vor 3.35 bzw. ohne ENABLE_MATH_FUNCTIONS)."""
+    try:
+        conn.execute("SELECT pow(2, 1)").fetchone()
+    except sqlite3.OperationalError:
+        conn.create_function("pow", 2, pow, deterministic=True)
+
+
+def params(now):
+    now = now or datetime.datetime.now(timezone.utc)
+    return {
+        "failed": FAILED_CHECKIN,
+        "success": SUCCESS_CHECKIN,
+        "now": now.isoformat(),
+        "now_jd": now.timestamp() / 86400.0 + 2440587.5,  # julianday() ohne Zeitzonen-Parsing
+    }
+
+
+def seal_checkins(c, schema, as_of):
+    """Check-ins aus {schema}.comments_history (eine Partition) in sealed_checkins aufnehmen. Rückgabe: Stationen.
+
+    as_of: Bezugszeitpunkt (datetime) nach allen versiegelten Kommentaren. Die Gewichte
+    klingen wie in station_health ab as_of weiter ab; bestehende Einträge werden
+    erst auf as_of gebracht und dann addiert. In der offenen Transaktion des Aufrufers.
+    """
+    ensure_math(c.connection)
+    c.execute(f"""
+        INSERT INTO sealed_checkins (station_id, failure_weight, success_weight, last_success, last_failure,
+                                     checkins, as_of)
+        SELECT station_id, fw, sw, last_success, last_failure, n, :now
+        FROM ({CHECKIN_SQL.format(comments=f"{schema}.comments_history", checkin_filter="")})
+        WHERE true
+        ON CONFLICT(station_id) DO UPDATE SET
+            failure_weight = excluded.failure_weight + sealed_checkins.failure_weight
+                * pow(0.5, max(0.0, :now_jd - julianday(sealed_checkins.as_of)) / {FAILURE_HALF_LIFE_DAYS}),
+            success_weight = excluded.success_weight + sealed_checkins.success_weight
+                * pow(0.5, max(0.0, :now_jd - julianday(sealed_checkins.as_of)) / {FAILURE_HALF_LIFE_DAYS}),
+            last_success = COALESCE(max(excluded.last_success, sealed_checkins.last_success),
+                                    excluded.last_success, sealed_checkins.last_success),
+            last_failure = COALESCE(max(excluded.last_failure, sealed_checkins.last_failure),
+                                    excluded.last_failure, sealed_checkins.last_failure),
+            checkins = excluded.checkins + sealed_checkins.checkins,
+            as_of = excluded.as_of
+    """, params(as_of))
+    return c.rowcount
+
+
+def update(c, station_ids, now=None):
+    """Score der übergebenen Stationen neu berechnen (in der Transaktion des Aufrufers). Rückgabe: Anzahl."""
+    if not station_ids:
+        return 0
+    ensure_math(c.connection)
+    c.execute("CREATE TEMP TABLE IF NOT EXISTS health_touched (station_id INTEGER PRIMARY KEY)")
+    c.execute("DELETE FROM temp.health_touched")
+    c.executemany("INSERT OR IGNORE INTO temp.health_touched VALUES (?)", ((sid,) for sid in station_ids))
+    c.execute(SCORE_SQL.format(checkin_filter=f"AND station_id {TOUCHED}",
+                               station_filter=f"AND s.station_id {TOUCHED}"), params(now))
+    n = c.rowcount
+    c.execute("DELETE FROM temp.health_touched")
+    return n
+
+
+def rebuild(c, now=None):
+    """Alle Scores in einem Durchgang neu berechnen (Backfill, Altern von success_recency). Rückgabe: Anzahl."""
+    ensure_math(c.connection)
+    c.execute(SCORE_SQL.format(checkin_filter="", station_filter=""), params(now))
+    n = c.rowcount
+    c.execute("DELETE FROM station_health WHERE station_id NOT IN (SELECT station_id FROM stations)")
+    return n
@@ -0,0 +1,199 @@
+import hashlib
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import jsonstream
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+STREAM_CHUNK = 64 * 1024  # Bytes je Lesevorgang beim Streaming
+
+
+def validator_key(url):
+    """Stabiler Schlüssel für ETag/Last-Modified einer URL (API-Keys landen so nicht im Klartext in der DB)."""
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class FetchResult:
+    """Ergebnis eines GET: Daten plus Messwerte für den Aufrufer."""
+
+    __slots__ = ("url", "status", "data", "not_modified", "elapsed", "retries", "bytes")
+
+    def __init__(self, url, status, data, not_modified, elapsed, retries, nbytes):
+        self.url = url
+        self.status = status
+        self.data = data
+        self.not_modified = not_modified
+        self.elapsed = elapsed  # Sekunden inkl. Retries und Backoff
+        self.retries = retries
+        self.bytes = nbytes  # übertragene (ggf. komprimierte) Bytes
+
+
+class HttpClient:
+    """Gemeinsamer HTTP-Client: Keep-Alive-Pool, gzip, Retries mit Backoff, Conditional Requests.
+
+    Nach ausgeschöpften Retries wird die letzte requests-Exception weitergereicht,
+    bestehende `except requests.RequestException`-Blöcke greifen also weiter.
+    """
+
+    def __init__(self, headers=None, timeout=15, max_retries=4, backoff_base=0.5,
+                 backoff_max=30.0, pool_size=10):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+        if headers:
+            self.session.headers.update(headers)
+
+        # validator_key(url) -> (etag, last_modified)
+        self.validators = {}
+        self.stats = {"requests": 0, "retries": 0, "not_modified": 0, "errors": 0, "bytes": 0, "decode_seconds": 0.0}
+        self.lock = threading.Lock()
+
+    def backoff(self, attempt, response=None):
+        """Wartezeit vor dem nächsten Versuch: Retry-After falls vorhanden, sonst Full-Jitter-Backoff."""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(self.backoff_max, float(retry_after))
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def count(self, **deltas):
+        with self.lock:
+            for k, v in deltas.items():
+                self.stats[k] += v
+
+    def request(self, url, params=None, headers=None, timeout=None, conditional=False, stream=False):
+        """GET mit Retries. Rückgabe: (response, validator_key oder None, Anzahl Retries)."""
+        request_headers = dict(headers or {})
+        key = validator_key(url) if conditional else None
+        if key is not None:
+            etag, last_modified = self.validators.get(key, (None, None))
+            if etag:
+                request_headers["If-None-Match"] = etag
+            if last_modified:
+                request_headers["If-Modified-Since"] = last_modified
+
+        attempt = 0
+        while True:
+            response = None
+            try:
+                self.count(requests=1)
+                response = self.session.get(
+                    url, params=params, headers=request_headers, timeout=timeout or self.timeout, stream=stream
+                )
+                if response.status_code in RETRY_STATUS and attempt < self.max_retries:
+                    raise requests.HTTPError(f"{response.status_code} (retry)", response=response)
+                response.raise_for_status()
+                return response, key, attempt
+            except (requests.Timeout, requests.ConnectionError, requests.HTTPError) as e:
+                if stream and response is not None:
+                    response.close()  # Verbindung zurück in den Pool
+                retryable = not isinstance(e, requests.HTTPError) or (
+                    e.response is not None and e.response.status_code in RETRY_STATUS
+                )
+                if not retryable or attempt >= self.max_retries:
+                    self.count(errors=1)
+                    raise
+                time.sleep(self.backoff(attempt, response))
+                attempt += 1
+                self.count(retries=1)
+
+    def remember(self, key, response):
+        """ETag/Last-Modified einer vollständig gelesenen Antwort für den nächsten Conditional Request."""
+        if key is None:
+            return
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self.validators[key] = (etag, last_modified)
+
+    def get_json(self, url, params=None, headers=None, timeout=None, conditional=False):
+        """GET + JSON-Decode mit Retries. Bei conditional=True und 304 ist data None und not_modified True."""
+        start = time.perf_counter()
+        response, key, attempt = self.request(url, params, headers, timeout, conditional)
+
+        nbytes = len(response.content) if response.status_code != 304 else 0
+        raw = response.raw.tell() if hasattr(response.raw, "tell") else 0
+        self.count(bytes=raw or nbytes)
+
+        if response.status_code == 304:
+            self.count(not_modified=1)
+            return FetchResult(url, 304, None, True, time.perf_counter() - start, attempt, 0)
+
+        t_decode = time.perf_counter()
+        data = response.json()
+        self.count(decode_seconds=time.perf_counter() - t_decode)
+        self.remember(key, response)
+
+        return FetchResult(
+            url, response.status_code, data, False, time.perf_counter() - start, attempt, raw or nbytes
+        )
+
+    def stream_json(self, url, params=None, headers=None, timeout=None, conditional=False,
+                    chunk_size=STREAM_CHUNK):
+        """Wie get_json, aber data iteriert die Elemente des JSON-Arrays, während der Body noch lädt.
+
+        Der Body wird nie komplett im Speicher gehalten. Bytes und Dekodierzeit
+        werden beim Ende des Iterators gezählt, ETag/Last-Modified erst gemerkt,
+        wenn das Array vollständig gelesen wurde — ein abgebrochener Strom führt
+        so beim nächsten Mal nicht zu einem 304 auf unvollständige Daten.
+        Abbrüche mitten im Body werden nicht wiederholt (requests-Exception bzw.
+        ValueError beim Aufrufer). result.bytes ist None, die Größe steht erst
+        nach dem Lesen fest.
+        """
+        start = time.perf_counter()
+        response, key, attempt = self.request(url, params, headers, timeout, conditional, stream=True)
+
+        if response.status_code == 304:
+            response.close()
+            self.count(not_modified=1)
+            return FetchResult(url, 304, None, True, time.perf_counter() - start, attempt, 0)
+
+        return FetchResult(
+            url, response.status_code, self.iter_elements(response, key, chunk_size), False,
+            time.perf_counter() - start, attempt, None,
+        )
+
+    def iter_elements(self, response, key, chunk_size):
+        read_seconds = 0.0
+        busy_seconds = 0.0
+        nbytes = 0
+
+        def chunks():
+            nonlocal read_seconds, nbytes
+            it = response.iter_content(chunk_size)
+            while True:
+                t0 = time.perf_counter()
+                chunk = next(it, None)
+                read_seconds += time.perf_counter() - t0
+                if chunk is None:
+                    return
+                nbytes += len(chunk)
+                yield chunk
+
+        items = jsonstream.iter_array(chunks())
+        try:
+            while True:
+                t0 = time.perf_counter()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    break
+                finally:
+                    busy_seconds += time.perf_counter() - t0
+                yield item
+            self.remember(key, response)
+        finally:
+            raw = response.raw.tell() if hasattr(response.raw, "tell") else 0
+            response.close()
+            self.count(bytes=raw or nbytes, decode_seconds=max(0.0, busy_seconds - read_seconds))
@@ -0,0 +1,89 @@
+"""Inkrementelles Parsen eines JSON-Arrays aus einem Byte-Strom (z. B. HTTP-Body).
+
+iter_array() liefert die Elemente des obersten Arrays einzeln, sobald sie
+vollständig im Puffer stehen; es liegt also nie mehr als ein Chunk plus ein
+angefangenes Element im Speicher, egal wie groß die Antwort ist. Dekodiert
+wird mit dem C-Scanner aus json (raw_decode), Element für Element.
+"""
+import codecs
+import json
+
+WHITESPACE = " \t\n\r"
+DELIMITERS = WHITESPACE + ",]"
+DECODER = json.JSONDecoder()
+
+
+def skip(buf, pos, chars=WHITESPACE):
+    while pos < len(buf) and buf[pos] in chars:
+        pos += 1
+    return pos
+
+
+def iter_array(chunks, raw=False):
+    """Elemente eines JSON-Arrays aus einem Iterator von Byte-Chunks (UTF-8).
+
+    raw=True liefert statt des dekodierten Werts den JSON-Text des Elements
+    (z. B. um ihn an einen anderen Prozess zu geben). Wirft ValueError bei
+    ungültigem oder abgeschnittenem JSON.
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buf = ""
+    pos = 0
+    eof = False
+
+    def more():
+        """Hängt den nächsten Chunk an; False am Ende des Stroms."""
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            buf = buf[pos:] + utf8.decode(b"", final=True)
+        else:
+            buf = buf[pos:] + utf8.decode(chunk)
+        pos = 0
+        return True
+
+    # Anfang: '['
+    while True:
+        pos = skip(buf, pos)
+        if pos < len(buf):
+            break
+        if not more():
+            raise ValueError("Leere Antwort statt JSON-Array")
+    if buf[pos] != "[":
+        raise ValueError(f"JSON-Array erwartet, gefunden: {buf[pos:pos + 20]!r}")
+    pos += 1
+
+    expect = "value_or_end"  # danach: "comma_or_end" bzw. nach einem Komma "value"
+    while True:
+        pos = skip(buf, pos)
+        if pos >= len(buf):
+            if not more():
+                raise ValueError("JSON-Array nicht abgeschlossen")
+            continue
+        char = buf[pos]
+        if char == "]" and expect != "value":
+            return
+        if expect == "comma_or_end":
+            if char != ",":
+                raise ValueError(f"',' erwartet an Position {pos}: {buf[pos:pos + 20]!r}")
+            pos += 1
+            expect = "value"
+            continue
+
+        try:
+            value, end = DECODER.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            # Element noch unvollständig → nachladen; am Ende ist es wirklich kaputt
+            if not more():
+                raise
+            continue
+        if (end == len(buf) or buf[end] not in DELIMITERS) and more():
+            # Zahlen könnten am Chunk-Ende abgeschnitten sein ("2" von "2.5") → erst mit Trennzeichen annehmen
+            continue
+        start, pos = pos, end
+        expect = "comma_or_end"
+        yield buf[start:end] if raw else value
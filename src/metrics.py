@@ -0,0 +1,222 @@
+"""Messwerte je Lauf: Phasen-Timer, Zähler und SQL-Statement-Zahlen.
+
+Ein Metrics-Objekt sammelt während eines Jobs (z. B. "run", "regions") und
+wird am Ende als Prometheus-Textfile (für den textfile-Collector des
+node_exporter) und als Zeilen in run_metrics geschrieben. profiled() ist der
+optionale cProfile-/tracemalloc-Hook für einen einzelnen Lauf.
+"""
+import contextlib
+import cProfile
+import datetime
+import io
+import os
+import pstats
+import re
+import sqlite3
+import threading
+import time
+import tracemalloc
+from datetime import timezone
+
+PREFIX = "ocm_fetch"
+
+
+class Metrics:
+    """Thread-sichere Sammlung von Phasen-Dauern (Sekunden), Zählern und SQL-Statements je Art."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = datetime.datetime.now(timezone.utc)
+            self.t0 = time.perf_counter()
+            self.duration = None
+            self.phases = {}
+            self.counters = {}
+            self.sql = {}
+
+    def add_phase(self, name, seconds):
+        with self.lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - t0)
+
+    def laps(self, prefix):
+        """Timer für aufeinanderfolgende Abschnitte ohne Einrückung: lap("x") misst seit dem letzten lap."""
+        return Laps(self, prefix)
+
+    def count(self, **deltas):
+        with self.lock:
+            for k, v in deltas.items():
+                self.counters[k] = self.counters.get(k, 0) + v
+
+    def count_sql(self, statement, n=1):
+        """Zählt n Ausführungen eines Statements nach Art (INSERT, SELECT, BEGIN…)."""
+        head = statement.lstrip()[:16].split(None, 1)
+        kind = head[0].upper() if head else "OTHER"
+        with self.lock:
+            self.sql[kind] = self.sql.get(kind, 0) + n
+
+    def stop(self):
+        self.duration = time.perf_counter() - self.t0
+        return self.duration
+
+    def rows(self):
+        """(kind, name, value) aller Messwerte."""
+        with self.lock:
+            rows = [("phase", k, v) for k, v in self.phases.items()]
+            rows += [("counter", k, v) for k, v in self.counters.items()]
+            rows += [("sql", k, v) for k, v in self.sql.items()]
+        if self.duration is not None:
+            rows.append(("phase", "total", self.duration))
+        return sorted(rows)
+
+    def write_textfile(self, directory, job):
+        """Schreibt <PREFIX>_<job>.prom atomar (tmp + rename), damit der Collector nie halbe Dateien liest."""
+        names = {
+            "phase": (f"{PREFIX}_phase_seconds", "phase", "Dauer je Phase des letzten Laufs"),
+            "counter": (f"{PREFIX}_events", "counter", "Zähler des letzten Laufs"),
+            "sql": (f"{PREFIX}_sql_statements", "kind", "SQLite-Statements des letzten Laufs nach Art"),
+        }
+        grouped = {}
+        for kind, name, value in self.rows():
+            grouped.setdefault(kind, []).append((name, value))
+
+        lines = []
+        for kind, (metric, label, help_text) in names.items():
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for name, value in grouped.get(kind, []):
+                lines.append(f'{metric}{{job="{job}",{label}="{prom_label(name)}"}} {value}')
+        lines.append(f"# HELP {PREFIX}_last_run_timestamp_seconds Start des letzten Laufs (Unix-Zeit)")
+        lines.append(f"# TYPE {PREFIX}_last_run_timestamp_seconds gauge")
+        lines.append(f'{PREFIX}_last_run_timestamp_seconds{{job="{job}"}} {self.started.timestamp():.3f}')
+
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{PREFIX}_{job}.prom")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, path)
+        return path
+
+    def save(self, c, job):
+        """Hängt die Messwerte als Zeilen an run_metrics an."""
+        started = self.started.isoformat()
+        c.executemany(
+            "INSERT INTO run_metrics (run_started, job, kind, name, value) VALUES (?, ?, ?, ?, ?)",
+            [(started, job, kind, name, value) for kind, name, value in self.rows()],
+        )
+
+
+class CountingCursor(sqlite3.Cursor):
+    """Cursor, der jede Ausführung in connection.metrics zählt (executemany: je Parameter-Zeile).
+
+    Bewusst kein set_trace_callback: der bekommt jede executemany-Zeile als
+    ausformuliertes SQL inkl. Blobs und verdoppelt so die Schreibzeit.
+    """
+
+    def execute(self, sql, *args):
+        self.connection.metrics.count_sql(sql)
+        return super().execute(sql, *args)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not hasattr(seq_of_parameters, "__len__"):
+            seq_of_parameters = list(seq_of_parameters)
+        self.connection.metrics.count_sql(sql, len(seq_of_parameters))
+        return super().executemany(sql, seq_of_parameters)
+
+
+class CountingConnection(sqlite3.Connection):
+    metrics = None
+
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, *args):
+        return self.cursor().execute(sql, *args)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        self.metrics.count_sql("COMMIT")
+        return super().commit()
+
+
+def connect(path, metrics):
+    """sqlite3.connect, dessen Statements in metrics gezählt werden."""
+    conn = sqlite3.connect(path, factory=CountingConnection)
+    conn.metrics = metrics
+    return conn
+
+
+class Laps:
+    def __init__(self, metrics, prefix):
+        self.metrics = metrics
+        self.prefix = prefix
+        self.t = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.metrics.add_phase(f"{self.prefix}.{name}", now - self.t)
+        self.t = now
+
+    def restart(self):
+        """Neuer Startpunkt, ohne die Zeit seit dem letzten lap zu verbuchen."""
+        self.t = time.perf_counter()
+
+
+def prom_label(value):
+    return re.sub(r'["\\\n]', "_", str(value))
+
+
+@contextlib.contextmanager
+def profiled(mode, out_dir, top=25):
+    """Profiling-Hook für einen Lauf: mode "cpu" (cProfile) oder "memory" (tracemalloc), None = aus.
+
+    Schreibt das Rohprofil nach out_dir und gibt die teuersten Einträge aus.
+    """
+    if not mode:
+        yield
+        return
+
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = datetime.datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    if mode == "cpu":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            path = os.path.join(out_dir, f"profile-{stamp}.prof")
+            profiler.dump_stats(path)
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+            print(f"\n🔬 cProfile (Top {top} kumulativ), Rohdaten: {path}")
+            print(out.getvalue())
+    elif mode == "memory":
+        tracemalloc.start(25)
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            path = os.path.join(out_dir, f"memory-{stamp}.tracemalloc")
+            snapshot.dump(path)
+            print(f"\n🔬 tracemalloc: Peak {peak / 1024 / 1024:.1f} MB, Rohdaten: {path}")
+            for stat in snapshot.statistics("lineno")[:top]:
+                print(f"   {stat}")
+    else:
+        raise ValueError(f"Unbekannter Profiling-Modus: {mode}")
@@ -0,0 +1,89 @@
+"""Einmalige Migration: inline raw_json aus status_history/comments_history in den Blob Store verschieben.
+
+Aufruf:  python src/migrate_blobs.py [pfad/zur/ev.db]
+"""
+import json
+import os
+import sqlite3
+import sys
+
+import fetch
+
+BATCH_SIZE = 2000
+
+# Tabelle → Spalte, die auf json_blobs.hash zeigt
+HASH_COLUMNS = {
+    "status_history": "raw_hash",
+    "comments_history": "content_hash",
+}
+
+
+def migrate_table(conn, table):
+    """Verschiebt alle inline raw_json-Werte einer Tabelle in json_blobs. Rückgabe: Anzahl Zeilen."""
+    hash_column = HASH_COLUMNS[table]
+    c = conn.cursor()
+    last_id = 0
+    migrated = 0
+
+    while True:
+        c.execute(f"""
+            SELECT id, raw_json FROM {table}
+            WHERE id > ? AND raw_json IS NOT NULL
+            ORDER BY id
+            LIMIT ?
+        """, (last_id, BATCH_SIZE))
+        rows = c.fetchall()
+        if not rows:
+            break
+
+        blobs = {}
+        updates = []
+        for row_id, raw_json in rows:
+            try:
+                text = fetch.canonical_json(json.loads(raw_json))
+            except ValueError:
+                text = raw_json  # kaputtes JSON unverändert übernehmen
+            h = fetch.content_hash(text)
+            blobs[h] = text
+            updates.append((h, row_id))
+
+        fetch.store_blobs(c, blobs)
+        c.executemany(f"UPDATE {table} SET {hash_column} = ?, raw_json = NULL WHERE id = ?", updates)
+        conn.commit()
+
+        migrated += len(rows)
+        last_id = rows[-1][0]
+
+    return migrated
+
+
+def migrate(db_path):
+    fetch.DB_PATH = db_path
+    fetch.init_db()
+
+    size_before = os.path.getsize(db_path)
+    conn = sqlite3.connect(db_path)
+
+    for table in HASH_COLUMNS:
+        n = migrate_table(conn, table)
+        print(f"   ➤ {table}: {n} Zeilen migriert")
+
+    c = conn.cursor()
+    c.execute("SELECT COUNT(*) FROM json_blobs")
+    n_blobs = c.fetchone()[0]
+
+    conn.execute("VACUUM")
+    conn.close()
+
+    size_after = os.path.getsize(db_path)
+    saved = 1 - size_after / size_before if size_before else 0
+    print(f"   ➤ {n_blobs} eindeutige Blobs")
+    print(f"   ➤ Größe: {size_before / 1e6:.1f} MB → {size_after / 1e6:.1f} MB ({saved:.0%} kleiner)")
+    return size_before, size_after
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else fetch.DB_PATH
+    print(f"🗜️ Migriere raw_json in Blob Store: {path}\n")
+    migrate(path)
+    print("\n✅ Migration abgeschlossen.")
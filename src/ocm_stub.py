@@ -0,0 +1,163 @@
+"""Lokaler OCM-Stub: beantwortet /v3/poi aus einem synthetischen Bestand statt der Live-API.
+
+Unterstützt die Parameter, die fetch.py schickt: boundingbox, latitude/
+longitude/distance (km), mincomments, maxresults und modifiedsince
+(gegen DateLastStatusUpdate), dazu ETag/If-None-Match → 304. latency
+simuliert die Antwortzeit der Live-API (Sekunden je Request).
+
+Aufruf:  python src/ocm_stub.py [anzahl_stationen] [port]
+         → danach z. B. OCM_BASE_URL=http://127.0.0.1:8765/v3/poi/ python src/fetch.py
+"""
+import bisect
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import spatial
+
+NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+class StubOcmServer:
+    """ThreadingHTTPServer im Hintergrund; set_pois() tauscht den Bestand atomar aus."""
+
+    def __init__(self, pois=(), host="127.0.0.1", port=0, latency=0.0):
+        self.hits = 0
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.set_pois(pois)
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v3/poi/"
+
+    def set_pois(self, pois):
+        """Neuer Bestand; jeder POI wird einmal vorab serialisiert, sortiert nach Breitengrad."""
+        rows = []
+        for d in pois:
+            info = d.get("AddressInfo") or {}
+            if info.get("Latitude") is None or info.get("Longitude") is None:
+                continue
+            rows.append((
+                info["Latitude"],
+                info["Longitude"],
+                len(d.get("UserComments") or []),
+                d.get("DateLastStatusUpdate") or "",
+                json.dumps(d, separators=(",", ":")).encode("utf-8"),
+            ))
+        rows.sort(key=lambda r: r[0])
+        index = ([r[0] for r in rows], rows)
+        with self.lock:
+            self.index = index
+
+    def query(self, params):
+        """Passende vorab serialisierte POIs zu den Query-Parametern."""
+        lats, rows = self.index
+        first = lambda key, default=None: params.get(key, [default])[0]
+
+        if "boundingbox" in params:
+            south, west, north, east = map(float, NUMBER.findall(first("boundingbox")))
+            radius = None
+        elif "latitude" in params and "longitude" in params:
+            lat, lon = float(first("latitude")), float(first("longitude"))
+            radius = float(first("distance", 10))
+            if first("distanceunit", "KM").upper() in ("MILES", "MI"):
+                radius *= 1.609344
+            south, west, north, east = spatial.radius_bbox(lat, lon, radius)
+        else:
+            south, west, north, east = -90.0, -180.0, 90.0, 180.0
+            radius = None
+
+        min_comments = int(first("mincomments", 0))
+        max_results = int(first("maxresults", 100))
+        since = first("modifiedsince")
+
+        hits = []
+        for r in rows[bisect.bisect_left(lats, south):bisect.bisect_right(lats, north)]:
+            if not west <= r[1] <= east or r[2] < min_comments:
+                continue
+            if since is not None and r[3] < since:
+                continue
+            if radius is not None and spatial.haversine_km(lat, lon, r[0], r[1]) > radius:
+                continue
+            hits.append(r[4])
+            if len(hits) >= max_results:
+                break
+        return hits
+
+    def handle(self, request):
+        with self.lock:
+            self.hits += 1
+        if self.latency:
+            time.sleep(self.latency)
+        url = urlparse(request.path)
+        if not url.path.rstrip("/").endswith("/poi"):
+            request.send_response(404)
+            request.send_header("Content-Length", "0")
+            request.end_headers()
+            return
+
+        body = b"[" + b",".join(self.query(parse_qs(url.query))) + b"]"
+        etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        if request.headers.get("If-None-Match") == etag:
+            request.send_response(304)
+            request.send_header("ETag", etag)
+            request.send_header("Content-Length", "0")
+            request.end_headers()
+            return
+
+        request.send_response(200)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(body)))
+        request.send_header("ETag", etag)
+        request.end_headers()
+        request.wfile.write(body)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    from synthetic import SyntheticOcm
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8765
+    server = StubOcmServer(SyntheticOcm(n).payload(), port=port)
+    print(f"🧪 OCM-Stub mit {n} Stationen: {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
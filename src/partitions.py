@@ -0,0 +1,558 @@
+"""Partitionierte Historie: der laufende Monat in ev.db, abgeschlossene Monate in versiegelten Dateien.
+
+seal(conn, "2026-09", directory) verschiebt, was vor dem Monatsende liegt, in
+die Datei ev-2026-09.db:
+
+    status_history     timestamp vor der Grenze; je Station bleibt die letzte
+                       Zeile als Anker in ev.db (Rollups und Status-Diff brauchen sie)
+    comments_history   comment_date vor der Grenze minus COMMENT_HOT_MONTHS und
+                       schon aufgerollt; ihre Check-ins fasst health.seal_checkins
+                       je Station zusammen, der Health-Score bleibt unverändert
+    region_activity    run_timestamp vor der Grenze
+    json_blobs         alle Blobs, auf die verschobene Zeilen zeigen
+    comments_fts,      eigene Volltext-Indizes über die verschobenen Zeilen
+    status_fts         (fulltext.install_partition)
+
+Versiegelt wird nur, was retention.py schon aufgerollt hat. Die Datei entsteht
+erst vollständig als .tmp, wird kompaktiert (VACUUM), schreibgeschützt und
+umbenannt; danach löscht eine zweite Transaktion genau die dort enthaltenen
+Zeilen aus ev.db und trägt die Datei in partition_catalog ein (Zeilen und
+Zeitspanne je Tabelle). Bricht etwas ab, wiederholt der nächste Lauf beides.
+Versiegelte Kommentare merkt sich sealed_comments, damit write_stations sie
+nicht erneut als neu einfügt.
+
+fanout() hängt die Partitionen, deren Zeitspanne das Abfragefenster berührt,
+schreibgeschützt per ATTACH an und legt je Tabelle eine TEMP VIEW
+{tabelle}_all (UNION ALL aus ev.db und den Partitionen) an. Passen mehr
+Partitionen als SQLite anhängen kann, werden sie gruppenweise in temporäre
+Tabellen kopiert (gefiltert auf das Fenster), die {tabelle}_all mit ev.db
+verbindet. Die Auswertungen in analytics.py und fulltext.search lesen
+innerhalb von fanout() bzw. mit partition_dir die versiegelten Monate mit.
+
+Wo ev.db nur aus Basis + Changesets lebt (GitHub Actions), darf keine Zeile
+aus ev.db verschwinden, bevor ihre Monatsdatei sicher abgelegt ist: mit
+confirm=False (fetch: OCM_PARTITION_ACK=0) endet seal() nach Schritt 1, die
+Datei gilt als ausstehend (pending). Erst confirm_file() — nach dem Upload, per
+"python partitions.py ack DATEI" — löscht die Zeilen und katalogisiert sie;
+diese Löschungen reisen dann mit dem nächsten Changeset. Bis dahin wird
+höchstens ein Monat ausstehend versiegelt, ein erneuter Lauf schreibt ihn
+neu. Die Monatsdateien ändern sich nach confirm_file() nie mehr; der Workflow legt
+sie im Release "partitions" ab und lädt sie vor dem Lauf nach data/partitions.
+
+    python partitions.py seal [--month 2026-09]
+    python partitions.py pending
+    python partitions.py ack data/partitions/ev-2026-09.db [...]
+    python partitions.py list
+    python partitions.py query "SELECT COUNT(*) FROM status_history_all" [--since 2026-01-01] [--until ...]
+"""
+import argparse
+import contextlib
+import datetime
+import os
+import re
+import sqlite3
+import urllib.parse
+from datetime import timezone
+
+import fulltext
+import health
+import retention
+
+# Tabelle → Zeitspalte für Versiegeln und Partitionsauswahl
+PARTITIONED = {
+    "status_history": "timestamp",
+    "comments_history": "comment_date",
+    "region_activity": "run_timestamp",
+}
+COMMENT_HOT_MONTHS = 12  # Kommentare so lange in ev.db (Status-Diff, Volltext ohne Partitionen)
+SEAL_ALIAS = "seal"
+MAX_ATTACHED = 10  # SQLite-Standard, falls getlimit() fehlt
+FILE_PATTERN = re.compile(r"ev-(\d{4}-\d{2})\.db")
+
+
+def install(c):
+    """partition_catalog und sealed_comments anlegen (idempotent, aus init_db)."""
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS partition_catalog (
+            key TEXT PRIMARY KEY,
+            name TEXT,
+            month TEXT,
+            tbl TEXT,
+            rows INTEGER,
+            min_ts TEXT,
+            max_ts TEXT,
+            sealed_at TEXT
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS sealed_comments (
+            id INTEGER PRIMARY KEY,
+            station_id INTEGER,
+            comment_ocm_id INTEGER,
+            UNIQUE(station_id, comment_ocm_id)
+        )
+    """)
+
+
+def file_name(month):
+    return f"ev-{month}.db"
+
+
+def parse_name(name):
+    """Monat aus einem Dateinamen wie file_name; ValueError bei fremden Namen."""
+    match = FILE_PATTERN.fullmatch(os.path.basename(name))
+    if match is None:
+        raise ValueError(f"Keine Partitionsdatei: {name}")
+    return match.group(1)
+
+
+def next_month(month):
+    year, mon = map(int, month.split("-"))
+    return f"{year + mon // 12:04d}-{mon % 12 + 1:02d}"
+
+
+def shift_months(month, n):
+    year, mon = map(int, month.split("-"))
+    total = year * 12 + mon - 1 + n
+    return f"{total // 12:04d}-{total % 12 + 1:02d}"
+
+
+def ro_uri(path):
+    return "file:" + urllib.parse.quote(os.path.abspath(path)) + "?mode=ro"
+
+
+def is_sealed(c, name):
+    c.execute("SELECT 1 FROM partition_catalog WHERE name = ? LIMIT 1", (name,))
+    return c.fetchone() is not None
+
+
+def create_schema(c, schema):
+    """Tabellen (samt Indizes) der Partition im angehängten schema wie in main anlegen."""
+    tables = list(PARTITIONED) + ["json_blobs"]
+    marks = ",".join("?" * len(tables))
+    c.execute(f"""
+        SELECT type, name, sql FROM main.sqlite_master
+        WHERE tbl_name IN ({marks}) AND type IN ('table', 'index') AND sql IS NOT NULL
+        ORDER BY type DESC
+    """, tables)
+    for _, name, sql in c.fetchall():
+        head, _, rest = sql.partition(name)  # "CREATE [UNIQUE] INDEX|TABLE " name …
+        c.execute(f"{head}{schema}.{name}{rest}")
+
+
+def copy_rows(c, boundary, comments_before):
+    """Zu versiegelnde Zeilen nach SEAL_ALIAS kopieren (in der offenen Transaktion). Rückgabe: {tabelle: Zeilen}."""
+    copied = {}
+    c.execute(f"""
+        INSERT INTO {SEAL_ALIAS}.status_history
+        SELECT * FROM main.status_history
+        WHERE timestamp < ?
+          AND id NOT IN (SELECT MAX(id) FROM main.status_history WHERE timestamp < ? GROUP BY station_id)
+    """, (boundary, boundary))
+    copied["status_history"] = c.rowcount
+
+    comments_rolled = int(retention.get_state(c, "comments_rolled_id") or 0)
+    c.execute(f"""
+        INSERT INTO {SEAL_ALIAS}.comments_history
+        SELECT * FROM main.comments_history
+        WHERE comment_date < ? AND id <= ?
+    """, (comments_before, comments_rolled))
+    copied["comments_history"] = c.rowcount
+
+    c.execute(f"""
+        INSERT INTO {SEAL_ALIAS}.region_activity
+        SELECT * FROM main.region_activity WHERE run_timestamp < ?
+    """, (boundary,))
+    copied["region_activity"] = c.rowcount
+
+    c.execute(f"""
+        INSERT OR IGNORE INTO {SEAL_ALIAS}.json_blobs
+        SELECT * FROM main.json_blobs WHERE hash IN (
+            SELECT raw_hash FROM {SEAL_ALIAS}.status_history WHERE raw_hash IS NOT NULL
+            UNION SELECT content_hash FROM {SEAL_ALIAS}.comments_history WHERE content_hash IS NOT NULL
+        )
+    """)
+    copied["json_blobs"] = c.rowcount
+    return copied
+
+
+def comment_boundary(month):
+    """Kommentare vor diesem Tag wandern mit der Partition von month (COMMENT_HOT_MONTHS bleiben heiß)."""
+    return shift_months(next_month(month), -COMMENT_HOT_MONTHS) + "-01"
+
+
+def drop_sealed(c, alias, name, month, now):
+    """Die in der Partition enthaltenen Zeilen aus main löschen und katalogisieren (offene Transaktion).
+
+    Die Check-ins der verschobenen Kommentare behält der Health-Score über health.seal_checkins.
+    """
+    deleted = {}
+    c.execute(f"""
+        INSERT OR IGNORE INTO sealed_comments (id, station_id, comment_ocm_id)
+        SELECT id, station_id, comment_ocm_id FROM {alias}.comments_history
+    """)
+    as_of = datetime.datetime.fromisoformat(comment_boundary(month)).replace(tzinfo=timezone.utc)
+    health.seal_checkins(c, alias, as_of)
+    for table in PARTITIONED:
+        c.execute(f"DELETE FROM main.{table} WHERE id IN (SELECT id FROM {alias}.{table})")
+        deleted[table] = c.rowcount
+    c.execute(f"""
+        DELETE FROM main.json_blobs WHERE hash IN (
+            SELECT hash FROM {alias}.json_blobs
+            EXCEPT SELECT raw_hash FROM main.status_history WHERE raw_hash IS NOT NULL
+            EXCEPT SELECT content_hash FROM main.comments_history WHERE content_hash IS NOT NULL
+        )
+    """)
+    deleted["json_blobs"] = c.rowcount
+
+    rows = []
+    for table, column in list(PARTITIONED.items()) + [("json_blobs", None)]:
+        span = f"MIN({column}), MAX({column})" if column else "NULL, NULL"
+        c.execute(f"SELECT COUNT(*), {span} FROM {alias}.{table}")
+        n, min_ts, max_ts = c.fetchone()
+        rows.append((f"{name}/{table}", name, month, table, n, min_ts, max_ts, now))
+    c.executemany("""
+        INSERT OR REPLACE INTO partition_catalog (key, name, month, tbl, rows, min_ts, max_ts, sealed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    return deleted
+
+
+def seal(conn, month, directory, now=None, confirm=True):
+    """Versiegelt alles vor dem Ende von month ("YYYY-MM") in directory. Rückgabe: {tabelle: Zeilen} oder None.
+
+    None: Monat schon versiegelt oder nichts zu verschieben. ValueError, wenn der
+    Monat noch läuft oder die Rollups (retention.run) ihn noch nicht abdecken.
+    confirm=False schreibt nur die Datei (Rückgabe: kopierte Zeilen); gelöscht
+    wird erst mit confirm_file(), nachdem sie abgelegt ist.
+    """
+    now = now or datetime.datetime.now(timezone.utc)
+    boundary = next_month(month) + "-01"
+    if boundary > now.date().isoformat():
+        raise ValueError(f"Monat {month} ist noch nicht abgeschlossen")
+    c = conn.cursor()
+    name = file_name(month)
+    if is_sealed(c, name):
+        return None
+    status_until = retention.get_state(c, "status_rolled_until") or ""
+    region_until = retention.get_state(c, "region_rolled_until") or ""
+    if status_until < boundary or region_until < boundary:
+        raise ValueError(f"Rollups reichen nur bis {min(status_until, region_until) or '—'} — erst retention.run")
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    tmp = path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    # 1. Partition vollständig schreiben, kompaktieren, schreibschützen
+    c.execute(f"ATTACH DATABASE ? AS {SEAL_ALIAS}", (tmp,))
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            create_schema(c, SEAL_ALIAS)
+            copied = copy_rows(c, boundary, comment_boundary(month))
+            fulltext.install_partition(c, SEAL_ALIAS)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        c.execute(f"DETACH DATABASE {SEAL_ALIAS}")
+    if not any(copied[table] for table in PARTITIONED):
+        os.remove(tmp)
+        return None
+    part = sqlite3.connect(tmp)
+    part.execute("VACUUM")
+    part.close()
+    os.chmod(tmp, 0o444)
+    os.replace(tmp, path)
+    if not confirm:
+        return copied
+
+    # 2. Dort enthaltene Zeilen aus ev.db entfernen und katalogisieren
+    return confirm_file(conn, path, now)
+
+
+def confirm_file(conn, path, now=None):
+    """Schritt 2 von seal(): die Zeilen der Datei path aus ev.db löschen und katalogisieren.
+
+    Rückgabe: {tabelle: gelöschte Zeilen}, None wenn die Datei schon katalogisiert ist.
+    """
+    now = now or datetime.datetime.now(timezone.utc)
+    month = parse_name(path)
+    name = os.path.basename(path)
+    c = conn.cursor()
+    if is_sealed(c, name):
+        return None
+    c.execute(f"ATTACH DATABASE ? AS {SEAL_ALIAS}", (ro_uri(path),))
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            deleted = drop_sealed(c, SEAL_ALIAS, name, month, now.isoformat())
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        c.execute(f"DETACH DATABASE {SEAL_ALIAS}")
+    return deleted
+
+
+def pending(c, directory):
+    """Geschriebene, aber noch nicht bestätigte Partitionsdateien in directory (älteste zuerst)."""
+    if not os.path.isdir(directory):
+        return []
+    return [
+        os.path.join(directory, name) for name in sorted(os.listdir(directory))
+        if FILE_PATTERN.fullmatch(name) and not is_sealed(c, name)
+    ]
+
+
+def unsealed_months(c, now=None):
+    """Abgeschlossene Monate nach der jüngsten Partition (älteste zuerst).
+
+    Ältere Zeilen, die erst später ihren Anker-Status verlieren, nimmt die nächste Partition mit.
+    """
+    now = now or datetime.datetime.now(timezone.utc)
+    current = now.strftime("%Y-%m")
+    c.execute("SELECT MAX(month) FROM partition_catalog")
+    last = c.fetchone()[0]
+    if last is not None:
+        return list(iter_months(next_month(last), current))
+    c.execute("""
+        SELECT MIN(ts) FROM (
+            SELECT MIN(timestamp) AS ts FROM status_history
+            UNION ALL SELECT MIN(run_timestamp) FROM region_activity
+        )
+    """)
+    oldest = c.fetchone()[0]
+    return list(iter_months(oldest[:7] if oldest else current, current))
+
+
+def iter_months(first, stop):
+    month = first
+    while month < stop:
+        yield month
+        month = next_month(month)
+
+
+def seal_closed(conn, directory, now=None, confirm=True):
+    """Alle abgeschlossenen Monate versiegeln. Rückgabe: {Dateiname: {tabelle: Zeilen}}.
+
+    confirm=False: nur der älteste Monat, als ausstehende Datei (siehe seal) — ein
+    späterer Monat würde dieselben, noch nicht gelöschten Zeilen ein zweites Mal enthalten.
+    """
+    sealed = {}
+    for month in unsealed_months(conn.cursor(), now):
+        rows = seal(conn, month, directory, now, confirm)
+        if rows:
+            sealed[file_name(month)] = rows
+            if not confirm:
+                break
+    return sealed
+
+
+def raw_days_before_seal(c, now=None):
+    """Mindest-Rohdatenfenster für retention.run: nichts, was noch versiegelt wird, darf vorher verschwinden."""
+    now = now or datetime.datetime.now(timezone.utc)
+    months = unsealed_months(c, now)
+    first = (months[0] if months else now.strftime("%Y-%m")) + "-01"
+    return (now.date() - datetime.date.fromisoformat(first)).days + 1
+
+
+def select_partitions(c, tables, since=None, until=None):
+    """[(name, {tabellen})] der Partitionen, deren Zeitspanne [since, until) berührt."""
+    parts = {}
+    marks = ",".join("?" * len(tables))
+    c.execute(f"""
+        SELECT name, tbl FROM partition_catalog
+        WHERE tbl IN ({marks}) AND rows > 0
+          AND (min_ts IS NULL OR ? IS NULL OR min_ts < ?)
+          AND (max_ts IS NULL OR ? IS NULL OR max_ts >= ?)
+        ORDER BY name
+    """, list(tables) + [until, until, since, since])
+    for name, table in c.fetchall():
+        parts.setdefault(name, set()).add(table)
+    return sorted(parts.items())
+
+
+def columns(c, schema, table):
+    c.execute(f"PRAGMA {schema}.table_info({table})")
+    return [row[1] for row in c.fetchall()]
+
+
+def select_list(main_columns, present):
+    return ", ".join(col if col in present else f"NULL AS {col}" for col in main_columns)
+
+
+def window_filter(table, since, until):
+    column = PARTITIONED.get(table)
+    where, params = [], []
+    if column and since is not None:
+        where.append(f"{column} >= ?")
+        params.append(since)
+    if column and until is not None:
+        where.append(f"{column} < ?")
+        params.append(until)
+    return (" WHERE " + " AND ".join(where) if where else ""), params
+
+
+def attach_slots(conn):
+    """Freie ATTACH-Plätze der Verbindung."""
+    c = conn.cursor()
+    c.execute("PRAGMA database_list")
+    in_use = len(c.fetchall()) - 2  # main und temp zählen nicht
+    try:
+        limit = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    except AttributeError:
+        limit = MAX_ATTACHED
+    return limit - in_use
+
+
+@contextlib.contextmanager
+def attached(conn, directory, parts):
+    """Partitionen (aus select_partitions) schreibgeschützt anhängen. Liefert [(alias, name, {tabellen})].
+
+    Fehlt eine katalogisierte Datei in directory (noch nicht heruntergeladen), wird sie mit
+    Warnung übergangen statt die Abfrage abzubrechen. Nur außerhalb einer Transaktion (ATTACH).
+    """
+    c = conn.cursor()
+    aliases = []
+    try:
+        for name, tables in parts:
+            path = os.path.join(directory, name)
+            if not os.path.exists(path):
+                print(f"⚠️ Partition {name} fehlt in {directory} — Abfrage ohne diesen Monat")
+                continue
+            alias = f"part_{len(aliases)}"
+            c.execute(f"ATTACH DATABASE ? AS {alias}", (ro_uri(path),))
+            aliases.append((alias, name, tables))
+        yield aliases
+    finally:
+        for alias, _, _ in reversed(aliases):
+            c.execute(f"DETACH DATABASE {alias}")
+
+
+def batches(conn, parts):
+    """parts in Gruppen, die gleichzeitig angehängt werden können."""
+    free = attach_slots(conn)
+    if parts and free < 1:
+        raise ValueError("Keine ATTACH-Plätze frei")
+    return [parts[start:start + free] for start in range(0, len(parts), free)]
+
+
+@contextlib.contextmanager
+def fanout(conn, directory, tables=tuple(PARTITIONED), since=None, until=None):
+    """Stellt {tabelle}_all für tables bereit: ev.db plus alle Partitionen im Fenster [since, until).
+
+    Muss außerhalb einer Transaktion laufen (ATTACH) und öffnet selbst keine.
+    Die Abfrage selbst filtert weiterhin auf ihr Fenster; die Auswahl hier spart
+    nur das Anhängen. Passen nicht alle Partitionen gleichzeitig, werden sie
+    gruppenweise per CREATE TEMP TABLE … AS kopiert (gefiltert auf das Fenster)
+    und {tabelle}_all verbindet ev.db mit diesen Kopien.
+    """
+    if conn.in_transaction:
+        raise ValueError("fanout braucht eine Verbindung ohne offene Transaktion (ATTACH/DETACH)")
+    c = conn.cursor()
+    groups = batches(conn, select_partitions(c, tables, since, until))
+    copies = []
+
+    def create_views(sources):
+        """sources: [{tabelle: (schema, name)}] je Partition."""
+        for table in tables:
+            main_columns = columns(c, "main", table)
+            selects = [f"SELECT {', '.join(main_columns)} FROM main.{table}"]
+            for source in sources:
+                if table in source:
+                    schema, name = source[table]
+                    selects.append(f"SELECT {select_list(main_columns, columns(c, schema, name))} "
+                                   f"FROM {schema}.{name}")
+            c.execute(f"CREATE TEMP VIEW {table}_all AS " + " UNION ALL ".join(selects))
+
+    try:
+        if len(groups) <= 1:
+            with attached(conn, directory, groups[0] if groups else []) as aliases:
+                create_views([{t: (alias, t) for t in present if t in tables} for alias, _, present in aliases])
+                yield conn
+            return
+
+        # Mehr Partitionen als ATTACH-Plätze: je Gruppe anhängen, kopieren (DDL, keine Transaktion), abhängen
+        sources = []
+        for group in groups:
+            with attached(conn, directory, group) as aliases:
+                for alias, _, present in aliases:
+                    source = {}
+                    for table in tables:
+                        if table in present:
+                            copy = f"part_{len(copies)}_{table}"
+                            where, params = window_filter(table, since, until)
+                            c.execute(f"CREATE TEMP TABLE {copy} AS SELECT * FROM {alias}.{table}{where}", params)
+                            copies.append(copy)
+                            source[table] = ("temp", copy)
+                    sources.append(source)
+        create_views(sources)
+        yield conn
+    finally:
+        for table in tables:
+            c.execute(f"DROP VIEW IF EXISTS temp.{table}_all")
+        for copy in copies:
+            c.execute(f"DROP TABLE IF EXISTS temp.{copy}")
+
+
+def query(conn, directory, sql, params=(), since=None, until=None, tables=tuple(PARTITIONED)):
+    """sql über ev.db und die passenden Partitionen ausführen ({tabelle}_all). Rückgabe: alle Zeilen."""
+    with fanout(conn, directory, tables, since, until):
+        return conn.execute(sql, params).fetchall()
+
+
+if __name__ == "__main__":
+    import fetch  # DB-Pfad, Schema und PARTITION_DIR
+
+    parser = argparse.ArgumentParser(description="Monats-Partitionen der Historie")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_seal = sub.add_parser("seal", help="abgeschlossene Monate versiegeln (nach retention.run)")
+    p_seal.add_argument("--month", help="nur diesen Monat (YYYY-MM)")
+    sub.add_parser("pending", help="geschriebene, noch nicht bestätigte Partitionsdateien ausgeben")
+    p_ack = sub.add_parser("ack", help="abgelegte Partitionsdateien bestätigen: Zeilen aus ev.db löschen")
+    p_ack.add_argument("files", nargs="+")
+    sub.add_parser("list", help="versiegelte Partitionen anzeigen")
+    p_query = sub.add_parser("query", help="SQL über ev.db und Partitionen ({tabelle}_all)")
+    p_query.add_argument("sql")
+    p_query.add_argument("--since")
+    p_query.add_argument("--until")
+    args = parser.parse_args()
+
+    fetch.init_db()
+    conn = fetch.connect()
+    if args.command == "seal":
+        confirm = fetch.PARTITION_ACK
+        if args.month:
+            result = {file_name(args.month): seal(conn, args.month, fetch.PARTITION_DIR, confirm=confirm)}
+        else:
+            result = seal_closed(conn, fetch.PARTITION_DIR, confirm=confirm)
+        for name, rows in result.items():
+            print(f"🗄️ {name}: " + (", ".join(f"{k} {v}" for k, v in rows.items()) if rows else "nichts zu tun")
+                  + ("" if confirm or not rows else " (ausstehend, erst nach ack aus ev.db gelöscht)"))
+        retention.incremental_vacuum(conn)
+    elif args.command == "pending":
+        for path in pending(conn.cursor(), fetch.PARTITION_DIR):
+            print(path)
+    elif args.command == "ack":
+        for path in args.files:
+            deleted = confirm_file(conn, path)
+            print(f"🗄️ {os.path.basename(path)} bestätigt: "
+                  + (", ".join(f"{k} {v}" for k, v in deleted.items()) if deleted else "schon katalogisiert"))
+        fetch.release(conn)
+        conn = None
+        fetch.export_changes()  # Löschungen ins Changeset, bevor die DB (z. B. in CI) verworfen wird
+    elif args.command == "list":
+        for name, month, table, rows, min_ts, max_ts in conn.execute("""
+            SELECT name, month, tbl, rows, min_ts, max_ts FROM partition_catalog ORDER BY name, tbl
+        """):
+            print(f"   {name} [{table}] {rows} Zeilen {min_ts or ''} … {max_ts or ''}")
+    else:
+        for row in query(conn, fetch.PARTITION_DIR, args.sql, since=args.since, until=args.until):
+            print("  ", row)
+    if conn is not None:
+        fetch.release(conn)
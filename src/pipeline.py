@@ -0,0 +1,193 @@
+"""Gestaffelte Ingestion: fetch → normalize → persist mit begrenzten Queues.
+
+Je Quelle holt ein Fetcher-Thread (intern ggf. mit eigenem Pool) Rohseiten
+und legt sie in raw_q; ein Normalizer-Thread macht daraus Zeilen-Batches
+für rows_q; der Writer im aufrufenden Thread schreibt sie in Transaktionen
+(mehrere wartende Batches pro Commit). Volle Queues blockieren die
+vorgelagerte Stufe (Backpressure), der Speicher bleibt so begrenzt, und
+Netzwerk, CPU und Platte arbeiten gleichzeitig: die Wanduhrzeit nähert sich
+der langsamsten Stufe statt der Summe aller Stufen.
+
+Der Writer läuft im aufrufenden Thread, weil sqlite3-Verbindungen an ihren
+Thread gebunden sind. Schlägt eine Stufe fehl, brechen alle ab und der Fehler
+wird im Aufrufer erneut ausgelöst; bereits committete Batches bleiben erhalten.
+"""
+import queue
+import threading
+import time
+
+DONE = object()
+POLL_SECONDS = 0.1
+
+
+class Cancelled(Exception):
+    """Eine andere Stufe ist fehlgeschlagen — leise beenden."""
+
+
+class Source:
+    """Basisklasse einer Quelle. produce/normalize/write müssen überschrieben werden.
+
+    prepare(c)         einmalig im Writer-Thread vor dem Start (Zustand aus der DB laden)
+    produce(emit)      im Fetcher-Thread: Rohseiten holen und emit(page) aufrufen
+    normalize(page)    im Normalizer-Thread: Rohseite → Batch (None = nichts zu schreiben)
+    write(c, batch)    im Writer-Thread in offener Transaktion; Rückgabe: dict mit Zählern
+    finish(c)          im Writer-Thread nach dem letzten Batch, in eigener Transaktion
+    """
+
+    name = "source"
+
+    def prepare(self, c):
+        pass
+
+    def produce(self, emit):
+        raise NotImplementedError
+
+    def normalize(self, page):
+        raise NotImplementedError
+
+    def write(self, c, batch):
+        raise NotImplementedError
+
+    def finish(self, c):
+        pass
+
+
+def run_pipeline(conn, sources, metrics=None, queue_size=8, max_batches=16):
+    """Führt die Quellen als Pipeline aus. Rückgabe: {source.name: summierte Zähler aus write}."""
+    raw_q = queue.Queue(queue_size)
+    rows_q = queue.Queue(queue_size)
+    failed = threading.Event()
+    errors = []
+    busy = {"fetch_blocked": 0.0, "normalize": 0.0, "normalize_blocked": 0.0, "write": 0.0, "write_idle": 0.0}
+    busy_lock = threading.Lock()
+
+    def account(key, seconds):
+        with busy_lock:
+            busy[key] += seconds
+
+    def put(q, item, blocked_key):
+        t0 = time.perf_counter()
+        while True:
+            if failed.is_set():
+                raise Cancelled()
+            try:
+                q.put(item, timeout=POLL_SECONDS)
+                break
+            except queue.Full:
+                continue
+        account(blocked_key, time.perf_counter() - t0)
+
+    def fail(e):
+        errors.append(e)
+        failed.set()
+
+    def fetcher(source):
+        try:
+            source.produce(lambda page: put(raw_q, (source, page), "fetch_blocked"))
+        except Cancelled:
+            pass
+        except Exception as e:
+            fail(e)
+        finally:
+            try:
+                put(raw_q, (source, DONE), "fetch_blocked")
+            except Cancelled:
+                pass
+
+    def normalizer():
+        remaining = len(sources)
+        try:
+            while remaining:
+                try:
+                    source, page = raw_q.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    if failed.is_set():
+                        raise Cancelled()
+                    continue
+                if page is DONE:
+                    remaining -= 1
+                    continue
+                t0 = time.perf_counter()
+                batch = source.normalize(page)
+                account("normalize", time.perf_counter() - t0)
+                if batch is not None:
+                    put(rows_q, (source, batch), "normalize_blocked")
+            put(rows_q, (None, DONE), "normalize_blocked")
+        except Cancelled:
+            pass
+        except Exception as e:
+            fail(e)
+
+    c = conn.cursor()
+    for source in sources:
+        source.prepare(c)
+
+    t_start = time.perf_counter()
+    threads = [threading.Thread(target=fetcher, args=(s,), name=f"fetch-{s.name}", daemon=True) for s in sources]
+    threads.append(threading.Thread(target=normalizer, name="normalize", daemon=True))
+    for t in threads:
+        t.start()
+
+    totals = {s.name: {} for s in sources}
+    try:
+        done = False
+        while not done:
+            t0 = time.perf_counter()
+            item = None
+            while item is None and not failed.is_set():
+                try:
+                    item = rows_q.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    pass
+            account("write_idle", time.perf_counter() - t0)
+            if item is None:
+                break  # andere Stufe fehlgeschlagen
+
+            # Was schon wartet, kommt mit in dieselbe Transaktion
+            items = [item]
+            while len(items) < max_batches:
+                try:
+                    items.append(rows_q.get_nowait())
+                except queue.Empty:
+                    break
+            if items[-1][1] is DONE:
+                items.pop()
+                done = True
+            if not items:
+                continue
+
+            t0 = time.perf_counter()
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                for source, batch in items:
+                    for k, v in source.write(c, batch).items():
+                        totals[source.name][k] = totals[source.name].get(k, 0) + v
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            account("write", time.perf_counter() - t0)
+
+        if not failed.is_set():
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                for source in sources:
+                    source.finish(c)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    except Exception as e:
+        fail(e)
+    finally:
+        for t in threads:
+            t.join()
+
+    wall = time.perf_counter() - t_start
+    if metrics is not None:
+        metrics.add_phase("pipeline.wall", wall)
+        for key, seconds in busy.items():
+            metrics.add_phase(f"pipeline.{key}", seconds)
+    if errors:
+        raise errors[0]
+    return totals
@@ -0,0 +1,326 @@
+"""PlugShare-Ingestion: Region abfragen, Details parallel und gecacht holen, Kommentare speichern.
+
+Details werden mit begrenzter Parallelität über den gemeinsamen PS_CLIENT
+(Keep-Alive-Pool, Retries) und ein globales Requests/Sekunde-Budget geholt.
+Jede Antwort landet im Detail-Cache auf der Platte (eine Datei je Location-ID);
+innerhalb der TTL wird eine Location nicht erneut abgefragt, danach per
+If-None-Match, sodass unveränderte Locations nur ein 304 kosten.
+
+PlugShare-Standorte teilen sich das Schema mit OCM: station_id = -location_id,
+stations.source = 'plugshare'; Kommentare gehen nach comments_history, neue
+Kommentare zusätzlich als Event nach station_events (siehe events.py).
+
+Aufruf:  python src/plugshare.py [lat] [lon] [span_lat] [span_lng]
+"""
+import datetime
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timezone
+
+import analytics
+import events
+import fetch
+import health
+from http_client import HttpClient, validator_key
+from ratelimit import TokenBucket
+from records import StationRecord, StatusRecord
+
+try:
+    from dotenv import load_dotenv
+except ImportError:  # python-dotenv ist optional, Variablen können auch direkt gesetzt sein
+    load_dotenv = None
+
+if load_dotenv is not None:
+    load_dotenv()
+
+PS_BASE_URL = os.environ.get("PLUGSHARE_BASE_URL", "https://api.plugshare.com/v3")
+PS_MAX_RPS = float(os.environ.get("PLUGSHARE_MAX_RPS", "2"))
+PS_WORKERS = 4
+PS_CACHE_DIR = os.path.join(fetch.BASE_DIR, "..", "data", "plugshare_cache")
+PS_CACHE_TTL = datetime.timedelta(hours=float(os.environ.get("PLUGSHARE_CACHE_TTL_HOURS", "24")))
+REQUEST_TIMEOUT = 20  # Sekunden
+
+HEADERS = {
+    "accept": "application/json, text/plain, */*",
+    "authorization": f"Basic {os.environ.get('PLUGSHARE_AUTH_BASIC', '')}",
+    "cognito-authorization": os.environ.get("PLUGSHARE_TOKEN", ""),
+    "origin": "https://www.plugshare.com",
+    "referer": "https://www.plugshare.com/",
+    "user-agent": "Mozilla/5.0",
+}
+
+PS_CLIENT = HttpClient(headers=HEADERS, timeout=REQUEST_TIMEOUT, pool_size=PS_WORKERS)
+
+
+def station_key(location_id):
+    """station_id eines PlugShare-Standorts (negativ, damit er nie mit OCM-IDs kollidiert)."""
+    return -int(location_id)
+
+
+# ----------------------------------------
+# Detail-Cache (eine JSON-Datei je Location)
+# ----------------------------------------
+
+def cache_path(location_id, cache_dir=PS_CACHE_DIR):
+    return os.path.join(cache_dir, f"{int(location_id)}.json")
+
+
+def read_cache(location_id, cache_dir=PS_CACHE_DIR):
+    """Cache-Eintrag {"fetched", "etag", "last_modified", "data"} oder None."""
+    try:
+        with open(cache_path(location_id, cache_dir), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_cache(location_id, entry, cache_dir=PS_CACHE_DIR):
+    """Schreibt atomar (tmp + rename), parallele Worker sehen nie halbe Dateien."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(location_id, cache_dir)
+    tmp = f"{path}.{os.getpid()}.{id(entry)}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entry, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def is_fresh(entry, now, ttl=PS_CACHE_TTL):
+    fetched = datetime.datetime.fromisoformat(entry["fetched"])
+    return now - fetched < ttl
+
+
+# ----------------------------------------
+# API
+# ----------------------------------------
+
+def fetch_region(lat, lon, span_lat=0.1, span_lng=0.2, count=500):
+    """Locations eines Kartenausschnitts. Rückgabe: Liste von dicts oder None bei Fehler."""
+    params = {
+        "access": 1,
+        "count": count,
+        "latitude": lat,
+        "longitude": lon,
+        "spanLat": span_lat,
+        "spanLng": span_lng,
+        "minimal": 0,
+    }
+    try:
+        result = PS_CLIENT.get_json(f"{PS_BASE_URL}/locations/region", params=params)
+    except Exception as e:
+        print("❌ PlugShare Region fehlgeschlagen:", e)
+        fetch.METRICS.count(errors=1)
+        return None
+    data = result.data
+    if isinstance(data, dict):
+        data = data.get("locations", [])
+    print(f"✅ {len(data)} Stationen in der Region gefunden. ({result.elapsed * 1000:.0f} ms, Retries: {result.retries})")
+    return data
+
+
+def fetch_detail(location_id, limiter, cache_dir=PS_CACHE_DIR):
+    """Holt eine Location per Conditional Request. Rückgabe: (details, aus_cache)."""
+    url = f"{PS_BASE_URL}/locations/{int(location_id)}"
+    key = validator_key(url)
+    cached = read_cache(location_id, cache_dir)
+    with PS_CLIENT.lock:
+        if cached is not None and (cached.get("etag") or cached.get("last_modified")):
+            PS_CLIENT.validators[key] = (cached.get("etag"), cached.get("last_modified"))
+        else:
+            PS_CLIENT.validators.pop(key, None)  # ohne Cache-Eintrag wäre ein 304 wertlos
+
+    limiter.acquire()
+    result = PS_CLIENT.get_json(url, conditional=True)
+    now = datetime.datetime.now(timezone.utc).isoformat()
+
+    if result.not_modified:
+        cached["fetched"] = now
+        write_cache(location_id, cached, cache_dir)
+        return cached["data"], True
+
+    etag, last_modified = PS_CLIENT.validators.get(key, (None, None))
+    write_cache(location_id, {"fetched": now, "etag": etag, "last_modified": last_modified, "data": result.data},
+                cache_dir)
+    return result.data, False
+
+
+def fetch_details(location_ids, workers=PS_WORKERS, max_rps=PS_MAX_RPS, ttl=PS_CACHE_TTL,
+                  cache_dir=PS_CACHE_DIR):
+    """Details vieler Locations: frische Cache-Einträge direkt, der Rest parallel (max. workers, max_rps).
+
+    Rückgabe: {location_id: details}; fehlgeschlagene Locations fehlen.
+    """
+    now = datetime.datetime.now(timezone.utc)
+    details = {}
+    pending = []
+    for loc_id in dict.fromkeys(location_ids):  # Reihenfolge behalten, Duplikate raus
+        entry = read_cache(loc_id, cache_dir)
+        if entry is not None and is_fresh(entry, now, ttl):
+            details[loc_id] = entry["data"]
+        else:
+            pending.append(loc_id)
+
+    hits = len(details)
+    not_modified = failed = 0
+    limiter = TokenBucket(max_rps, capacity=max(1, int(max_rps)))
+    t0 = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetch_detail, loc_id, limiter, cache_dir): loc_id for loc_id in pending}
+        for future in as_completed(futures):
+            loc_id = futures[future]
+            try:
+                data, from_cache = future.result()
+            except Exception as e:
+                print(f"⚠️ Details für Location {loc_id} fehlgeschlagen: {e}")
+                failed += 1
+                continue
+            details[loc_id] = data
+            not_modified += from_cache
+
+    fetch.METRICS.count(ps_cache_hits=hits, ps_not_modified=not_modified, ps_fetched=len(pending) - failed,
+                        errors=failed)
+    print(
+        f"📥 PlugShare Details: {len(details)} Locations | Cache: {hits} | 304: {not_modified} | "
+        f"geladen: {len(pending) - failed - not_modified} | Fehler: {failed} | "
+        f"{(time.perf_counter() - t0) * 1000:.0f} ms"
+    )
+    return details
+
+
+# ----------------------------------------
+# Speichern im gemeinsamen Schema
+# ----------------------------------------
+
+def checkin_status(status):
+    """PlugShare-Status auf das OCM-Vokabular abbilden, damit analytics beide Quellen gleich zählt."""
+    if not status:
+        return None
+    lowered = str(status).lower()
+    if "fail" in lowered or "not possible" in lowered:
+        return analytics.FAILED_CHECKIN
+    if "success" in lowered:
+        return analytics.SUCCESS_CHECKIN
+    return status
+
+
+def comment_date(comment):
+    """ISO-Zeitstempel (UTC) eines Kommentars; PlugShare liefert ts in Millisekunden."""
+    ts = comment.get("ts")
+    if isinstance(ts, (int, float)):
+        return datetime.datetime.fromtimestamp(ts / 1000, timezone.utc).isoformat()
+    return comment.get("created_at") or comment.get("created")
+
+
+def save_details(details):
+    """Schreibt Standorte, Kommentare und Events in stations / comments_history / station_events (eine Transaktion).
+
+    PlugShare kennt keinen OCM-Status; Events entstehen daher nur für Standorte mit neuen Kommentaren.
+    Rückgabe: dict mit Zählern (locations, comments, new_comments, events).
+    """
+    station_rows = []
+    records = []
+    comment_rows = []
+    blobs = {}
+
+    for loc_id, d in details.items():
+        if not d:
+            continue
+        station_id = station_key(loc_id)
+        comments = d.get("comments") or []
+        station_rows.append((
+            station_id,
+            d.get("name"),
+            fetch.safe_get(d, "network", "name"),
+            d.get("latitude"),
+            d.get("longitude"),
+            None,
+            len(d.get("stations") or []) or None,
+            fetch.content_hash(fetch.canonical_json([d.get("name"), d.get("latitude"), d.get("longitude"),
+                                                     [cm.get("id") for cm in comments]])),
+        ))
+        records.append(StationRecord(station_id, *station_rows[-1][1:7], StatusRecord(None, None, None, None, None),
+                                     [cm.get("id") for cm in comments]))
+
+        for comment in comments:
+            if comment.get("id") is None:
+                continue
+            comment_json = fetch.canonical_json(comment)
+            comment_hash = fetch.content_hash(comment_json)
+            blobs[comment_hash] = comment_json
+            comment_rows.append((
+                station_id,
+                comment.get("id"),
+                "PlugShare Check-In",
+                checkin_status(comment.get("status")),
+                comment.get("comment"),
+                comment_date(comment),
+                comment_hash,
+            ))
+
+    conn = fetch.connect()
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        c.executemany("""
+            INSERT INTO stations (station_id, title, operator, lat, lon, max_power_kw, num_points, content_hash, source)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'plugshare')
+            ON CONFLICT(station_id) DO UPDATE SET
+                title=excluded.title,
+                operator=excluded.operator,
+                lat=excluded.lat,
+                lon=excluded.lon,
+                num_points=excluded.num_points,
+                content_hash=excluded.content_hash,
+                source=excluded.source
+            WHERE stations.content_hash IS NOT excluded.content_hash
+        """, station_rows)
+        # Alles mit höherer id ist in diesem Aufruf neu (für die Events)
+        c.execute("SELECT COALESCE(MAX(id), 0) FROM comments_history")
+        comments_before = c.fetchone()[0]
+        c.executemany(fetch.INSERT_COMMENT_SQL, comment_rows)
+        new_comments = max(c.rowcount, 0)
+        fetch.store_blobs(c, blobs)
+        n_events = events.append(c, records, comments_before, datetime.datetime.now(timezone.utc).isoformat())
+        health.update(c, [row[0] for row in station_rows])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        fetch.METRICS.count(errors=1)
+        raise
+    finally:
+        fetch.release(conn)
+
+    fetch.METRICS.count(ps_locations=len(station_rows), comments_inserted=new_comments, events=n_events)
+    stats = {"locations": len(station_rows), "comments": len(comment_rows), "new_comments": new_comments,
+             "events": n_events}
+    print(f"💾 PlugShare gespeichert: {stats['locations']} Standorte | {stats['new_comments']} neue Kommentare")
+    return stats
+
+
+def ingest_region(lat, lon, span_lat=0.1, span_lng=0.2, limit=None):
+    """Region → Details (parallel, gecacht) → DB. Rückgabe: {location_id: details}."""
+    region = fetch_region(lat, lon, span_lat, span_lng)
+    if not region:
+        print("❌ Keine Daten.")
+        return {}
+
+    ids = [item.get("id") for item in region if item.get("id")]
+    if limit is not None:
+        ids = ids[:limit]
+    details = fetch_details(ids)
+    if details:
+        save_details(details)
+    return details
+
+
+if __name__ == "__main__":
+    args = [float(v) for v in sys.argv[1:5]]
+    lat, lon = (args[0], args[1]) if len(args) >= 2 else (52.5200, 13.4050)  # Berlin
+    spans = args[2:4] if len(args) >= 4 else (0.1, 0.2)
+
+    fetch.init_db()
+    ingest_region(lat, lon, *spans)
+    fetch.export_changes()
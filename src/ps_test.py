@@ -1,9 +1,14 @@
 import os
-import requests
 from dotenv import load_dotenv
 import json
 from datetime import datetime
 
+import fetch
+import plugshare
+
+# Gemeinsamer HTTP-Client des PlugShare-Moduls (Keep-Alive-Pool, Retries mit Backoff)
+PS_CLIENT = plugshare.PS_CLIENT
+
 # ----------------------------------------
 # Authentifizierungsdaten laden (aus .env)
 # ----------------------------------------
@@ -37,7 +42,7 @@ headers = {
     # "Cookie": "<hier deine Browser-Cookies>"
 }
 
-response = requests.get(url, headers=headers)
+response = PS_CLIENT.session.get(url, headers=headers, timeout=PS_CLIENT.timeout)
 
 print("Status Code:", response.status_code)
 if response.status_code == 200:
@@ -48,7 +53,7 @@ else:
 
 headers = {"Authorization": f"Bearer {token}"}
 #response = requests.get("https://api.plugshare.com/some/endpoint", headers=headers)
-response = requests.get("https://api.plugshare.com/v3/locations/region?access=1", headers=headers)
+response = PS_CLIENT.session.get("https://api.plugshare.com/v3/locations/region?access=1", headers=headers, timeout=PS_CLIENT.timeout)
 
 print(response.status_code)
 print(response.text)
@@ -87,10 +92,9 @@ def fetch_plugshare_region(lat, lon, span_lat=0.1, span_lng=0.2):
     url =f"https://api.plugshare.com/v3/locations/region?access=1&count=500&latitude=51.333521601002694&longitude=-116.99865691184972&minimal=0&outlets=%5B%7B%22connector%22:13,%22power%22:0%7D,%7B%22connector%22:2,%22power%22:0%7D%5D&spanLat=0.2037781312950102&spanLng=0.276031494140625"
     print(f"🌐 Fetching PlugShare Region:\n{url}\n")
     try:
-        r = requests.get(url, headers=headers, params=params, timeout=20)
-        r.raise_for_status()
-        data = r.json()
-        print(f"✅ {len(data)} Stationen in der Region gefunden.\n")
+        result = PS_CLIENT.get_json(url, headers=headers, params=params)
+        data = result.data
+        print(f"✅ {len(data)} Stationen in der Region gefunden. ({result.elapsed * 1000:.0f} ms, Retries: {result.retries})\n")
         return data
     except Exception as e:
         print("❌ Error:", e)
@@ -98,13 +102,8 @@ def fetch_plugshare_region(lat, lon, span_lat=0.1, span_lng=0.2):
 
 
 def fetch_plugshare_details(location_id):
-    url = f"{BASE_URL}/locations/{location_id}"
-    try:
-        r = requests.get(url, headers=headers, timeout=20)
-        r.raise_for_status()
-        return r.json()
-    except Exception:
-        return None
+    """Einzelabruf über plugshare.fetch_details (Cache + Conditional Request)."""
+    return plugshare.fetch_details([location_id]).get(location_id)
 
 
 def run_test():
@@ -123,8 +122,12 @@ def run_test():
 
     print("🔍 Hole Details für die ersten 50 Stationen...\n")
 
-    for loc_id in ids[:50]:
-        details = fetch_plugshare_details(loc_id)
+    # Parallel, rate-limitiert und gecacht statt 50 sequenzieller Requests
+    all_details = plugshare.fetch_details(ids[:50])
+    fetch.init_db()
+    plugshare.save_details(all_details)
+
+    for loc_id, details in all_details.items():
         if not details:
             continue
 
@@ -0,0 +1,30 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-sicherer Token-Bucket: höchstens `rate` Requests pro Sekunde, Bursts bis `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        if rate <= 0:
+            raise ValueError("rate muss > 0 sein")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Blockiert, bis ein Token verfügbar ist. Rückgabe: gewartete Zeit in Sekunden."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
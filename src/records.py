@@ -0,0 +1,178 @@
+"""Kompakte Datensätze für den Ingest: ein OCM-POI wird genau einmal zerlegt.
+
+station_record() liest jedes benötigte Feld eines POIs einmal; Status und
+Kommentar-Zusammenfassung landen im StatusRecord, die Kommentar-IDs im
+StationRecord — genug für Fingerprint und Status-Diff. CommentRecords baut
+erst load_comments(), und zwar nur für Stationen, die sich geändert haben:
+bei den meist >90 % unveränderten Stationen eines Laufs kostete das
+Zerlegen aller Kommentare mehr, als es spart. Die Klassen haben __slots__,
+pro Station und Kommentar entfällt so das Instanz-dict.
+"""
+
+EMPTY = {}
+
+
+def sub(d, key):
+    """Verschachteltes dict oder EMPTY (wie safe_get: alles andere zählt als fehlend)."""
+    value = d.get(key)
+    return value if isinstance(value, dict) else EMPTY
+
+
+def title(d, key):
+    """d[key]["Title"] oder None."""
+    value = d.get(key)
+    return value.get("Title") if isinstance(value, dict) else None
+
+
+class CommentRecord:
+    """Ein Nutzerkommentar; content_hash wird erst beim Normalisieren gesetzt."""
+
+    __slots__ = ("comment_id", "comment_type", "checkin_status", "text", "date", "raw", "content_hash")
+
+    def __init__(self, comment_id, comment_type, checkin_status, text, date, raw=None):
+        self.comment_id = comment_id
+        self.comment_type = comment_type
+        self.checkin_status = checkin_status
+        self.text = text
+        self.date = date
+        self.raw = raw
+        self.content_hash = None
+
+    def row(self, station_id):
+        """Parameter-Tupel für comments_history."""
+        return (
+            station_id,
+            self.comment_id,
+            self.comment_type,
+            self.checkin_status,
+            self.text,
+            self.date,
+            self.content_hash,
+        )
+
+
+class StatusRecord:
+    """Status einer Station plus Zusammenfassung (erster CommentType / CheckinStatus / Freitext).
+
+    raw_hash ist gesetzt, wenn der Status neu ist und eine status_history-Zeile braucht;
+    previous hält dann den vorherigen key() (None bei neuen Stationen), siehe events.py.
+    """
+
+    __slots__ = ("status", "is_operational", "comment_type", "checkin_status", "comment_text", "raw_hash",
+                 "previous")
+
+    def __init__(self, status, is_operational, comment_type, checkin_status, comment_text):
+        self.status = status
+        self.is_operational = is_operational
+        self.comment_type = comment_type
+        self.checkin_status = checkin_status
+        self.comment_text = comment_text
+        self.raw_hash = None
+        self.previous = None
+
+    def key(self):
+        """Vergleichswert gegen station_latest_status (siehe fetch.load_latest_status)."""
+        return (self.status, self.comment_type, self.checkin_status, self.comment_text)
+
+    def summary(self):
+        return (self.comment_type, self.checkin_status, self.comment_text)
+
+
+class StationRecord:
+    """Statische Stationsdaten, aktueller Status und Kommentare eines POIs.
+
+    raw (der POI) wird nur bis zum Normalisieren gehalten, danach None.
+    """
+
+    __slots__ = ("station_id", "title", "operator", "lat", "lon", "max_power_kw", "num_points",
+                 "status", "comment_ids", "comments", "raw", "content_hash")
+
+    def __init__(self, station_id, title, operator, lat, lon, max_power_kw, num_points, status, comment_ids,
+                 raw=None):
+        self.station_id = station_id
+        self.title = title
+        self.operator = operator
+        self.lat = lat
+        self.lon = lon
+        self.max_power_kw = max_power_kw
+        self.num_points = num_points
+        self.status = status
+        self.comment_ids = comment_ids
+        self.comments = ()
+        self.raw = raw
+        self.content_hash = None
+
+    def row(self):
+        """Parameter-Tupel für stations (ohne content_hash)."""
+        return (self.station_id, self.title, self.operator, self.lat, self.lon, self.max_power_kw,
+                self.num_points)
+
+    def fingerprint_source(self):
+        """Kanonische Projektion für den Fingerprint — identisch zur früheren dict-basierten Fassung."""
+        return [
+            self.row(),
+            self.status.status,
+            self.status.is_operational,
+            self.status.summary(),
+            self.comment_ids,
+        ]
+
+    def load_comments(self):
+        """Zerlegt die UserComments von raw in CommentRecords (self.comments)."""
+        self.comments = [
+            CommentRecord(
+                comment.get("ID"),
+                title(comment, "CommentType"),
+                title(comment, "CheckinStatusType"),
+                comment.get("Comment"),
+                comment.get("DateCreated") or comment.get("DateLastModified"),
+                comment,
+            )
+            for comment in self.raw.get("UserComments") or ()
+        ]
+        return self.comments
+
+
+def station_record(d):
+    """OCM-POI → StationRecord (None ohne ID), ohne CommentRecords (siehe load_comments)."""
+    station_id = d.get("ID")
+    if station_id is None:
+        return None
+
+    info = sub(d, "AddressInfo")
+    status_type = sub(d, "StatusType")
+
+    power = None
+    for fconn in d.get("Connections") or ():
+        pw = fconn.get("PowerKW") if isinstance(fconn, dict) else None
+        if pw and (power is None or pw > power):
+            power = pw
+
+    # Zusammenfassung: jeweils der erste gefüllte Wert (alte Status-Logik), meist schon nach einem Kommentar fertig
+    comments = d.get("UserComments") or ()
+    comment_type = checkin_status = comment_text = None
+    for comment in comments:
+        ct = comment.get("CommentType", {})
+        if not comment_type and ct:
+            comment_type = ct.get("Title")
+        cs = comment.get("CheckinStatusType", {})
+        if not checkin_status and cs:
+            checkin_status = cs.get("Title")
+        if not comment_text:
+            comment_text = comment.get("Comment")
+        if comment_type and checkin_status and comment_text:
+            break
+
+    return StationRecord(
+        station_id,
+        info.get("Title"),
+        sub(d, "OperatorInfo").get("Title"),
+        info.get("Latitude"),
+        info.get("Longitude"),
+        power,
+        d.get("NumberOfPoints", None),
+        StatusRecord(status_type.get("Title"), status_type.get("IsOperational"),
+                     comment_type, checkin_status, comment_text),
+        [comment.get("ID") for comment in comments],
+        d,
+    )
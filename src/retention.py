@@ -0,0 +1,339 @@
+"""Retention: Rollups für status_history/comments_history/region_activity, Pruning, inkrementelles VACUUM.
+
+Rollups (inkrementell, je Lauf nur der neue Zeitraum bis zur letzten vollen Stunde bzw. zum letzten vollen Tag):
+
+    station_activity_hourly / _daily   je Station und Stunde bzw. Tag:
+        down_seconds         Zeit mit is_operational = 0 (aus den Status-Übergängen)
+        transitions          Anzahl status_history-Zeilen
+        comments, failed_checkins, successful_checkins   nach comment_date
+    region_activity_daily              je Region und Tag: Scans, Summen, Min/Max total_comments
+
+Die Tabellen sind dünn besetzt: Zeilen gibt es nur für Buckets mit Ausfallzeit,
+Übergängen oder Kommentaren. Eine Station ohne Zeile war im Bucket nicht als
+ausgefallen bekannt.
+
+Pruning löscht Rohzeilen älter als raw_days, sofern schon aufgerollt. Je
+Station bleibt die letzte status_history-Zeile vor der Grenze als Anker
+stehen (Zustand am Beginn des nächsten Rollups). comments_history wird nicht
+gelöscht: OCM liefert alte Kommentare weiter aus, sie kämen beim nächsten
+Lauf als neu zurück. Stündliche Rollups werden nach hourly_days verworfen,
+tägliche bleiben. Danach gibt PRAGMA incremental_vacuum die freien Seiten
+zurück (auto_vacuum wird dafür einmalig per VACUUM auf INCREMENTAL gestellt).
+
+Die Funktionen arbeiten auf einer Verbindung des Aufrufers (fetch.run_retention).
+"""
+import datetime
+from datetime import timezone
+
+FAILED_CHECKIN = "Charging Not Possible"  # wie analytics.FAILED_CHECKIN
+SUCCESS_CHECKIN = "Successfully Charged"
+HOUR = datetime.timedelta(hours=1)
+DAY = datetime.timedelta(days=1)
+VACUUM_PAGES = 10_000  # Seiten je incremental_vacuum (begrenzt die Laufzeit eines Durchgangs)
+
+
+def install(c):
+    """Rollup-Tabellen und retention_state anlegen (idempotent, aus init_db)."""
+    for table in ("station_activity_hourly", "station_activity_daily"):
+        c.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                station_id INTEGER,
+                bucket TEXT,
+                down_seconds REAL DEFAULT 0,
+                transitions INTEGER DEFAULT 0,
+                comments INTEGER DEFAULT 0,
+                failed_checkins INTEGER DEFAULT 0,
+                successful_checkins INTEGER DEFAULT 0,
+                UNIQUE(station_id, bucket)
+            )
+        """)
+        c.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_bucket ON {table} (bucket, station_id)")
+
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS region_activity_daily (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            region_name TEXT,
+            day TEXT,
+            scans INTEGER,
+            sum_stations INTEGER,
+            sum_stations_with_comments INTEGER,
+            min_total_comments INTEGER,
+            max_total_comments INTEGER,
+            UNIQUE(region_name, day)
+        )
+    """)
+
+    # Wasserstände: status_rolled_until (ISO, volle Stunde), comments_rolled_id, region_rolled_until (Tag)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS retention_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """)
+
+
+def get_state(c, key):
+    c.execute("SELECT value FROM retention_state WHERE key = ?", (key,))
+    row = c.fetchone()
+    return row[0] if row else None
+
+
+def set_state(c, key, value):
+    c.execute("""
+        INSERT INTO retention_state (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    """, (key, str(value)))
+
+
+def floor_hour(ts):
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def hour_key(ts):
+    """Bucket-Schlüssel wie analytics.BUCKETS["hour"]: "2024-05-01T13"."""
+    return ts.strftime("%Y-%m-%dT%H")
+
+
+def add_down(down, station_id, start, end, step):
+    """Verteilt die Ausfallzeit [start, end) auf Buckets der Breite step (HOUR bzw. DAY)."""
+    while start < end:
+        if step == HOUR:
+            bucket_start = floor_hour(start)
+            key = (station_id, hour_key(start))
+        else:
+            bucket_start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+            key = (station_id, start.date().isoformat())
+        boundary = min(bucket_start + step, end)
+        down[key] = down.get(key, 0.0) + (boundary - start).total_seconds()
+        start = boundary
+
+
+def upsert_activity(c, table, rows):
+    """rows: (station_id, bucket, down_seconds, transitions) — addiert auf bestehende Buckets."""
+    c.executemany(f"""
+        INSERT INTO {table} (station_id, bucket, down_seconds, transitions)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(station_id, bucket) DO UPDATE SET
+            down_seconds = down_seconds + excluded.down_seconds,
+            transitions = transitions + excluded.transitions
+    """, rows)
+
+
+def rollup_status(c, until, hourly_since):
+    """Rollt status_history von status_rolled_until bis until (volle Stunde, datetime UTC) auf.
+
+    Stunden-Buckets vor hourly_since (datetime) werden gar nicht erst angelegt; so erzeugt eine
+    seit Jahren ausgefallene Station beim ersten Rollup keine Stundenzeilen, die sofort wieder
+    gelöscht würden. Rückgabe: Anzahl verarbeiteter status_history-Zeilen.
+    """
+    start = get_state(c, "status_rolled_until")
+    if start is None:
+        c.execute("SELECT MIN(timestamp) FROM status_history")
+        first = c.fetchone()[0]
+        if first is None:
+            return 0
+        start = floor_hour(datetime.datetime.fromisoformat(first)).isoformat()
+    t_start = datetime.datetime.fromisoformat(start)
+    if t_start >= until:
+        return 0
+    end = until.isoformat()
+
+    # Zustand je Station zu Beginn des Zeitraums: letzte Zeile davor (nach dem Pruning der Anker)
+    c.execute("""
+        SELECT station_id, is_operational FROM status_history
+        WHERE id IN (SELECT MAX(id) FROM status_history WHERE timestamp < ? GROUP BY station_id)
+    """, (start,))
+    state = {station_id: (t_start, op) for station_id, op in c.fetchall()}
+
+    down_hourly = {}
+    down_daily = {}
+    transitions = {}
+
+    def add_interval(station_id, t0, t1):
+        add_down(down_daily, station_id, t0, t1, DAY)
+        add_down(down_hourly, station_id, max(t0, hourly_since), t1, HOUR)
+
+    c.execute("""
+        SELECT station_id, timestamp, is_operational FROM status_history
+        WHERE timestamp >= ? AND timestamp < ?
+        ORDER BY station_id, id
+    """, (start, end))
+    n = 0
+    for station_id, ts, op in c.fetchall():
+        n += 1
+        t = datetime.datetime.fromisoformat(ts)
+        prev = state.get(station_id)
+        if prev is not None and prev[1] == 0:
+            add_interval(station_id, prev[0], t)
+        state[station_id] = (t, op)
+        key = (station_id, hour_key(t))
+        transitions[key] = transitions.get(key, 0) + 1
+    for station_id, (t, op) in state.items():
+        if op == 0:
+            add_interval(station_id, t, until)
+
+    min_hour = hour_key(hourly_since)
+    hourly = {key: [seconds, 0] for key, seconds in down_hourly.items()}
+    daily = {key: [seconds, 0] for key, seconds in down_daily.items()}
+    for (station_id, hour), count in transitions.items():
+        if hour >= min_hour:
+            hourly.setdefault((station_id, hour), [0.0, 0])[1] += count
+        daily.setdefault((station_id, hour[:10]), [0.0, 0])[1] += count
+
+    upsert_activity(c, "station_activity_hourly", [k + tuple(v) for k, v in hourly.items()])
+    upsert_activity(c, "station_activity_daily", [k + tuple(v) for k, v in daily.items()])
+    set_state(c, "status_rolled_until", end)
+    return n
+
+
+def rollup_comments(c, hourly_since):
+    """Addiert neue comments_history-Zeilen (id > comments_rolled_id) nach comment_date auf.
+
+    Stunden-Buckets vor hourly_since (ISO) werden gar nicht erst angelegt. Rückgabe: Anzahl Kommentare.
+    """
+    last_id = int(get_state(c, "comments_rolled_id") or 0)
+    c.execute("SELECT MAX(id) FROM comments_history")
+    max_id = c.fetchone()[0]
+    if max_id is None or max_id <= last_id:
+        return 0
+
+    for table, width, extra in (("station_activity_hourly", 13, "AND comment_date >= ?"),
+                                ("station_activity_daily", 10, "")):
+        params = [FAILED_CHECKIN, SUCCESS_CHECKIN, last_id, max_id] + ([hourly_since] if extra else [])
+        c.execute(f"""
+            INSERT INTO {table} (station_id, bucket, comments, failed_checkins, successful_checkins)
+            SELECT station_id, substr(comment_date, 1, {width}), COUNT(*),
+                   SUM(checkin_status = ?), SUM(checkin_status = ?)
+            FROM comments_history
+            WHERE id > ? AND id <= ? AND comment_date IS NOT NULL {extra}
+            GROUP BY 1, 2
+            ON CONFLICT(station_id, bucket) DO UPDATE SET
+                comments = comments + excluded.comments,
+                failed_checkins = failed_checkins + excluded.failed_checkins,
+                successful_checkins = successful_checkins + excluded.successful_checkins
+        """, params)
+
+    set_state(c, "comments_rolled_id", max_id)
+    return max_id - last_id
+
+
+def rollup_regions(c, until_day):
+    """Rollt region_activity vollständiger Tage bis until_day (exklusiv, "YYYY-MM-DD") auf."""
+    start = get_state(c, "region_rolled_until") or ""
+    if start >= until_day:
+        return 0
+    c.execute("""
+        INSERT INTO region_activity_daily (
+            region_name, day, scans, sum_stations, sum_stations_with_comments,
+            min_total_comments, max_total_comments
+        )
+        SELECT region_name, substr(run_timestamp, 1, 10), COUNT(*), SUM(stations_count),
+               SUM(stations_with_comments), MIN(total_comments), MAX(total_comments)
+        FROM region_activity
+        WHERE run_timestamp >= ? AND run_timestamp < ?
+        GROUP BY 1, 2
+        ON CONFLICT(region_name, day) DO UPDATE SET
+            scans = excluded.scans,
+            sum_stations = excluded.sum_stations,
+            sum_stations_with_comments = excluded.sum_stations_with_comments,
+            min_total_comments = excluded.min_total_comments,
+            max_total_comments = excluded.max_total_comments
+    """, (start, until_day))
+    n = c.rowcount
+    set_state(c, "region_rolled_until", until_day)
+    return n
+
+
+def prune(c, raw_cutoff, hourly_cutoff):
+    """Löscht aufgerollte Rohzeilen vor raw_cutoff und Stunden-Rollups vor hourly_cutoff (ISO).
+
+    Rückgabe: dict mit gelöschten Zeilen je Tabelle.
+    """
+    status_until = min(raw_cutoff, get_state(c, "status_rolled_until") or "")
+    region_until = min(raw_cutoff[:10], get_state(c, "region_rolled_until") or "")
+    deleted = {}
+
+    # Je Station bleibt die letzte Zeile vor der Grenze als Anker stehen
+    c.execute("DROP TABLE IF EXISTS temp.pruned_status")
+    c.execute("""
+        CREATE TEMP TABLE pruned_status AS
+        SELECT id, raw_hash FROM status_history
+        WHERE timestamp < ?
+          AND id NOT IN (SELECT MAX(id) FROM status_history WHERE timestamp < ? GROUP BY station_id)
+    """, (status_until, status_until))
+    c.execute("DELETE FROM status_history WHERE id IN (SELECT id FROM temp.pruned_status)")
+    deleted["status_history"] = c.rowcount
+
+    # Blobs, auf die keine verbleibende Zeile mehr zeigt
+    c.execute("""
+        DELETE FROM json_blobs WHERE hash IN (
+            SELECT raw_hash FROM temp.pruned_status WHERE raw_hash IS NOT NULL
+            EXCEPT SELECT raw_hash FROM status_history WHERE raw_hash IS NOT NULL
+            EXCEPT SELECT content_hash FROM comments_history WHERE content_hash IS NOT NULL
+        )
+    """)
+    deleted["json_blobs"] = c.rowcount
+    c.execute("DROP TABLE temp.pruned_status")
+
+    c.execute("DELETE FROM region_activity WHERE run_timestamp < ?", (region_until,))
+    deleted["region_activity"] = c.rowcount
+
+    # Outbox: Konsumenten, die länger als raw_days zurückliegen, müssen neu aufsetzen (siehe events.py)
+    c.execute("DELETE FROM station_events WHERE created < ?", (raw_cutoff,))
+    deleted["station_events"] = c.rowcount
+
+    c.execute("DELETE FROM station_activity_hourly WHERE bucket < ?", (hourly_cutoff[:13],))
+    deleted["station_activity_hourly"] = c.rowcount
+    return deleted
+
+
+def incremental_vacuum(conn, pages=VACUUM_PAGES):
+    """Gibt bis zu `pages` freie Seiten an das Dateisystem zurück. Rückgabe: freigegebene Seiten.
+
+    Steht auto_vacuum noch auf NONE, wird es einmalig per VACUUM umgestellt (dauert, sperrt die DB).
+    """
+    mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    if mode != 2:
+        print("🧹 Stelle auf auto_vacuum=INCREMENTAL um (einmaliges VACUUM)...")
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        before = conn.execute("PRAGMA page_count").fetchone()[0]
+        conn.execute("VACUUM")
+        return max(0, before - conn.execute("PRAGMA page_count").fetchone()[0])
+
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+    return free - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def run(conn, raw_days=30, hourly_days=90, now=None, vacuum=True):
+    """Rollups nachziehen, danach prunen und Platz zurückgeben. Rückgabe: dict mit Zählern."""
+    now = now or datetime.datetime.now(timezone.utc)
+    until_hour = floor_hour(now)
+    raw_cutoff = (now - datetime.timedelta(days=raw_days)).isoformat()
+    hourly_since = floor_hour(now - datetime.timedelta(days=hourly_days))
+    hourly_cutoff = hourly_since.isoformat()
+    c = conn.cursor()
+
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        stats = {
+            "status_rows": rollup_status(c, until_hour, hourly_since),
+            "comments": rollup_comments(c, hourly_cutoff[:13]),
+            "region_days": rollup_regions(c, now.date().isoformat()),
+        }
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        stats.update({f"pruned_{k}": v for k, v in prune(c, raw_cutoff, hourly_cutoff).items()})
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    stats["vacuumed_pages"] = incremental_vacuum(conn) if vacuum else 0
+    return stats
@@ -0,0 +1,263 @@
+"""Adaptive Abfrage-Priorität je Kachel: oft wechselnde Gebiete häufig, ruhige selten voll abfragen.
+
+Statt bei jedem Lauf (bzw. beim täglichen Full-Sync) alle Kacheln aus
+tile_layout abzufragen, hält tile_schedule je Blatt-Kachel
+
+    change_rate   gelernte Änderungen je Stunde (EWMA)
+    interval      aktueller Abstand zwischen zwei vollen Abfragen (Sekunden)
+    last_polled   Zeitpunkt der letzten vollen Abfrage
+    seen_seq      station_events.seq bei dieser Abfrage
+
+Eine Kachel ist fällig, wenn last_polled + interval erreicht ist. plan() wählt
+je Lauf höchstens budget fällige Kacheln: überfällige (älter als
+MAX_INTERVAL) zuerst, dann nach erwarteten verpassten Änderungen
+(change_rate × Alter). record() zählt nach der Abfrage die Änderungs-Events
+der Kachel seit seen_seq: mit Änderungen fällt interval auf BASE_INTERVAL
+(5-Minuten-Takt), ohne verdoppelt es sich bis MAX_INTERVAL. Neue Kacheln
+bekommen ihre Rate aus status_history und comments_history der letzten
+LEARN_DAYS Tage (Startwert für interval: die Zeit bis zur nächsten
+erwarteten Änderung, auf BASE_INTERVAL × 2^k gerundet).
+
+freshness() liefert die Kennzahlen dazu: Alter der Daten je Kachel
+(nach Stationen gewichtet), Kacheln hinter ihrem Plan und erwartete noch
+nicht gesehene Änderungen — gegenübergestellt den Requests des Laufs.
+"""
+import datetime
+import math
+from datetime import timezone
+
+import tiling
+
+BASE_INTERVAL = 300.0  # Sekunden, Takt des Daemons
+MAX_INTERVAL = 24 * 3600.0  # jede Kachel spätestens einmal am Tag (wie der Full-Sync)
+LEARN_DAYS = 30
+EWMA_ALPHA = 0.3
+
+
+def install(c):
+    """tile_schedule anlegen (idempotent, aus init_db)."""
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS tile_schedule (
+            quadkey TEXT PRIMARY KEY,
+            change_rate REAL,
+            interval REAL,
+            last_polled TEXT,
+            seen_seq INTEGER,
+            polls INTEGER DEFAULT 0,
+            changes INTEGER DEFAULT 0
+        )
+    """)
+
+
+def interval_for(rate, observed):
+    """Startabstand zu einer Rate (Änderungen/Stunde): BASE_INTERVAL × 2^k, höchstens MAX_INTERVAL.
+
+    Ruhiger als beobachtet (observed, Sekunden Historie) gilt keine Kachel —
+    eine frische DB fängt deshalb im 5-Minuten-Takt an und lernt von dort.
+    """
+    gap = min(3600.0 / rate if rate > 0 else math.inf, observed, MAX_INTERVAL)
+    k = max(0, math.floor(math.log2(max(gap, BASE_INTERVAL) / BASE_INTERVAL)))
+    return BASE_INTERVAL * 2 ** k
+
+
+def load_states(c):
+    """{quadkey: (change_rate, interval, last_polled, seen_seq, polls, changes)}."""
+    c.execute("SELECT quadkey, change_rate, interval, last_polled, seen_seq, polls, changes FROM tile_schedule")
+    return {row[0]: row[1:] for row in c.fetchall()}
+
+
+def max_seq(c):
+    c.execute("SELECT COALESCE(MAX(seq), 0) FROM station_events")
+    return c.fetchone()[0]
+
+
+def station_positions(c):
+    c.execute("SELECT station_id, lat, lon FROM stations WHERE lat IS NOT NULL AND lon IS NOT NULL")
+    return {sid: (lat, lon) for sid, lat, lon in c.fetchall()}
+
+
+def learn_rates(c, root, leaves, now, days=LEARN_DAYS):
+    """Änderungen je Stunde je Blatt-Kachel aus der Historie der letzten days Tage.
+
+    Gezählt werden Statuswechsel (status_history-Zeilen mit Vorgänger, die
+    Erstaufnahme einer Station ist keine Änderung) und Kommentare/Check-ins.
+    Rückgabe: ({quadkey: Rate}, beobachtete Sekunden) — bei jungen DBs weniger als days.
+    """
+    since = (now - datetime.timedelta(days=days)).isoformat()
+    c.execute("SELECT MIN(timestamp) FROM status_history")
+    first = c.fetchone()[0]
+    observed = max(BASE_INTERVAL, min(days * 86400.0, age_seconds(first, now) if first else 0.0))
+    c.execute("""
+        SELECT station_id, SUM(n) FROM (
+            SELECT h.station_id, COUNT(*) AS n
+            FROM status_history h
+            WHERE h.timestamp >= ?
+              AND EXISTS (SELECT 1 FROM status_history p WHERE p.station_id = h.station_id AND p.id < h.id)
+            GROUP BY h.station_id
+            UNION ALL
+            SELECT station_id, COUNT(*) FROM comments_history
+            WHERE comment_date >= ?
+            GROUP BY station_id
+        )
+        GROUP BY station_id
+    """, (since, since))
+    counts = dict(c.fetchall())
+    positions = station_positions(c)
+    rates = dict.fromkeys(leaves, 0.0)
+    for sid, n in counts.items():
+        pos = positions.get(sid)
+        leaf = tiling.locate(root, rates, *pos) if pos else None
+        if leaf is not None:
+            rates[leaf] += n / (observed / 3600.0)
+    return rates, observed
+
+
+def bootstrap(c, root, layout, now):
+    """Zustand für Kacheln ohne Eintrag: Rate aus der Historie, zuletzt abgefragt laut tile_layout.updated."""
+    c.execute("""
+        SELECT l.quadkey, l.updated FROM tile_layout l
+        WHERE NOT EXISTS (SELECT 1 FROM tile_schedule s WHERE s.quadkey = l.quadkey)
+    """)
+    missing = dict(c.fetchall())
+    if not missing:
+        return 0
+    rates, observed = learn_rates(c, root, layout, now)
+    seq = max_seq(c)
+    c.executemany("""
+        INSERT INTO tile_schedule (quadkey, change_rate, interval, last_polled, seen_seq)
+        VALUES (?, ?, ?, ?, ?)
+    """, [(q, rates[q], interval_for(rates[q], observed), updated, seq) for q, updated in missing.items()])
+    return len(missing)
+
+
+def age_seconds(last_polled, now):
+    if last_polled is None:
+        return math.inf
+    return (now - datetime.datetime.fromisoformat(last_polled)).total_seconds()
+
+
+def plan(c, root, layout, budget, now=None):
+    """Kacheln für diesen Lauf: höchstens budget fällige, wichtigste zuerst.
+
+    Rückgabe: ({quadkey: result_count} für tiling.cover, {"due": …, "skipped": …}).
+    Kacheln am Limit werden beim Abfragen geteilt und kosten dann mehr als einen Request.
+    """
+    now = now or datetime.datetime.now(timezone.utc)
+    bootstrap(c, root, layout, now)
+    states = load_states(c)
+    due = []
+    for quadkey in layout:
+        rate, interval, last_polled = states[quadkey][:3]
+        age = age_seconds(last_polled, now)
+        if age >= interval:
+            due.append((age >= MAX_INTERVAL, rate * min(age, MAX_INTERVAL) / 3600.0, age, quadkey))
+    due.sort(reverse=True)
+    chosen = {quadkey: layout[quadkey] for *_, quadkey in due[:budget]}
+    return chosen, {"due": len(due), "skipped": max(0, len(due) - budget)}
+
+
+def count_changes(c, root, leaves, after_seq):
+    """{quadkey: Anzahl Änderungs-Events mit seq > after_seq[quadkey]} für Stationen in leaves."""
+    changes = dict.fromkeys(leaves, 0)
+    if not leaves:
+        return changes
+    c.execute("""
+        SELECT e.seq, s.lat, s.lon FROM station_events e
+        JOIN stations s ON s.station_id = e.station_id
+        WHERE e.seq > ? AND s.lat IS NOT NULL AND s.lon IS NOT NULL
+    """, (min(after_seq.values()),))
+    for seq, lat, lon in c.fetchall():
+        leaf = tiling.locate(root, changes, lat, lon)
+        if leaf is not None and seq > after_seq[leaf]:
+            changes[leaf] += 1
+    return changes
+
+
+def inherit(states, quadkey):
+    """Zustand einer neuen Blatt-Kachel aus ersetzten Vorgängern (Teilung oder Zusammenfassung)."""
+    origins = [(q, s) for q, s in states.items() if quadkey.startswith(q) or q.startswith(quadkey)]
+    if not origins:
+        return None
+    rate = sum(s[0] / 4 ** max(0, len(quadkey) - len(q)) for q, s in origins)
+    polled = [s[2] for _, s in origins if s[2] is not None]
+    return (rate, min(s[1] for _, s in origins), min(polled) if polled else None,
+            min(s[3] for _, s in origins), max(s[4] for _, s in origins), 0)
+
+
+def record(c, root, replaced, leaves, polled_at, full=False):
+    """Nach einer vollen Abfrage: Rate und Abstand der abgefragten Kacheln fortschreiben.
+
+    replaced: die abgefragten (Start-)Kacheln, leaves: deren Blätter laut tiling.cover.
+    full=True (Full-Sync): leaves ist das ganze neue Layout, alle anderen Einträge entfallen.
+    Rückgabe: Summe der in den Kacheln gefundenen Änderungen.
+    """
+    states = load_states(c)
+    origins = states if full else {q: states[q] for q in replaced if q in states}
+    previous = {q: origins.get(q) or inherit(origins, q) for q in leaves}
+    seq = max_seq(c)
+    after_seq = {q: s[3] if s else seq for q, s in previous.items()}
+    changes = count_changes(c, root, leaves, after_seq)
+    fresh = [q for q, s in previous.items() if s is None]
+    rates, observed = learn_rates(c, root, leaves, polled_at) if fresh else ({}, 0.0)
+
+    rows = []
+    for q, state in previous.items():
+        n = changes[q]
+        if state is None:
+            rate = rates[q]
+            interval = interval_for(rate, observed)
+            polls = total = 0
+        else:
+            rate, interval, last_polled, _, polls, total = state
+            elapsed = max(age_seconds(last_polled, polled_at), BASE_INTERVAL)
+            if math.isfinite(elapsed):
+                rate = EWMA_ALPHA * n / (elapsed / 3600.0) + (1 - EWMA_ALPHA) * rate
+            interval = BASE_INTERVAL if n else min(interval * 2, MAX_INTERVAL)
+        rows.append((q, rate, interval, polled_at.isoformat(), seq, polls + 1, total + n))
+
+    if full:
+        c.execute("DELETE FROM tile_schedule")
+    else:
+        c.executemany("DELETE FROM tile_schedule WHERE quadkey = ?", [(q,) for q in replaced])
+    c.executemany("""
+        INSERT OR REPLACE INTO tile_schedule (quadkey, change_rate, interval, last_polled, seen_seq, polls, changes)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    return sum(changes.values())
+
+
+def freshness(c, now=None):
+    """Frische-Kennzahlen über alle Kacheln (nach Stationen je Kachel gewichtet).
+
+    staleness_avg/max_seconds   Alter der letzten vollen Abfrage
+    tiles_behind                Kacheln, deren Termin schon um mehr als BASE_INTERVAL überschritten ist
+    missed_changes              erwartete, noch nicht voll abgefragte Änderungen (change_rate × Alter)
+    """
+    now = now or datetime.datetime.now(timezone.utc)
+    c.execute("""
+        SELECT s.change_rate, s.interval, s.last_polled, COALESCE(l.result_count, 0)
+        FROM tile_schedule s
+        LEFT JOIN tile_layout l ON l.quadkey = s.quadkey
+    """)
+    weighted = stations = 0
+    oldest = 0.0
+    behind = 0
+    missed = 0.0
+    tiles = 0
+    for rate, interval, last_polled, n in c.fetchall():
+        age = age_seconds(last_polled, now)
+        if not math.isfinite(age):
+            continue
+        tiles += 1
+        weighted += age * n
+        stations += n
+        oldest = max(oldest, age)
+        behind += age > interval + BASE_INTERVAL
+        missed += rate * age / 3600.0
+    return {
+        "tiles": tiles,
+        "staleness_avg_seconds": weighted / stations if stations else 0.0,
+        "staleness_max_seconds": oldest,
+        "tiles_behind": behind,
+        "missed_changes": missed,
+    }
@@ -0,0 +1,70 @@
+"""Räumliche Abfragen über stations mit R*Tree-Vorfilter (stations_rtree, gepflegt von init_db).
+
+Alle Funktionen erwarten einen Cursor und liefern Tupel
+(station_id, title, operator, lat, lon) bzw. mit angehängter Distanz in km.
+"""
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Großkreisdistanz in km."""
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bbox(lat, lon, radius_km):
+    """Bounding Box (south, west, north, east), die den Kreis sicher enthält."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    south = max(-90.0, lat - dlat)
+    north = min(90.0, lat + dlat)
+    cos_lat = math.cos(math.radians(max(abs(south), abs(north))))
+    if cos_lat < 1e-6 or radius_km / EARTH_RADIUS_KM >= math.pi / 2:
+        return south, -180.0, north, 180.0  # Polnähe / riesiger Radius: volle Länge
+    dlon = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+    return south, max(-180.0, lon - dlon), north, min(180.0, lon + dlon)
+
+
+def stations_in_bbox(c, south, west, north, east):
+    """Alle nicht entfernten Stationen innerhalb der Box (Grenzen inklusive)."""
+    # R*Tree speichert float32 und rundet nach außen → exakter Nachfilter auf stations
+    c.execute("""
+        SELECT s.station_id, s.title, s.operator, s.lat, s.lon
+        FROM stations_rtree r
+        JOIN stations s ON s.station_id = r.station_id
+        WHERE r.max_lat >= ? AND r.min_lat <= ?
+          AND r.max_lon >= ? AND r.min_lon <= ?
+          AND s.lat BETWEEN ? AND ?
+          AND s.lon BETWEEN ? AND ?
+          AND s.removed_at IS NULL
+    """, (south, north, west, east, south, north, west, east))
+    return c.fetchall()
+
+
+def stations_within_radius(c, lat, lon, radius_km):
+    """Stationen im Umkreis, nach Distanz sortiert: (station_id, title, operator, lat, lon, distance_km)."""
+    hits = []
+    for row in stations_in_bbox(c, *radius_bbox(lat, lon, radius_km)):
+        dist = haversine_km(lat, lon, row[3], row[4])
+        if dist <= radius_km:
+            hits.append(row + (dist,))
+    hits.sort(key=lambda r: r[5])
+    return hits
+
+
+def nearest_stations(c, lat, lon, k=10, start_radius_km=1.0):
+    """Die k nächsten Stationen: Suchradius verdoppeln, bis k Treffer sicher innerhalb liegen."""
+    if k <= 0:
+        return []
+
+    radius = start_radius_km
+    while True:
+        hits = stations_within_radius(c, lat, lon, radius)
+        if len(hits) >= k or radius >= math.pi * EARTH_RADIUS_KM:
+            return hits[:k]
+        radius *= 2
@@ -0,0 +1,165 @@
+"""Reproduzierbare, OCM-ähnliche POI-Payloads für Benchmarks und den Stub-Server.
+
+SyntheticOcm erzeugt aus einem Seed einen festen Stationsbestand (um die
+UK-Regionen gehäuft, mit UserComments, Connections und StatusType) und
+schreibt ihn mit advance() fort: Status-Churn, neue Kommentare und ein
+vorrückendes DateLastStatusUpdate. payload() liefert einen Schnappschuss;
+geänderte Stationen werden dabei ersetzt statt verändert, ältere
+Schnappschüsse bleiben also gültig.
+"""
+import datetime
+import random
+from datetime import timezone
+
+from fetch import UK_REGIONS
+
+STATUS_TYPES = [
+    (50, "Operational", True),
+    (100, "Not Operational", False),
+    (75, "Partly Operational (Mixed)", True),
+    (0, "Unknown", None),
+]
+STATUS_TITLES = [title for _, title, _ in STATUS_TYPES]
+COMMENT_TYPES = ["General Comment", "Problem Report", "Charging Point Check-In"]
+CHECKIN_TYPES = ["Successfully Charged", "Charging Not Possible", "Charged (with problems)"]
+CONNECTION_TYPES = [(25, "Type 2 (Socket Only)", 22), (33, "CCS (Type 2)", 150), (2, "CHAdeMO", 50), (1, "Type 1 (J1772)", 7)]
+OPERATORS = ["Pod Point", "BP Pulse", "Shell Recharge", "Ionity", "Tesla", "Source London"]
+START_TIME = datetime.datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+STATUS_BY_TITLE = {title: (sid, is_op) for sid, title, is_op in STATUS_TYPES}
+
+
+def ocm_timestamp(ts):
+    return ts.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class SyntheticOcm:
+    """Deterministischer Stationsbestand, der sich Lauf für Lauf verändert.
+
+    with_comments = Anteil Stationen mit mindestens einem Kommentar;
+    Stationen ohne Kommentar filtert der Stub bei mincomments=1 heraus.
+    """
+
+    def __init__(self, n_stations, seed=42, with_comments=0.8, start=START_TIME):
+        self.rnd = random.Random(seed)
+        self.now = start
+        self.next_comment_id = 1
+        self.stations = [self.make_station(sid, with_comments) for sid in range(1, n_stations + 1)]
+
+    def make_comment(self, station_id, ts):
+        rnd = self.rnd
+        cid = self.next_comment_id
+        self.next_comment_id += 1
+        comment_type = rnd.choice(COMMENT_TYPES)
+        comment = {
+            "ID": cid,
+            "ChargePointID": station_id,
+            "CommentType": {"ID": COMMENT_TYPES.index(comment_type) + 10, "Title": comment_type},
+            "UserName": f"user{rnd.randint(1, 5000)}",
+            "Comment": f"Kommentar {cid} " + "x" * rnd.randint(10, 120),
+            "Rating": rnd.choice([None, 1, 2, 3, 4, 5]),
+            "DateCreated": ocm_timestamp(ts),
+        }
+        if comment_type == "Charging Point Check-In" or rnd.random() < 0.5:
+            checkin = rnd.choice(CHECKIN_TYPES)
+            comment["CheckinStatusType"] = {
+                "ID": CHECKIN_TYPES.index(checkin) + 10,
+                "Title": checkin,
+                "IsPositive": checkin != "Charging Not Possible",
+            }
+        return comment
+
+    def make_station(self, sid, with_comments):
+        rnd = self.rnd
+        _, lat0, lon0 = rnd.choice(UK_REGIONS)
+        created = self.now - datetime.timedelta(days=rnd.randint(30, 2000))
+        comments = []
+        if rnd.random() < with_comments:
+            for _ in range(rnd.randint(1, 6)):
+                ts = created + datetime.timedelta(days=rnd.randint(0, (self.now - created).days))
+                comments.append(self.make_comment(sid, ts))
+            comments.sort(key=lambda cm: cm["DateCreated"], reverse=True)
+
+        connections = []
+        for i in range(rnd.randint(1, 4)):
+            type_id, title, power = rnd.choice(CONNECTION_TYPES)
+            connections.append({
+                "ID": sid * 10 + i,
+                "ConnectionTypeID": type_id,
+                "ConnectionType": {"ID": type_id, "Title": title},
+                "LevelID": 3 if power >= 50 else 2,
+                "PowerKW": power,
+                "Quantity": rnd.randint(1, 2),
+                "StatusType": {"ID": 50, "Title": "Operational", "IsOperational": True},
+            })
+
+        station = {
+            "ID": sid,
+            "UUID": f"{rnd.getrandbits(128):032x}",
+            "DataProviderID": 1,
+            "OperatorInfo": {"Title": rnd.choice(OPERATORS)},
+            "UsageType": {"Title": rnd.choice(["Public", "Public - Membership Required", "Private"])},
+            "AddressInfo": {
+                "ID": sid,
+                "Title": f"Station {sid}",
+                "AddressLine1": f"{rnd.randint(1, 300)} High Street",
+                "Postcode": f"XX{rnd.randint(1, 99)} {rnd.randint(1, 9)}YY",
+                "Country": {"ISOCode": "GB", "Title": "United Kingdom"},
+                "Latitude": lat0 + rnd.gauss(0, 0.15),
+                "Longitude": lon0 + rnd.gauss(0, 0.25),
+            },
+            "NumberOfPoints": rnd.randint(1, 8),
+            "Connections": connections,
+            "UserComments": comments,
+            "DateCreated": ocm_timestamp(created),
+            "DateLastStatusUpdate": ocm_timestamp(created),
+        }
+        self.set_status(station, STATUS_TITLES[sid % 2])
+        return station
+
+    @staticmethod
+    def set_status(station, title):
+        status_id, is_operational = STATUS_BY_TITLE[title]
+        station["StatusTypeID"] = status_id
+        station["StatusType"] = {"ID": status_id, "Title": title, "IsOperational": is_operational}
+
+    def advance(self, churn=0.05, comment_rate=0.02, step=datetime.timedelta(minutes=5), seed=None):
+        """Ein Lauf später: churn = Anteil Status-Änderungen, comment_rate = Anteil Stationen mit neuem Kommentar.
+
+        Mit seed wird die Auswahl unabhängig vom bisherigen Verlauf gezogen.
+        Rückgabe: Anzahl geänderter Stationen.
+        """
+        rnd = random.Random(seed) if seed is not None else self.rnd
+        self.now += step
+        ts = ocm_timestamp(self.now)
+        changed = 0
+        for i, station in enumerate(self.stations):
+            new_status = rnd.choice(STATUS_TITLES) if churn and rnd.random() < churn else None
+            new_comment = comment_rate and rnd.random() < comment_rate
+            if new_status is None and not new_comment:
+                continue
+
+            station = dict(station)  # copy-on-write: ältere Schnappschüsse bleiben unverändert
+            if new_status is not None:
+                self.set_status(station, new_status)
+            if new_comment:
+                station["UserComments"] = [self.make_comment(station["ID"], self.now)] + station["UserComments"]
+            station["DateLastStatusUpdate"] = ts
+            self.stations[i] = station
+            changed += 1
+        return changed
+
+    def payload(self):
+        """Aktueller Schnappschuss als Liste von POI-dicts."""
+        return list(self.stations)
+
+
+def synthetic_payload(n_stations, seed=42, churn=0.0, churn_seed=None):
+    """Erzeugt n_stations OCM-ähnliche POIs.
+
+    churn = Anteil Stationen, deren Status (gesteuert über churn_seed) vom Basiszustand abweicht.
+    """
+    gen = SyntheticOcm(n_stations, seed, with_comments=1.0)
+    if churn:
+        gen.advance(churn=churn, comment_rate=0.0, seed=churn_seed)
+    return gen.payload()
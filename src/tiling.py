@@ -0,0 +1,167 @@
+"""Adaptive Quadtree-Kachelung einer Bounding Box für OCM-Abfragen.
+
+Kacheln werden über Quadkeys adressiert: "" ist die Wurzel, "0".."3" ihre
+Viertel (SW, SE, NW, NE), "03" das NE-Viertel des SW-Viertels usw. Eine
+Kachel, deren Ergebnis das Limit erreicht, wird geteilt; das gelernte Layout
+wird in tile_layout gespeichert und beim nächsten Lauf wiederverwendet.
+"""
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone
+
+# (south, west, north, east)
+GB_BBOX = (49.8, -8.7, 60.9, 1.8)
+MAX_DEPTH = 12  # ~300 m Kantenlänge bei GB_BBOX
+
+
+def tile_bounds(root, quadkey):
+    """Bounding Box (south, west, north, east) eines Quadkeys innerhalb von root."""
+    south, west, north, east = root
+    for q in quadkey:
+        mid_lat = (south + north) / 2
+        mid_lon = (west + east) / 2
+        if q in "01":
+            north = mid_lat
+        else:
+            south = mid_lat
+        if q in "02":
+            east = mid_lon
+        else:
+            west = mid_lon
+    return south, west, north, east
+
+
+def point_quadkey(root, lat, lon, depth=MAX_DEPTH):
+    """Quadkey der Tiefe depth, in dessen Kachel der Punkt liegt (Umkehrung von tile_bounds)."""
+    south, west, north, east = root
+    digits = []
+    for _ in range(depth):
+        mid_lat = (south + north) / 2
+        mid_lon = (west + east) / 2
+        d = 0
+        if lat >= mid_lat:
+            d += 2
+            south = mid_lat
+        else:
+            north = mid_lat
+        if lon >= mid_lon:
+            d += 1
+            west = mid_lon
+        else:
+            east = mid_lon
+        digits.append(str(d))
+    return "".join(digits)
+
+
+def locate(root, leaves, lat, lon):
+    """Blatt-Kachel aus leaves, die den Punkt enthält, oder None (außerhalb von root)."""
+    south, west, north, east = root
+    if not (south <= lat <= north and west <= lon <= east):
+        return None
+    quadkey = point_quadkey(root, lat, lon)
+    for n in range(len(quadkey) + 1):
+        if quadkey[:n] in leaves:
+            return quadkey[:n]
+    return None
+
+
+def load_layout(c):
+    """Gelerntes Layout: {quadkey: result_count} der Blatt-Kacheln."""
+    c.execute("SELECT quadkey, result_count FROM tile_layout")
+    return dict(c.fetchall())
+
+
+def save_layout(c, leaves):
+    """Ersetzt das gespeicherte Layout durch die Blatt-Kacheln des letzten Full-Scans."""
+    ts = datetime.datetime.now(timezone.utc).isoformat()
+    c.execute("DELETE FROM tile_layout")
+    c.executemany(
+        "INSERT INTO tile_layout (quadkey, result_count, updated) VALUES (?, ?, ?)",
+        [(q, n, ts) for q, n in leaves.items()],
+    )
+
+
+def update_layout(c, replaced, leaves):
+    """Ersetzt einzelne Kacheln (Teil-Scan) durch deren neue Blätter; der Rest des Layouts bleibt."""
+    ts = datetime.datetime.now(timezone.utc).isoformat()
+    c.executemany("DELETE FROM tile_layout WHERE quadkey = ?", [(q,) for q in replaced])
+    c.executemany(
+        "INSERT OR REPLACE INTO tile_layout (quadkey, result_count, updated) VALUES (?, ?, ?)",
+        [(q, n, ts) for q, n in leaves.items()],
+    )
+
+
+def plan_tiles(layout, cap):
+    """Start-Kacheln aus dem gelernten Layout: {quadkey: erwartete Trefferzahl}.
+
+    Vier Geschwister-Blätter, die zusammen unter cap/2 liegen, werden wieder
+    zur Elternkachel zusammengefasst, damit ausgedünnte Gebiete nicht dauerhaft
+    unnötig viele Requests kosten.
+    """
+    leaves = dict(layout) or {"": 0}
+    merged = True
+    while merged:
+        merged = False
+        parents = {q[:-1] for q in leaves if q}
+        for parent in sorted(parents, key=len, reverse=True):
+            children = [parent + d for d in "0123"]
+            if all(ch in leaves for ch in children):
+                total = sum(leaves[ch] for ch in children)
+                if total < cap / 2:
+                    for ch in children:
+                        del leaves[ch]
+                    leaves[parent] = total
+                    merged = True
+    return leaves
+
+
+def cover(root, fetch_tile, cap, start=None, workers=4, on_leaf=None, on_unchanged=None):
+    """Deckt root vollständig ab: Kacheln am Limit werden geviertelt und neu abgefragt.
+
+    fetch_tile(bbox) liefert die POI-Liste einer Kachel (höchstens cap Einträge)
+    oder None, wenn sie unverändert ist (HTTP 304). start ist ein Plan aus
+    plan_tiles; ohne Plan wird bei der Wurzel begonnen.
+    Rückgabe: (stations, leaves, n_requests) — stations nach ID dedupliziert,
+    leaves als {quadkey: result_count}. Mit on_leaf(quadkey, data) bekommt der
+    Aufrufer jede fertige Blatt-Kachel sofort; stations bleibt dann leer.
+    Hat fetch_tile die POIs schon selbst weitergereicht (Streaming), liefert es
+    statt der Liste nur deren Anzahl. Blatt-Kacheln mit 304 liefern keine POIs;
+    on_unchanged(quadkey) meldet sie, damit der Aufrufer ihre bekannten
+    Stationen nicht für verschwunden hält.
+    """
+    start = start or {"": 0}
+    stations = {}
+    leaves = {}
+    n_requests = 0
+    pending = sorted(start)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending:
+            results = pool.map(lambda q: (q, fetch_tile(tile_bounds(root, q))), pending)
+            pending = []
+            for quadkey, data in results:
+                n_requests += 1
+                if data is None:
+                    leaves[quadkey] = start.get(quadkey, 0)  # unverändert seit letztem Lauf
+                    if on_unchanged is not None:
+                        on_unchanged(quadkey)
+                    continue
+                n = data if isinstance(data, int) else len(data)
+                if n >= cap and len(quadkey) < MAX_DEPTH:
+                    pending.extend(quadkey + d for d in "0123")
+                    continue  # die Kinder liefern dieselben Stationen vollständig
+
+                if n >= cap:
+                    print(f"⚠️ Kachel {quadkey} am Limit und maximal geteilt — evtl. unvollständig.")
+                leaves[quadkey] = n
+                if isinstance(data, int):
+                    continue
+                if on_leaf is not None:
+                    on_leaf(quadkey, data)
+                    continue
+                for d in data:
+                    sid = d.get("ID")
+                    if sid is not None:
+                        stations[sid] = d  # Kachelgrenzen können doppelt liefern
+
+    return list(stations.values()), leaves, n_requests
@@ -0,0 +1,48 @@
+"""Gemeinsame Fixtures: die Module aus src/ importierbar, jede DB in einem eigenen Temp-Verzeichnis."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import fetch  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Frische ev.db mit aktuellem Schema; alle Pfade von fetch zeigen in tmp_path. Rückgabe: DB-Pfad."""
+    monkeypatch.setattr(fetch, "DB_PATH", str(tmp_path / "ev.db"))
+    monkeypatch.setattr(fetch, "BASE_PATH", str(tmp_path / "base.db"))
+    monkeypatch.setattr(fetch, "CHANGESET_DIR", str(tmp_path / "changesets"))
+    monkeypatch.setattr(fetch, "PARTITION_DIR", str(tmp_path / "partitions"))
+    monkeypatch.setattr(fetch, "METRICS_DIR", str(tmp_path / "metrics"))
+    monkeypatch.setattr(fetch, "CHANGESET_ACK", True)
+    monkeypatch.setattr(fetch, "PARTITION_ACK", True)
+    fetch.STATE_CACHE.clear()
+    fetch.init_db()
+    yield fetch.DB_PATH
+    fetch.STATE_CACHE.clear()
+
+
+@pytest.fixture
+def conn(db):
+    """Verbindung auf die Fixture-DB (wird am Ende geschlossen)."""
+    conn = fetch.connect()
+    yield conn
+    fetch.release(conn)
+
+
+@pytest.fixture
+def ocm(db, monkeypatch):
+    """OCM-Stub mit 1500 Stationen; fetch.run() macht dagegen Full-Syncs mit kleinen Kacheln. Rückgabe: der Stub."""
+    from ocm_stub import StubOcmServer
+    from synthetic import synthetic_payload
+
+    with StubOcmServer(synthetic_payload(1500)) as stub:
+        monkeypatch.setattr(fetch, "OCM_BASE_URL", stub.url)
+        monkeypatch.setattr(fetch, "OCM_MAX_RPS", 10_000)
+        monkeypatch.setattr(fetch, "MAX_RESULTS", 200)
+        monkeypatch.setattr(fetch, "DELTA_SYNC", False)
+        monkeypatch.setattr(fetch, "POLL_BUDGET", 0)
+        yield stub
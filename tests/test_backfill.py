@@ -0,0 +1,78 @@
+"""Backfill (user-022): gleicher Inhalt wie save_to_db, ohne Changelog, danach ist eine neue Basis fällig."""
+import gzip
+import json
+import sqlite3
+
+import pytest
+
+import backfill
+import changeset
+import events
+import fetch
+from synthetic import synthetic_payload
+
+N_STATIONS = 300
+TABLES = {  # Tabelle → Spalten ohne Lade-Zeitstempel
+    "stations": "*",
+    "comments_history": "*",
+    "json_blobs": "*",
+    "status_history": "id, station_id, status, is_operational, raw_hash",
+    "station_latest_status": "station_id, status, comment_type_title, checkin_status_title, comment_text, "
+                             "is_operational",
+}
+
+
+def dump(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {table: conn.execute(f"SELECT {cols} FROM {table} ORDER BY 1").fetchall()
+                for table, cols in TABLES.items()}
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_backfill_matches_save_to_db(db, tmp_path, monkeypatch, workers):
+    first = synthetic_payload(N_STATIONS)
+    second = synthetic_payload(N_STATIONS, churn=0.3, churn_seed=1)
+    with gzip.open(tmp_path / "export-1.json.gz", "wt", encoding="utf-8") as f:
+        json.dump(first, f)
+    (tmp_path / "export-2.json").write_text(json.dumps(second), encoding="utf-8")
+
+    totals = backfill.backfill([str(tmp_path / "export-1.json.gz"), str(tmp_path / "export-2.json")],
+                               workers=workers, batch_size=64, commit_every=100)
+    loaded = dump(db)
+
+    conn = fetch.connect()
+    try:
+        c = conn.cursor()
+        assert changeset.base_required(c)
+        assert c.execute("SELECT COUNT(*) FROM changelog").fetchone()[0] == 0
+        assert events.read_events(c) == []
+    finally:
+        fetch.release(conn)
+
+    monkeypatch.setattr(fetch, "DB_PATH", str(tmp_path / "saved.db"))
+    fetch.STATE_CACHE.clear()
+    fetch.init_db()
+    fetch.save_to_db(first)
+    fetch.save_to_db(second)
+
+    assert totals["status_changes"] > 0
+    assert loaded == dump(fetch.DB_PATH)
+
+
+def test_backfill_restores_changelog_triggers(db, tmp_path):
+    path = tmp_path / "export.json"
+    path.write_text(json.dumps(synthetic_payload(50)), encoding="utf-8")
+    backfill.backfill([str(path)], workers=0)
+
+    fetch.save_to_db(synthetic_payload(50, churn=0.5, churn_seed=3))
+
+    conn = fetch.connect()
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM changelog").fetchone()[0] > 0
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('index', 'trigger')")}
+        assert names >= set(fetch.BULK_DEFERRED_INDEXES + fetch.BULK_DEFERRED_TRIGGERS)
+    finally:
+        fetch.release(conn)
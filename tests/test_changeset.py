@@ -0,0 +1,137 @@
+"""Changesets (user-011): Export, Einspielen, Lücken in der Kette und verzögerte Bestätigung."""
+import gzip
+import json
+import os
+import sqlite3
+
+import pytest
+
+import changeset
+import fetch
+from synthetic import synthetic_payload
+
+N_STATIONS = 200
+
+
+def init_schema(path):
+    old = fetch.DB_PATH
+    fetch.DB_PATH = path
+    try:
+        fetch.init_db()
+    finally:
+        fetch.DB_PATH = old
+
+
+def dump(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {
+            table: conn.execute(f"SELECT * FROM {table} ORDER BY {pk}").fetchall()
+            for table, pk in changeset.TRACKED_TABLES.items()
+        }
+    finally:
+        conn.close()
+
+
+def changesets():
+    directory = fetch.CHANGESET_DIR
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory))
+
+
+def load_history(runs=3):
+    """Erstbefüllung (→ Basis) und danach `runs` Läufe mit Änderungen, jeweils exportiert."""
+    fetch.save_to_db(synthetic_payload(N_STATIONS))
+    fetch.export_changes()
+    for i in range(runs):
+        fetch.save_to_db(synthetic_payload(N_STATIONS, churn=0.2, churn_seed=i))
+        fetch.export_changes()
+
+
+def test_first_load_writes_base_instead_of_changeset(db):
+    fetch.save_to_db(synthetic_payload(N_STATIONS))
+    assert fetch.base_required()
+
+    fetch.export_changes()
+
+    assert os.path.exists(fetch.BASE_PATH)
+    assert not os.path.exists(fetch.CHANGESET_DIR)
+    assert not fetch.base_required()
+    assert dump(fetch.BASE_PATH)["stations"] == dump(db)["stations"]
+
+
+def test_rebuild_from_base_and_changesets_matches_db(db, tmp_path):
+    load_history()
+    paths = changesets()
+    assert [changeset.read_changeset(p)["seq"] for p in paths] == [1, 2, 3]
+
+    out = str(tmp_path / "rebuilt.db")
+    assert changeset.rebuild(fetch.BASE_PATH, out, paths, init_schema=init_schema) == 3
+    assert dump(out) == dump(db)
+
+
+def test_rebuild_skips_changesets_already_in_base(db, tmp_path):
+    load_history(runs=2)
+    fetch.save_to_db(synthetic_payload(N_STATIONS, churn=0.2, churn_seed=7))
+    new_base = str(tmp_path / "base2.db")
+    assert changeset.write_base(db, new_base) == 2
+
+    # Alte Changesets liegen noch im Release: werden übersprungen, nicht doppelt eingespielt
+    out = str(tmp_path / "rebuilt.db")
+    assert changeset.rebuild(new_base, out, changesets(), init_schema=init_schema) == 2
+    assert dump(out) == dump(db)
+
+
+def test_apply_rejects_gap_in_chain(db, tmp_path):
+    load_history()
+    first, _, third = changesets()
+
+    out = str(tmp_path / "gap.db")
+    with pytest.raises(ValueError, match="erwartet 2"):
+        changeset.rebuild(fetch.BASE_PATH, out, [first, third], init_schema=init_schema)
+
+    conn = sqlite3.connect(out)
+    try:
+        with pytest.raises(ValueError):
+            changeset.apply_changeset(conn, changeset.read_changeset(third))
+    finally:
+        conn.close()
+
+
+def test_unacknowledged_export_is_rewritten_as_superset(db, monkeypatch):
+    load_history(runs=0)
+    monkeypatch.setattr(fetch, "CHANGESET_ACK", False)
+
+    fetch.save_to_db(synthetic_payload(N_STATIONS, churn=0.2, churn_seed=1))
+    fetch.export_changes()
+    (path,) = changesets()
+    first = changeset.read_changeset(path)
+
+    # Upload fehlgeschlagen: der nächste Export schreibt dieselbe Sequenz mit allen Änderungen seither
+    fetch.save_to_db(synthetic_payload(N_STATIONS, churn=0.2, churn_seed=2))
+    fetch.export_changes()
+    assert changesets() == [path]
+    second = changeset.read_changeset(path)
+    assert second["seq"] == first["seq"] == 1
+    assert second["through"] > first["through"]
+    first_ids = {row[0] for row in first["tables"]["status_history"]["upserts"]}
+    second_ids = {row[0] for row in second["tables"]["status_history"]["upserts"]}
+    assert first_ids < second_ids
+
+    assert changeset.ack_changeset(db, path) is True
+    assert changeset.ack_changeset(db, path) is False
+    conn = sqlite3.connect(db)
+    try:
+        assert changeset.last_seq(conn.cursor()) == 1
+        assert conn.execute("SELECT COUNT(*) FROM changelog").fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def test_ack_rejects_changeset_out_of_order(db, tmp_path):
+    load_history(runs=0)
+    path = str(tmp_path / "changeset-00000005.json.gz")
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump({"version": changeset.FORMAT_VERSION, "seq": 5, "through": 1, "tables": {}}, f)
+
+    with pytest.raises(ValueError, match="erwartet 1"):
+        changeset.ack_changeset(db, path)
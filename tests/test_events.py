@@ -0,0 +1,113 @@
+"""Outbox (user-023): Events je Änderung, benannte Cursor, NDJSON-Relay mindestens einmal."""
+import json
+
+import pytest
+
+import events
+import fetch
+from synthetic import synthetic_payload
+
+N_STATIONS = 150
+
+
+def status_changes(conn):
+    """{station_id: (erster Status, letzter Status)} aller Stationen mit mehr als einer status_history-Zeile."""
+    rows = conn.execute("""
+        SELECT station_id, status FROM status_history
+        WHERE station_id IN (SELECT station_id FROM status_history GROUP BY station_id HAVING COUNT(*) > 1)
+        ORDER BY station_id, id
+    """).fetchall()
+    changes = {}
+    for station_id, status in rows:
+        first = changes.get(station_id, (status,))[0]
+        changes[station_id] = (first, status)
+    return changes
+
+
+def read_ndjson(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def history(conn):
+    """Erstbefüllung plus ein Lauf mit Status-Änderungen."""
+    fetch.save_to_db(synthetic_payload(N_STATIONS))
+    fetch.save_to_db(synthetic_payload(N_STATIONS, churn=0.3, churn_seed=1))
+    return conn
+
+
+def test_first_load_emits_no_events(conn):
+    fetch.save_to_db(synthetic_payload(N_STATIONS))
+    assert events.read_events(conn.cursor()) == []
+
+
+def test_one_event_per_changed_station(history):
+    changes = status_changes(history)
+    assert changes
+
+    emitted = events.read_events(history.cursor())
+
+    assert {e["station_id"]: (e["old_status"], e["new_status"]) for e in emitted} == changes
+    assert [e["seq"] for e in emitted] == sorted(e["seq"] for e in emitted)
+
+
+def test_unchanged_run_emits_nothing(history):
+    before = events.read_events(history.cursor())
+    fetch.save_to_db(synthetic_payload(N_STATIONS, churn=0.3, churn_seed=1))
+    assert events.read_events(history.cursor()) == before
+
+
+def test_poll_does_not_advance_until_ack(history):
+    c = history.cursor()
+    first = events.poll(c, "alerts", limit=5)
+    assert events.poll(c, "alerts", limit=5) == first
+
+    events.ack(c, "alerts", first[-1]["seq"])
+    history.commit()
+    rest = events.poll(c, "alerts")
+    assert rest and rest[0]["seq"] > first[-1]["seq"]
+
+    # Nur vorwärts; andere Konsumenten haben ihren eigenen Cursor
+    events.ack(c, "alerts", 0)
+    history.commit()
+    assert events.get_cursor(c, "alerts") == first[-1]["seq"]
+    assert events.poll(c, "other", limit=5) == first
+
+
+def test_relay_ndjson_writes_each_event_once(history, tmp_path):
+    path = str(tmp_path / "events.ndjson")
+    total = len(events.read_events(history.cursor()))
+
+    assert events.relay_ndjson(history, path, batch_size=7) == total
+    assert events.relay_ndjson(history, path) == 0
+
+    fetch.save_to_db(synthetic_payload(N_STATIONS, churn=0.3, churn_seed=2))
+    new = events.relay_ndjson(history, path)
+    assert new > 0
+    assert [e["seq"] for e in read_ndjson(path)] == [e["seq"] for e in events.read_events(history.cursor())]
+
+
+def test_relay_ndjson_resends_batch_after_crash_before_ack(history, tmp_path, monkeypatch):
+    path = str(tmp_path / "events.ndjson")
+    all_seqs = [e["seq"] for e in events.read_events(history.cursor())]
+    ack = events.ack
+    calls = []
+
+    def crash_on_second_ack(c, consumer, seq):
+        calls.append(seq)
+        if len(calls) == 2:
+            raise OSError("Absturz nach dem Schreiben, vor dem Cursor")
+        ack(c, consumer, seq)
+
+    monkeypatch.setattr(events, "ack", crash_on_second_ack)
+    with pytest.raises(OSError):
+        events.relay_ndjson(history, path, batch_size=3)
+    history.rollback()
+    monkeypatch.setattr(events, "ack", ack)
+
+    events.relay_ndjson(history, path, batch_size=3)
+
+    seqs = [e["seq"] for e in read_ndjson(path)]
+    assert seqs == all_seqs[:6] + all_seqs[3:]  # zweiter Batch doppelt, nichts fehlt
+    assert events.get_cursor(history.cursor(), events.NDJSON_CONSUMER) == all_seqs[-1]
@@ -0,0 +1,139 @@
+"""Volltextsuche (user-021): Trigger-Sync, Quoting freier Eingaben, Filter, Replikat aus Changesets."""
+import os
+import sqlite3
+
+import pytest
+
+import changeset
+import fetch
+import fulltext
+from synthetic import synthetic_payload
+
+STATIONS = [  # (ID, Betreiber, lat, lon)
+    (1, "BP Pulse", 51.50, -0.12),
+    (2, "Ionity", 51.52, -0.10),
+    (3, "BP Pulse", 53.48, -2.24),
+]
+
+
+def ids(hits):
+    return sorted((hit["kind"], hit["id"]) for hit in hits)
+
+
+def add_comment(c, station_id, comment_id, text, date):
+    c.execute("""
+        INSERT INTO comments_history (station_id, comment_ocm_id, comment_text, comment_date) VALUES (?, ?, ?, ?)
+    """, (station_id, comment_id, text, date))
+    return c.lastrowid
+
+
+@pytest.fixture
+def texts(conn):
+    """Drei Stationen mit Kommentaren und einem Status-Text."""
+    c = conn.cursor()
+    c.executemany("INSERT INTO stations (station_id, operator, lat, lon) VALUES (?, ?, ?, ?)", STATIONS)
+    rows = {
+        "slow": add_comment(c, 1, 10, "Slow-charging all evening, card reader broken", "2026-03-01T10:00:00"),
+        "reader": add_comment(c, 2, 20, "Card reader failed twice", "2026-05-01T10:00:00"),
+        "manchester": add_comment(c, 3, 30, "Charger failing: reader: timeout", "2026-07-01T10:00:00"),
+    }
+    c.execute("""
+        INSERT INTO status_history (station_id, status, comment_text, timestamp)
+        VALUES (1, 'Not Operational', 'Reader cover missing', '2026-04-01T10:00:00')
+    """)
+    rows["status"] = c.lastrowid
+    conn.commit()
+    return rows
+
+
+def test_triggers_follow_insert_update_delete(texts, conn):
+    c = conn.cursor()
+    assert ids(fulltext.search(c, "evening")) == [("comment", texts["slow"])]
+
+    c.execute("UPDATE comments_history SET comment_text = 'Fixed, works again' WHERE id = ?", (texts["slow"],))
+    assert fulltext.search(c, "evening") == []
+    assert ids(fulltext.search(c, "fixed")) == [("comment", texts["slow"])]
+
+    c.execute("DELETE FROM comments_history WHERE id = ?", (texts["slow"],))
+    assert fulltext.search(c, "fixed") == []
+
+    # REPLACE löst den DELETE-Trigger nur mit recursive_triggers aus (changeset.rebuild schaltet es ein)
+    c.execute("PRAGMA recursive_triggers=ON")
+    c.execute("INSERT OR REPLACE INTO comments_history (id, station_id, comment_text) VALUES (?, 3, 'evening')",
+              (texts["manchester"],))
+    conn.commit()
+    assert fulltext.search(c, "timeout") == []
+    assert ids(fulltext.search(c, "evening")) == [("comment", texts["manchester"])]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("slow-charging", ["slow"]),
+    ("reader:", ["manchester", "reader", "slow", "status"]),
+    ('card "reader', ["reader", "slow"]),
+    ("fail", ["manchester", "reader"]),  # porter: failed/failing → fail
+    ("char*", ["manchester", "slow"]),
+    ("-", []),
+])
+def test_free_text_is_quoted(texts, conn, query, expected):
+    hits = fulltext.search(conn.cursor(), query)
+    assert ids(hits) == sorted(({"status": "status"}.get(name, "comment"), texts[name]) for name in expected)
+
+
+def test_match_expression():
+    assert fulltext.match_expression('slow-charging char* say"x" -') == '"slow-charging" "char"* "sayx" "-"'
+    assert fulltext.match_expression("  ") == ""
+
+
+def test_raw_query_uses_fts_syntax(texts, conn):
+    hits = fulltext.search(conn.cursor(), "evening OR twice", raw=True)
+    assert ids(hits) == sorted([("comment", texts["reader"]), ("comment", texts["slow"])])
+
+
+def test_filters(texts, conn):
+    c = conn.cursor()
+    assert ids(fulltext.search(c, "reader", operator="BP Pulse")) == sorted(
+        [("comment", texts["slow"]), ("comment", texts["manchester"]), ("status", texts["status"])])
+    assert ids(fulltext.search(c, "reader", since="2026-04-01", until="2026-06-01")) == sorted(
+        [("comment", texts["reader"]), ("status", texts["status"])])
+    london = (51.4, -0.2, 51.6, 0.0)
+    assert ids(fulltext.search(c, "reader", bbox=london, sources=("comments_fts",))) == sorted(
+        [("comment", texts["slow"]), ("comment", texts["reader"])])
+    hit, = fulltext.search(c, "timeout")
+    assert (hit["station_id"], hit["operator"], hit["snippet"]) == (3, "BP Pulse", "Charger failing: reader: [timeout]")
+
+
+def init_schema(path):
+    old = fetch.DB_PATH
+    fetch.DB_PATH = path
+    try:
+        fetch.init_db()
+    finally:
+        fetch.DB_PATH = old
+
+
+def test_replica_from_changesets_has_same_hits(db, conn, tmp_path):
+    fetch.save_to_db(synthetic_payload(100))
+    fetch.export_changes()
+
+    c = conn.cursor()
+    c.execute("SELECT id FROM comments_history ORDER BY id LIMIT 6")
+    first = [row[0] for row in c.fetchall()]
+    c.executemany("UPDATE comments_history SET comment_text = ? WHERE id = ?",
+                  [(f"slow-charging reader {i}", row_id) for i, row_id in enumerate(first[:3])])
+    c.executemany("DELETE FROM comments_history WHERE id = ?", [(row_id,) for row_id in first[3:]])
+    conn.commit()
+    fetch.save_to_db(synthetic_payload(100, churn=0.3, churn_seed=1))
+    fetch.export_changes()
+
+    out = str(tmp_path / "replica.db")
+    paths = sorted(os.path.join(fetch.CHANGESET_DIR, name) for name in os.listdir(fetch.CHANGESET_DIR))
+    changeset.rebuild(fetch.BASE_PATH, out, paths, init_schema=init_schema)
+
+    replica = sqlite3.connect(out)
+    try:
+        for query in ("slow-charging", "reader", "kommentar", "xxxxxxxxxx*", "operational"):
+            expected = fulltext.search(c, query, limit=500)
+            assert ids(fulltext.search(replica.cursor(), query, limit=500)) == ids(expected)
+        assert ids(fulltext.search(replica.cursor(), "slow-charging")) == [("comment", row_id) for row_id in first[:3]]
+    finally:
+        replica.close()
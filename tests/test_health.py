@@ -0,0 +1,80 @@
+"""Health-Score (user-020): Score zum Lesezeitpunkt = rebuild() zum selben Zeitpunkt, update() = rebuild()."""
+import datetime
+from datetime import timezone
+
+import pytest
+
+import analytics
+import health
+
+T0 = datetime.datetime(2026, 9, 1, 12, tzinfo=timezone.utc)
+CHECKINS = {  # Station → [(Tage vor T0, Check-in-Status)]
+    1: [(2, health.FAILED_CHECKIN), (10, health.SUCCESS_CHECKIN), (40, health.FAILED_CHECKIN),
+        (200, health.SUCCESS_CHECKIN), (5, "Charged (with problems)")],
+    2: [(1, health.SUCCESS_CHECKIN), (3, health.SUCCESS_CHECKIN), (90, health.FAILED_CHECKIN)],
+    3: [(20, health.FAILED_CHECKIN), (25, health.FAILED_CHECKIN)],
+    4: [],
+}
+OPERATIONAL = {1: 1, 2: 0, 3: None, 4: 1}
+
+
+def ranking(c, now):
+    rows = analytics.station_health_ranking(c, n=100, min_checkins=0, now=now)
+    return sorted(rows, key=lambda row: row["station_id"])
+
+
+def approx(rows):
+    return [{**row, "score": pytest.approx(row["score"]), "failure_ratio": pytest.approx(row["failure_ratio"])}
+            for row in rows]
+
+
+@pytest.fixture
+def scored(conn):
+    """Vier Stationen mit gemischten Check-ins, Score einmal zu T0 per update() geschrieben."""
+    c = conn.cursor()
+    for station_id, checkins in CHECKINS.items():
+        c.execute("INSERT INTO stations (station_id, title) VALUES (?, ?)", (station_id, f"Station {station_id}"))
+        c.execute("INSERT INTO station_latest_status (station_id, is_operational) VALUES (?, ?)",
+                  (station_id, OPERATIONAL[station_id]))
+        c.executemany("""
+            INSERT INTO comments_history (station_id, comment_ocm_id, checkin_status, comment_date)
+            VALUES (?, ?, ?, ?)
+        """, [(station_id, station_id * 100 + i, status, (T0 - datetime.timedelta(days=days)).isoformat())
+              for i, (days, status) in enumerate(checkins)])
+    health.update(c, list(CHECKINS), T0)
+    conn.commit()
+    return conn
+
+
+def test_update_matches_rebuild(scored):
+    c = scored.cursor()
+    updated = c.execute("SELECT * FROM station_health ORDER BY station_id").fetchall()
+
+    health.rebuild(c, T0)
+
+    assert c.execute("SELECT * FROM station_health ORDER BY station_id").fetchall() == updated
+    assert c.execute("SELECT checkins FROM station_health ORDER BY station_id").fetchall() == [(4,), (3,), (2,), (0,)]
+
+
+@pytest.mark.parametrize("days", [0, 0.5, 7, 45, 400])
+def test_read_time_score_matches_rebuild_at_same_moment(scored, days):
+    c = scored.cursor()
+    later = T0 + datetime.timedelta(days=days)
+    current = ranking(c, later)
+
+    health.rebuild(c, later)
+    scored.commit()
+
+    assert current == approx(ranking(c, later))
+
+
+def test_score_ages_without_new_checkins(scored):
+    c = scored.cursor()
+    now = {row["station_id"]: row["score"] for row in ranking(c, T0)}
+    later = {row["station_id"]: row["score"] for row in ranking(c, T0 + datetime.timedelta(days=60))}
+
+    assert later[2] < now[2]  # letzter Erfolg liegt weiter zurück
+    assert later[3] > now[3]  # alte Ausfälle klingen zum Prior hin ab
+    assert later[4] == pytest.approx(now[4])  # ohne Check-ins altert nichts
+    # Gespeichert bleibt der Stand von T0
+    assert c.execute("SELECT DISTINCT as_of FROM station_health").fetchall() == [(T0.isoformat(),)]
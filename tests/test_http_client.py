@@ -0,0 +1,204 @@
+"""HTTP-Client (user-006): Retries mit Backoff, ETag/If-None-Match → 304, Validatoren in der DB."""
+import socket
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import fetch
+import http_client
+from http_client import HttpClient
+from ocm_stub import StubOcmServer
+from synthetic import synthetic_payload
+
+
+class ScriptedServer:
+    """Antwortet der Reihe nach mit den Einträgen aus script: (status, {header: wert}, body)."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server.requests.append(dict(self.headers))
+                status, headers, body = server.script.pop(0) if len(server.script) > 1 else server.script[0]
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v3/poi/"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff-Wartezeiten aufzeichnen statt zu schlafen."""
+    calls = []
+    monkeypatch.setattr(http_client.time, "sleep", calls.append)
+    return calls
+
+
+@pytest.fixture
+def scripted():
+    servers = []
+
+    def start(*script):
+        servers.append(ScriptedServer(script))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+OK = (200, {"Content-Type": "application/json"}, b"[1, 2]")
+
+
+def test_retries_transient_errors_then_succeeds(scripted, sleeps):
+    server = scripted((503, {}, b""), (502, {}, b""), OK)
+    client = HttpClient(max_retries=4, backoff_base=0.5)
+
+    result = client.get_json(server.url)
+
+    assert result.data == [1, 2]
+    assert result.retries == 2
+    assert client.stats["requests"] == 3 and client.stats["retries"] == 2 and client.stats["errors"] == 0
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 0.5 and 0 <= sleeps[1] <= 1.0  # Full Jitter bis base * 2^attempt
+
+
+def test_retry_after_header_wins_and_is_capped(scripted, sleeps):
+    server = scripted((429, {"Retry-After": "3"}, b""), (429, {"Retry-After": "120"}, b""), OK)
+    client = HttpClient(backoff_max=30.0)
+
+    assert client.get_json(server.url).data == [1, 2]
+    assert sleeps == [3.0, 30.0]
+
+
+def test_gives_up_after_max_retries(scripted, sleeps):
+    server = scripted((500, {}, b""))
+    client = HttpClient(max_retries=2)
+
+    with pytest.raises(requests.HTTPError):
+        client.get_json(server.url)
+
+    assert len(server.requests) == 3
+    assert client.stats["retries"] == 2 and client.stats["errors"] == 1
+
+
+def test_client_errors_are_not_retried(scripted, sleeps):
+    server = scripted((404, {}, b""), OK)
+    client = HttpClient()
+
+    with pytest.raises(requests.HTTPError):
+        client.get_json(server.url)
+
+    assert len(server.requests) == 1 and sleeps == []
+
+
+def test_connection_errors_are_retried(sleeps):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]  # nach dem Schließen lauscht dort niemand
+    client = HttpClient(max_retries=2, timeout=2)
+
+    with pytest.raises(requests.ConnectionError):
+        client.get_json(f"http://127.0.0.1:{port}/")
+
+    assert client.stats["requests"] == 3 and len(sleeps) == 2
+
+
+def test_etag_round_trip_and_304(scripted):
+    server = scripted((200, {"ETag": '"v1"', "Last-Modified": "Tue, 01 Sep 2026 00:00:00 GMT"}, b"[1]"),
+                      (304, {"ETag": '"v1"'}, b""),
+                      (200, {"ETag": '"v2"'}, b"[2]"))
+    client = HttpClient()
+
+    assert client.get_json(server.url, conditional=True).data == [1]
+    result = client.get_json(server.url, conditional=True)
+    assert result.not_modified and result.data is None
+    assert client.get_json(server.url, conditional=True).data == [2]
+    assert client.get_json(server.url).data == [2]
+
+    sent = [(h.get("If-None-Match"), h.get("If-Modified-Since")) for h in server.requests]
+    assert sent == [(None, None), ('"v1"', "Tue, 01 Sep 2026 00:00:00 GMT"),
+                    ('"v1"', "Tue, 01 Sep 2026 00:00:00 GMT"), (None, None)]
+    assert client.validators == {http_client.validator_key(server.url): ('"v2"', None)}
+    assert client.stats["not_modified"] == 1
+
+
+def test_stub_answers_304_for_unchanged_tile():
+    pois = synthetic_payload(20)
+    with StubOcmServer(pois) as stub:
+        client = HttpClient()
+        url = f"{stub.url}?maxresults=100"
+        assert len(client.get_json(url, conditional=True).data) == 20
+        assert client.stream_json(url, conditional=True).not_modified
+
+        stub.set_pois(pois[1:])
+        assert len(client.get_json(url, conditional=True).data) == 19
+
+
+def test_validators_saved_loaded_and_reset(db, monkeypatch):
+    client = HttpClient()
+    client.validators["a"] = ('"1"', None)
+    fetch.save_http_validators(client)
+
+    client.validators["a"] = ('"2"', None)  # gemerkt, aber nie gespeichert
+    client.validators["b"] = ('"3"', None)
+    fetch.load_http_validators(client)
+    assert client.validators == {"a": ('"1"', None)}
+
+    def broken():
+        raise sqlite3.OperationalError("unable to open database file")
+
+    monkeypatch.setattr(fetch, "connect", broken)
+    fetch.reset_http_validators(client)
+    assert client.validators == {}
+
+
+def test_failed_run_forgets_unsaved_validators(ocm, monkeypatch):
+    fetch.run()
+    saved = dict(fetch.OCM_CLIENT.validators)
+    assert saved
+
+    ocm.set_pois(synthetic_payload(1500, churn=0.2, churn_seed=5))
+    seen = {}
+
+    def crash(stats):
+        seen.update(fetch.OCM_CLIENT.validators)
+        raise RuntimeError("Absturz nach dem Schreiben")
+
+    monkeypatch.setattr(fetch, "print_saved", crash)
+    with pytest.raises(RuntimeError):
+        fetch.run()
+    assert seen != saved  # neue ETags für die geänderten Kacheln
+    assert fetch.OCM_CLIENT.validators == saved
+
+
+def test_full_sync_with_validators_from_db_gets_304(ocm, conn):
+    fetch.run()
+    fetch.OCM_CLIENT.validators.clear()  # neuer Prozess: nur die DB kennt die ETags
+
+    fetch.run()
+
+    assert fetch.METRICS.counters["http_not_modified"] == fetch.METRICS.counters["http_requests"] > 0
+    assert fetch.METRICS.counters["bytes_downloaded"] == 0
+    assert conn.execute("SELECT COUNT(*) FROM stations WHERE removed_at IS NOT NULL").fetchone()[0] == 0
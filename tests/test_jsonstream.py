@@ -0,0 +1,82 @@
+"""Streaming-Parser (user-017): Elemente über beliebige Chunk-Grenzen, Fehler, Validatoren erst nach vollem Lesen."""
+import json
+
+import pytest
+
+import jsonstream
+from http_client import HttpClient
+from ocm_stub import StubOcmServer
+from synthetic import synthetic_payload
+
+DOC = [
+    {"ID": 1, "Title": "Ladepark Süd", "Power": 2.5, "Tags": ["a", "ö"], "Nested": {"x": None}},
+    -17,
+    3.25e3,
+    "😀 Müller",
+    [],
+    {},
+    True,
+    None,
+    12345678901234567890,
+]
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 10_000])
+def test_elements_across_chunk_boundaries(size):
+    body = json.dumps(DOC, ensure_ascii=False, indent=1).encode("utf-8")
+    assert list(jsonstream.iter_array(chunked(body, size))) == DOC
+
+
+@pytest.mark.parametrize("size", [1, 5])
+def test_raw_returns_element_text(size):
+    body = b'[ {"a": [1, 2]} , 2.5,"x"]'
+    assert list(jsonstream.iter_array(chunked(body, size), raw=True)) == ['{"a": [1, 2]}', "2.5", '"x"']
+
+
+def test_number_split_at_chunk_end_is_not_truncated():
+    assert list(jsonstream.iter_array([b"[1", b"2.", b"5", b"0]"])) == [12.5]
+
+
+@pytest.mark.parametrize("body", [b"[]", b"  [ \n ]  "])
+def test_empty_array(body):
+    assert list(jsonstream.iter_array(chunked(body, 1))) == []
+
+
+@pytest.mark.parametrize("body, message", [
+    (b"", "Leere Antwort"),
+    (b'{"a": 1}', "JSON-Array erwartet"),
+    (b"[1, 2", "nicht abgeschlossen"),
+    (b"[1 2]", "',' erwartet"),
+])
+def test_invalid_input_raises(body, message):
+    with pytest.raises(ValueError, match=message):
+        list(jsonstream.iter_array(chunked(body, 2)))
+
+
+def test_truncated_element_raises():
+    with pytest.raises(ValueError):
+        list(jsonstream.iter_array([b'[{"a": 1}, {"b": ']))
+
+
+def test_stream_json_remembers_validators_only_after_full_read():
+    pois = synthetic_payload(50)
+    with StubOcmServer(pois) as stub:
+        client = HttpClient(timeout=5)
+        url = f"{stub.url}?maxresults=100"
+
+        # Abgebrochener Strom: kein ETag, der nächste Abruf darf kein 304 bekommen
+        result = client.stream_json(url, conditional=True, chunk_size=256)
+        next(result.data)
+        result.data.close()
+        assert client.validators == {}
+
+        result = client.stream_json(url, conditional=True, chunk_size=256)
+        ids = [poi["ID"] for poi in result.data]
+        assert sorted(ids) == sorted(poi["ID"] for poi in pois)
+        assert len(client.validators) == 1
+
+        assert client.stream_json(url, conditional=True).not_modified
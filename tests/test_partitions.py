@@ -0,0 +1,206 @@
+"""Partitionen (user-025): Versiegeln, Fan-out über ATTACH bzw. Kopien, ausstehende Dateien, Health-Score."""
+import datetime
+import os
+import sqlite3
+from datetime import timezone
+
+import pytest
+
+import analytics
+import fetch
+import health
+import partitions
+import retention
+
+NOW = datetime.datetime(2026, 10, 17, 12, tzinfo=timezone.utc)
+STATUS_DAYS = ("2026-07-05", "2026-07-20", "2026-08-10", "2026-08-25", "2026-09-15", "2026-10-05")
+COMMENTS = [  # (Station, OCM-ID, Datum, Check-in)
+    (1, 11, "2025-06-10", retention.FAILED_CHECKIN),
+    (1, 12, "2025-07-15", retention.SUCCESS_CHECKIN),
+    (1, 13, "2025-08-20", retention.FAILED_CHECKIN),
+    (1, 14, "2026-08-01", retention.SUCCESS_CHECKIN),
+    (2, 21, "2025-07-01", retention.SUCCESS_CHECKIN),
+    (2, 22, "2026-09-30", retention.FAILED_CHECKIN),
+]
+
+
+def ts(day):
+    return f"{day}T12:00:00+00:00"
+
+
+def snapshot(c, suffix=""):
+    return {table: c.execute(f"SELECT * FROM {table}{suffix} ORDER BY id").fetchall()
+            for table in partitions.PARTITIONED}
+
+
+def ranking(c):
+    return analytics.station_health_ranking(c, n=10, min_checkins=0, now=NOW)
+
+
+@pytest.fixture
+def history(conn):
+    """Drei Stationen mit Status-Wechseln Juli–Oktober 2026, Kommentaren seit 2025, aufgerollt."""
+    c = conn.cursor()
+    for station_id in (1, 2, 3):
+        c.execute("INSERT INTO stations (station_id, title, lat, lon) VALUES (?, ?, 51.5, -0.1)",
+                  (station_id, f"Station {station_id}"))
+        for i, day in enumerate(STATUS_DAYS):
+            blob = f"s{station_id}-{i}"
+            c.execute("INSERT INTO json_blobs (hash, data) VALUES (?, ?)", (blob, b"{}"))
+            c.execute("""
+                INSERT INTO status_history (station_id, status, is_operational, timestamp, raw_hash)
+                VALUES (?, ?, ?, ?, ?)
+            """, (station_id, "Operational" if i % 2 else "Not Operational", i % 2, ts(day), blob))
+    for station_id, comment_id, day, checkin in COMMENTS:
+        c.execute("""
+            INSERT INTO comments_history (station_id, comment_ocm_id, checkin_status, comment_text, comment_date)
+            VALUES (?, ?, ?, ?, ?)
+        """, (station_id, comment_id, checkin, f"Kommentar {comment_id}", ts(day)))
+    c.executemany("INSERT INTO region_activity (region_name, stations_count, run_timestamp) VALUES ('London', 3, ?)",
+                  [(ts(day),) for day in STATUS_DAYS])
+    health.rebuild(c, NOW)
+    conn.commit()
+    retention.run(conn, raw_days=partitions.raw_days_before_seal(c, NOW), hourly_days=400, now=NOW, vacuum=False)
+    return conn
+
+
+def test_seal_moves_closed_months_and_fanout_reads_them_back(history):
+    c = history.cursor()
+    before = snapshot(c)
+
+    sealed = partitions.seal_closed(history, fetch.PARTITION_DIR, now=NOW)
+
+    assert list(sealed) == ["ev-2026-07.db", "ev-2026-08.db", "ev-2026-09.db"]
+    assert sealed["ev-2026-07.db"]["status_history"] == 3  # je Station bleibt der Anker vom 20.7. stehen
+    assert sealed["ev-2026-07.db"]["comments_history"] == 3  # vor 2025-08-01
+    assert sealed["ev-2026-08.db"]["comments_history"] == 1
+    for name in sealed:
+        assert os.stat(os.path.join(fetch.PARTITION_DIR, name)).st_mode & 0o222 == 0  # schreibgeschützt
+    # In ev.db: je Station der letzte Status vor Oktober plus der Oktober, die heißen Kommentare
+    assert c.execute("SELECT COUNT(*) FROM status_history").fetchone()[0] == 6
+    assert c.execute("SELECT COUNT(*) FROM comments_history").fetchone()[0] == 2
+    assert c.execute("SELECT COUNT(*) FROM sealed_comments").fetchone()[0] == 4
+    assert c.execute("SELECT COUNT(*) FROM json_blobs").fetchone()[0] == 6
+
+    with partitions.fanout(history, fetch.PARTITION_DIR):
+        assert snapshot(c, "_all") == before
+    assert not history.in_transaction
+    assert c.execute("SELECT COUNT(*) FROM temp.sqlite_master").fetchone()[0] == 0
+
+    assert partitions.seal_closed(history, fetch.PARTITION_DIR, now=NOW) == {}
+
+
+def test_fanout_copies_when_attach_slots_run_out(history):
+    c = history.cursor()
+    before = snapshot(c)
+    partitions.seal_closed(history, fetch.PARTITION_DIR, now=NOW)
+
+    history.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, 1)
+    with partitions.fanout(history, fetch.PARTITION_DIR):
+        assert snapshot(c, "_all") == before
+        assert c.execute("PRAGMA database_list").fetchall()[-1][1] == "temp"  # nichts mehr angehängt
+    assert not history.in_transaction
+    assert c.execute("SELECT COUNT(*) FROM temp.sqlite_master").fetchone()[0] == 0
+
+
+def test_fanout_window_and_missing_file(history, capsys):
+    c = history.cursor()
+    partitions.seal_closed(history, fetch.PARTITION_DIR, now=NOW)
+
+    # Der September enthält die August-Anker, die erst mit dem Septemberstatus versiegelt wurden
+    assert [name for name, _ in partitions.select_partitions(
+        c, ["status_history"], since="2026-08-01", until="2026-09-01")] == ["ev-2026-08.db", "ev-2026-09.db"]
+    assert [name for name, _ in partitions.select_partitions(c, ["status_history"], since="2026-10-01")] == []
+    august = partitions.query(history, fetch.PARTITION_DIR,
+                              "SELECT COUNT(*) FROM status_history_all WHERE timestamp >= ? AND timestamp < ?",
+                              ("2026-08-01", "2026-09-01"), since="2026-08-01", until="2026-09-01")
+    assert august == [(6,)]
+
+    (in_august,) = c.execute("""
+        SELECT rows FROM partition_catalog WHERE name = 'ev-2026-08.db' AND tbl = 'status_history'
+    """).fetchone()
+    os.remove(os.path.join(fetch.PARTITION_DIR, "ev-2026-08.db"))
+    with partitions.fanout(history, fetch.PARTITION_DIR, ("status_history",)):
+        total = c.execute("SELECT COUNT(*) FROM status_history_all").fetchone()[0]
+    assert total == 3 * len(STATUS_DAYS) - in_august
+    assert "ev-2026-08.db fehlt" in capsys.readouterr().out
+
+
+def test_fanout_refuses_open_transaction(history):
+    history.execute("BEGIN")
+    with pytest.raises(ValueError, match="Transaktion"):
+        with partitions.fanout(history, fetch.PARTITION_DIR):
+            pass
+    history.rollback()
+
+
+def test_seal_requires_closed_and_rolled_up_month(conn):
+    c = conn.cursor()
+    c.execute("INSERT INTO status_history (station_id, timestamp) VALUES (1, ?)", (ts("2026-08-10"),))
+    conn.commit()
+
+    with pytest.raises(ValueError, match="nicht abgeschlossen"):
+        partitions.seal(conn, "2026-10", fetch.PARTITION_DIR, now=NOW)
+    with pytest.raises(ValueError, match="retention.run"):
+        partitions.seal(conn, "2026-08", fetch.PARTITION_DIR, now=NOW)
+    assert not os.path.exists(fetch.PARTITION_DIR) or os.listdir(fetch.PARTITION_DIR) == []
+
+
+def test_pending_file_keeps_rows_until_confirmed(history):
+    c = history.cursor()
+    before = snapshot(c)
+
+    sealed = partitions.seal_closed(history, fetch.PARTITION_DIR, now=NOW, confirm=False)
+
+    assert list(sealed) == ["ev-2026-07.db"]  # höchstens ein Monat ausstehend
+    (path,) = partitions.pending(c, fetch.PARTITION_DIR)
+    assert snapshot(c) == before
+    assert c.execute("SELECT COUNT(*) FROM partition_catalog").fetchone()[0] == 0
+    with partitions.fanout(history, fetch.PARTITION_DIR):
+        assert snapshot(c, "_all") == before  # ausstehende Dateien werden nicht doppelt gelesen
+
+    # Upload fehlgeschlagen: der nächste Lauf schreibt denselben Monat neu
+    assert list(partitions.seal_closed(history, fetch.PARTITION_DIR, now=NOW, confirm=False)) == ["ev-2026-07.db"]
+
+    deleted = partitions.confirm_file(history, path)
+    assert deleted["status_history"] == 3
+    assert partitions.confirm_file(history, path) is None
+    assert partitions.pending(c, fetch.PARTITION_DIR) == []
+
+    while partitions.seal_closed(history, fetch.PARTITION_DIR, now=NOW, confirm=False):
+        for pending_path in partitions.pending(c, fetch.PARTITION_DIR):
+            partitions.confirm_file(history, pending_path)
+    assert len(os.listdir(fetch.PARTITION_DIR)) == 3
+    with partitions.fanout(history, fetch.PARTITION_DIR):
+        assert snapshot(c, "_all") == before
+
+
+def test_health_score_survives_sealing(history):
+    c = history.cursor()
+    before = ranking(c)
+    assert any(row["checkins"] == 4 for row in before)
+
+    partitions.seal_closed(history, fetch.PARTITION_DIR, now=NOW)
+
+    assert ranking(c) == before
+
+    # Auch ein vollständiger Neuaufbau zählt die versiegelten Check-ins mit
+    health.rebuild(c, NOW)
+    history.commit()
+    assert ranking(c) == [
+        {**row, "score": pytest.approx(row["score"]), "failure_ratio": pytest.approx(row["failure_ratio"])}
+        for row in before
+    ]
+
+
+def test_sealed_comments_are_not_inserted_again(history):
+    c = history.cursor()
+    partitions.seal_closed(history, fetch.PARTITION_DIR, now=NOW)
+
+    c.executemany(fetch.INSERT_COMMENT_SQL, [
+        (station_id, comment_id, None, checkin, "erneut geliefert", ts(day), None)
+        for station_id, comment_id, day, checkin in COMMENTS
+    ])
+    history.commit()
+
+    assert c.execute("SELECT COUNT(*) FROM comments_history").fetchone()[0] == 2
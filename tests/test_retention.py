@@ -0,0 +1,168 @@
+"""Retention (user-019): Rollups über Stunden-/Tagesgrenzen, inkrementelle Läufe, Pruning mit Anker."""
+import datetime
+from datetime import timezone
+
+import fetch
+import retention
+
+
+def at(day, hour=0, minute=0):
+    return datetime.datetime(2026, 9, day, hour, minute, tzinfo=timezone.utc)
+
+
+def add_status(c, station_id, ts, is_operational, raw_hash=None):
+    c.execute("""
+        INSERT INTO status_history (station_id, status, is_operational, timestamp, raw_hash)
+        VALUES (?, ?, ?, ?, ?)
+    """, (station_id, "Operational" if is_operational else "Not Operational", is_operational, ts.isoformat(),
+          raw_hash))
+
+
+def add_comment(c, station_id, comment_id, ts, checkin_status, content_hash=None):
+    c.execute("""
+        INSERT INTO comments_history (station_id, comment_ocm_id, checkin_status, comment_date, content_hash)
+        VALUES (?, ?, ?, ?, ?)
+    """, (station_id, comment_id, checkin_status, ts.isoformat(), content_hash))
+
+
+def rollup(conn, table):
+    return {
+        (station_id, bucket): rest
+        for station_id, bucket, *rest in conn.execute(f"""
+            SELECT station_id, bucket, down_seconds, transitions, comments, failed_checkins, successful_checkins
+            FROM {table}
+        """)
+    }
+
+
+def run(conn, now, raw_days=365, hourly_days=365):
+    return retention.run(conn, raw_days=raw_days, hourly_days=hourly_days, now=now, vacuum=False)
+
+
+def test_down_time_split_at_hour_and_day_boundaries(conn):
+    c = conn.cursor()
+    add_status(c, 1, at(1, 12), 1)
+    add_status(c, 1, at(1, 22, 30), 0)
+    add_status(c, 1, at(2, 1, 15), 1)
+    conn.commit()
+
+    stats = run(conn, at(10))
+
+    assert stats["status_rows"] == 3
+    daily = rollup(conn, "station_activity_daily")
+    assert daily[(1, "2026-09-01")][:2] == [5400.0, 2]
+    assert daily[(1, "2026-09-02")][:2] == [4500.0, 1]
+    hourly = rollup(conn, "station_activity_hourly")
+    assert [hourly[(1, f"2026-09-{h}")][0] for h in ("01T22", "01T23", "02T00", "02T01")] == [1800, 3600, 3600, 900]
+    assert sum(row[0] for row in hourly.values()) == 9900
+
+
+def load_first(conn):
+    c = conn.cursor()
+    add_status(c, 1, at(1, 10), 1)
+    add_status(c, 1, at(2, 8), 0)  # über den ersten Lauf hinaus ausgefallen
+    add_status(c, 2, at(1, 3), 0)
+    add_comment(c, 1, 100, at(1, 9), retention.FAILED_CHECKIN)
+    conn.commit()
+
+
+def load_second(conn):
+    c = conn.cursor()
+    add_status(c, 1, at(4, 6), 1)
+    add_status(c, 2, at(3, 23), 1)
+    add_comment(c, 1, 101, at(3, 9), retention.SUCCESS_CHECKIN)
+    add_comment(c, 2, 102, at(1, 9), retention.FAILED_CHECKIN)  # verspätet gemeldet
+    conn.commit()
+
+
+def test_incremental_runs_match_single_run(conn, tmp_path, monkeypatch):
+    load_first(conn)
+    run(conn, at(3, 12, 40))
+    load_second(conn)
+    run(conn, at(6))
+
+    monkeypatch.setattr(fetch, "DB_PATH", str(tmp_path / "single.db"))
+    fetch.init_db()
+    single = fetch.connect()
+    try:
+        load_first(single)
+        load_second(single)
+        run(single, at(6))
+        for table in ("station_activity_daily", "station_activity_hourly"):
+            assert rollup(single, table) == rollup(conn, table)
+    finally:
+        fetch.release(single)
+    assert rollup(conn, "station_activity_daily")[(2, "2026-09-01")] == [75600.0, 1, 1, 1, 0]
+
+
+def test_rerun_does_not_count_twice(conn):
+    c = conn.cursor()
+    add_status(c, 1, at(1, 10), 0)
+    add_comment(c, 1, 100, at(1, 11), retention.FAILED_CHECKIN)
+    conn.commit()
+    run(conn, at(2))
+    first = rollup(conn, "station_activity_daily")
+
+    stats = run(conn, at(2))
+
+    assert stats["status_rows"] == stats["comments"] == 0
+    assert rollup(conn, "station_activity_daily") == first
+
+
+def test_prune_keeps_anchor_and_rolled_totals(conn):
+    c = conn.cursor()
+    c.executemany("INSERT INTO json_blobs (hash, data) VALUES (?, ?)",
+                  [("old", b"x"), ("anchor", b"x"), ("comment", b"x")])
+    add_status(c, 1, at(1, 10), 1, raw_hash="old")
+    add_status(c, 1, at(2, 10), 0, raw_hash="anchor")
+    add_status(c, 1, at(20, 10), 1)
+    add_status(c, 2, at(1, 10), 0, raw_hash="comment")
+    add_comment(c, 2, 100, at(1, 11), retention.FAILED_CHECKIN, content_hash="comment")
+    c.execute("""
+        INSERT INTO station_events (station_id, created, new_status) VALUES (1, ?, 'x'), (1, ?, 'y')
+    """, (at(1).isoformat(), at(20).isoformat()))
+    conn.commit()
+
+    stats = run(conn, at(25), raw_days=10, hourly_days=15)
+
+    assert stats["pruned_status_history"] == 1
+    assert [row[0] for row in conn.execute("SELECT timestamp FROM status_history WHERE station_id = 1")] == [
+        at(2, 10).isoformat(), at(20, 10).isoformat()]
+    assert conn.execute("SELECT COUNT(*) FROM status_history WHERE station_id = 2").fetchone()[0] == 1
+    assert {row[0] for row in conn.execute("SELECT hash FROM json_blobs")} == {"anchor", "comment"}
+    assert conn.execute("SELECT COUNT(*) FROM comments_history").fetchone()[0] == 1
+    assert [row[0] for row in conn.execute("SELECT new_status FROM station_events")] == ["y"]
+    assert conn.execute("SELECT MIN(bucket) FROM station_activity_hourly").fetchone()[0] >= "2026-09-10T00"
+    daily = rollup(conn, "station_activity_daily")
+    assert daily[(1, "2026-09-02")][0] == 14 * 3600
+
+    # Der Anker trägt den Ausfall von Station 2 in den nächsten Rollup
+    run(conn, at(26), raw_days=10, hourly_days=15)
+    assert rollup(conn, "station_activity_daily")[(2, "2026-09-25")][0] == 86400
+
+
+def test_prune_never_deletes_rows_not_yet_rolled_up(conn):
+    c = conn.cursor()
+    add_status(c, 1, at(1, 10), 0)
+    add_status(c, 1, at(2, 10), 1)
+    add_status(c, 1, at(3, 10), 0)
+    conn.commit()
+
+    deleted = retention.prune(c, at(20).isoformat(), at(20).isoformat())
+
+    assert deleted["status_history"] == 0
+    conn.rollback()
+
+
+def test_region_rollup_only_full_days(conn):
+    c = conn.cursor()
+    c.executemany("""
+        INSERT INTO region_activity (region_name, stations_count, stations_with_comments, total_comments, run_timestamp)
+        VALUES ('London', ?, ?, ?, ?)
+    """, [(10, 4, 40, at(1, 1).isoformat()), (12, 5, 45, at(1, 13).isoformat()), (11, 5, 50, at(2, 1).isoformat())])
+    conn.commit()
+
+    run(conn, at(2, 12))
+
+    assert conn.execute("SELECT * FROM region_activity_daily").fetchall() == [
+        (1, "London", "2026-09-01", 2, 22, 9, 40, 45)]
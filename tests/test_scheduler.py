@@ -0,0 +1,183 @@
+"""Adaptive Abfrage (user-024): Budget je Lauf, Reihenfolge der fälligen Kacheln, Lernen nach der Abfrage."""
+import datetime
+from datetime import timezone
+
+import pytest
+
+import fetch
+import scheduler
+import tiling
+from synthetic import synthetic_payload
+
+ROOT = (0.0, 0.0, 4.0, 4.0)
+LAYOUT = {"0": 100, "1": 100, "2": 100, "3": 100}
+NOW = datetime.datetime(2026, 9, 15, 12, tzinfo=timezone.utc)
+HOUR = 3600.0
+
+
+def ago(seconds):
+    return (NOW - datetime.timedelta(seconds=seconds)).isoformat()
+
+
+def center(quadkey):
+    south, west, north, east = tiling.tile_bounds(ROOT, quadkey)
+    return (south + north) / 2, (west + east) / 2
+
+
+def add_schedule(c, quadkey, rate, interval, last_polled, seen_seq=0):
+    c.execute("""
+        INSERT INTO tile_schedule (quadkey, change_rate, interval, last_polled, seen_seq)
+        VALUES (?, ?, ?, ?, ?)
+    """, (quadkey, rate, interval, last_polled, seen_seq))
+
+
+def add_station(c, station_id, quadkey):
+    lat, lon = center(quadkey)
+    c.execute("INSERT INTO stations (station_id, lat, lon) VALUES (?, ?, ?)", (station_id, lat, lon))
+
+
+def add_events(c, station_id, n):
+    c.executemany("INSERT INTO station_events (station_id, created, new_status) VALUES (?, ?, 'x')",
+                  [(station_id, NOW.isoformat())] * n)
+
+
+@pytest.fixture
+def layout(conn):
+    c = conn.cursor()
+    tiling.save_layout(c, LAYOUT)
+    conn.commit()
+    return c
+
+
+@pytest.mark.parametrize("rate, observed, expected", [
+    (12.0, 30 * 86400, 300),  # alle 5 Minuten eine Änderung
+    (1.0, 30 * 86400, 2400),  # stündlich → 300 × 2^3
+    (0.0, 30 * 86400, 76800),  # ruhig: höchstens MAX_INTERVAL, auf 300 × 2^k abgerundet
+    (0.0, 600, 600),  # junge DB: nicht ruhiger als die beobachtete Zeit
+    (100.0, 30 * 86400, 300),  # nie unter BASE_INTERVAL
+])
+def test_interval_for(rate, observed, expected):
+    assert scheduler.interval_for(rate, observed) == expected
+
+
+def test_plan_respects_budget_and_priority(layout):
+    add_schedule(layout, "0", 0.1, HOUR, ago(scheduler.MAX_INTERVAL + 1))  # überfällig
+    add_schedule(layout, "1", 5.0, HOUR, ago(2 * HOUR))  # fällig, viele erwartete Änderungen
+    add_schedule(layout, "2", 0.5, HOUR, ago(2 * HOUR))  # fällig, wenige
+    add_schedule(layout, "3", 50.0, HOUR, ago(HOUR / 2))  # noch nicht fällig
+
+    chosen, stats = scheduler.plan(layout, ROOT, LAYOUT, budget=2, now=NOW)
+
+    assert list(chosen) == ["0", "1"]
+    assert chosen["0"] == LAYOUT["0"]
+    assert stats == {"due": 3, "skipped": 1}
+
+    chosen, stats = scheduler.plan(layout, ROOT, LAYOUT, budget=10, now=NOW)
+    assert list(chosen) == ["0", "1", "2"]
+    assert stats == {"due": 3, "skipped": 0}
+
+
+def test_bootstrap_learns_rates_from_history(layout):
+    add_station(layout, 1, "1")
+    add_station(layout, 2, "2")
+    rows = [(1, ago(h * HOUR)) for h in range(1, 41)] + [(2, ago(40 * 86400)), (2, ago(39 * 86400))]
+    layout.executemany("INSERT INTO status_history (station_id, timestamp) VALUES (?, ?)", rows)
+
+    scheduler.plan(layout, ROOT, LAYOUT, budget=0, now=NOW)
+
+    states = scheduler.load_states(layout)
+    assert set(states) == set(LAYOUT)
+    assert states["1"][0] == pytest.approx(39 / (30 * 24))  # 39 Wechsel (die Erstaufnahme zählt nicht) in 30 Tagen
+    assert states["2"][0] == 0.0  # nur vor dem Lernfenster
+    assert states["1"][1] < states["2"][1] == scheduler.interval_for(0.0, 30 * 86400)
+
+
+def test_record_resets_interval_on_changes_and_backs_off_otherwise(layout):
+    add_station(layout, 1, "0")
+    add_station(layout, 2, "1")
+    add_schedule(layout, "0", 1.0, 1200, ago(2 * HOUR))
+    add_schedule(layout, "1", 1.0, 1200, ago(2 * HOUR))
+    add_schedule(layout, "2", 1.0, scheduler.MAX_INTERVAL, ago(2 * HOUR))
+    add_events(layout, 1, 4)
+
+    found = scheduler.record(layout, ROOT, ["0", "1", "2"], {"0": 1, "1": 1, "2": 0}, NOW)
+
+    states = scheduler.load_states(layout)
+    assert found == 4
+    assert states["0"][1] == scheduler.BASE_INTERVAL
+    assert states["0"][0] == pytest.approx(0.3 * 4 / 2 + 0.7 * 1.0)
+    assert states["1"][1] == 2400
+    assert states["1"][0] == pytest.approx(0.7)
+    assert states["2"][1] == scheduler.MAX_INTERVAL
+    assert {q: s[2:5] for q, s in states.items()} == {q: (NOW.isoformat(), 4, 1) for q in ("0", "1", "2")}
+
+    # Dieselben Events zählen beim nächsten Mal nicht noch einmal
+    assert scheduler.record(layout, ROOT, ["0"], {"0": 1}, NOW + datetime.timedelta(hours=1)) == 0
+
+
+def test_record_split_tile_inherits_state(layout):
+    add_schedule(layout, "1", 8.0, 600, ago(2 * HOUR))
+    add_schedule(layout, "2", 1.0, 600, ago(2 * HOUR))
+    leaves = {"10": 1, "11": 1, "12": 1, "13": 1}
+
+    scheduler.record(layout, ROOT, ["1"], leaves, NOW)
+
+    states = scheduler.load_states(layout)
+    assert set(states) == {"2", "10", "11", "12", "13"}
+    assert sum(states[q][0] for q in leaves) == pytest.approx(0.7 * 8.0)
+    assert all(states[q][1] == 1200 for q in leaves)
+
+
+def test_plan_adaptive_needs_budget_and_watermark(layout, monkeypatch):
+    monkeypatch.setattr(fetch, "COVERAGE_BBOX", ROOT)
+    monkeypatch.setattr(fetch, "DELTA_SYNC", True)
+    fetch.METRICS.reset()
+    # Das Layout gilt ab seiner Speicherung als abgefragt; zwei Tage später ist jede Kachel überfällig
+    later = datetime.datetime.now(timezone.utc) + datetime.timedelta(days=2)
+    assert fetch.plan_adaptive(later, budget=0) is None
+    assert fetch.plan_adaptive(later, budget=3) is None  # ohne Wasserstand erst ein Full-Sync
+
+    watermark = later - datetime.timedelta(minutes=5)
+    fetch.save_sync_state(fetch.SYNC_QUERY_KEY, watermark, full_sync=True)
+    modified_since, refresh = fetch.plan_adaptive(later, budget=3)
+
+    assert modified_since == watermark - fetch.DELTA_OVERLAP
+    assert len(refresh) == 3
+    assert fetch.METRICS.counters["poll_tiles_due"] == 4
+    assert fetch.METRICS.counters["poll_tiles_skipped"] == 1
+
+
+def adaptive_run(due):
+    """Ein adaptiver Lauf, in dem genau die Kacheln aus due fällig sind."""
+    conn = fetch.connect()
+    try:
+        conn.execute("UPDATE tile_schedule SET last_polled = ?", (datetime.datetime.now(timezone.utc).isoformat(),))
+        conn.executemany("UPDATE tile_schedule SET last_polled = ? WHERE quadkey = ?",
+                         [("2000-01-01T00:00:00+00:00", q) for q in due])
+        conn.commit()
+    finally:
+        fetch.release(conn)
+    fetch.run()
+
+
+def test_adaptive_poll_marks_missing_stations_in_polled_tiles_only(ocm, conn, monkeypatch):
+    monkeypatch.setattr(fetch, "POLL_BUDGET", 100)
+    fetch.run()  # Full-Sync lernt Layout und Zeitplan
+    layout = tiling.load_layout(conn.cursor())
+    tile_of = {sid: tiling.locate(fetch.COVERAGE_BBOX, layout, lat, lon)
+               for sid, lat, lon in conn.execute("SELECT station_id, lat, lon FROM stations")}
+    other = next(sid for sid, q in tile_of.items() if q != tile_of[7])
+
+    pois = synthetic_payload(1500)
+    ocm.set_pois([d for d in pois if d["ID"] not in (7, other)])
+    adaptive_run([tile_of[7]])
+
+    assert fetch.METRICS.counters["full_sync"] == 0
+    removed = {row[0] for row in conn.execute("SELECT station_id FROM stations WHERE removed_at IS NOT NULL")}
+    assert removed == {7}  # die Kachel von other war nicht fällig
+
+    # Alle Kacheln fällig, nur die von other hat sich geändert: die 304-Kacheln entfernen nichts
+    adaptive_run(list(layout))
+    removed = {row[0] for row in conn.execute("SELECT station_id FROM stations WHERE removed_at IS NOT NULL")}
+    assert removed == {7, other}
+    assert fetch.METRICS.counters["http_not_modified"] > 0
@@ -0,0 +1,49 @@
+"""Full-Sync gegen den Stub (user-007): entfernte Stationen erkennen, 304-Kacheln nicht als leer werten."""
+import events
+import fetch
+from synthetic import synthetic_payload
+
+
+def removed(conn):
+    return {row[0] for row in conn.execute("SELECT station_id FROM stations WHERE removed_at IS NOT NULL")}
+
+
+def removed_events(conn):
+    return [e["station_id"] for e in events.read_events(conn.cursor()) if e["new_status"] == events.REMOVED_STATUS]
+
+
+def test_full_sync_with_only_304_marks_nothing_removed(ocm, conn):
+    fetch.run()
+    fetch.run()
+
+    assert fetch.METRICS.counters["http_not_modified"] == fetch.METRICS.counters["http_requests"] > 0
+    assert removed(conn) == set()
+    assert removed_events(conn) == []
+
+
+def test_station_missing_from_changed_tile_is_removed_and_revived(ocm, conn):
+    pois = synthetic_payload(1500)
+    fetch.run()
+
+    ocm.set_pois([d for d in pois if d["ID"] != 7])
+    fetch.run()
+
+    # Nur die Kachel von Station 7 hat sich geändert, alle anderen antworten mit 304
+    assert 0 < fetch.METRICS.counters["http_not_modified"] < fetch.METRICS.counters["http_requests"]
+    assert removed(conn) == {7}
+    assert removed_events(conn) == [7]
+
+    ocm.set_pois(pois)
+    fetch.run()
+    assert removed(conn) == set()
+
+
+def test_aborted_run_marks_nothing_removed(ocm, conn, monkeypatch):
+    fetch.run()
+    ocm.set_pois([])
+    monkeypatch.setattr(fetch, "OCM_BASE_URL", ocm.url + "missing/")
+
+    fetch.run()
+
+    assert fetch.METRICS.counters["errors"] == 1
+    assert removed(conn) == set()
@@ -0,0 +1,118 @@
+"""Quadtree-Kachelung (user-008): Teilen am Limit, Wiederverwenden des Layouts, 304-Blätter."""
+import random
+
+import pytest
+
+import tiling
+
+ROOT = (0.0, 0.0, 8.0, 8.0)
+CAP = 10
+
+
+def make_points(n=120, seed=1):
+    """Stationen, gehäuft um (1, 1) — der SW-Teil muss tiefer geteilt werden als der Rest."""
+    rnd = random.Random(seed)
+    points = [(i, rnd.gauss(1.0, 0.4), rnd.gauss(1.0, 0.4)) for i in range(n // 2)]
+    points += [(i, rnd.uniform(0, 8), rnd.uniform(0, 8)) for i in range(n // 2, n)]
+    return [(sid, min(max(lat, 0.0), 8.0), min(max(lon, 0.0), 8.0)) for sid, lat, lon in points]
+
+
+class FakeApi:
+    """fetch_tile für tiling.cover: höchstens CAP POIs je bbox, 304 für Kacheln aus unchanged."""
+
+    def __init__(self, points, unchanged=()):
+        self.points = points
+        self.unchanged = {tiling.tile_bounds(ROOT, q) for q in unchanged}
+        self.calls = []
+
+    def __call__(self, bbox):
+        self.calls.append(bbox)
+        if bbox in self.unchanged:
+            return None
+        south, west, north, east = bbox
+        hits = [{"ID": sid} for sid, lat, lon in self.points if south <= lat <= north and west <= lon <= east]
+        return hits[:CAP]
+
+
+def test_tile_bounds_and_locate_round_trip():
+    assert tiling.tile_bounds(ROOT, "") == ROOT
+    assert tiling.tile_bounds(ROOT, "0") == (0.0, 0.0, 4.0, 4.0)
+    assert tiling.tile_bounds(ROOT, "3") == (4.0, 4.0, 8.0, 8.0)
+    assert tiling.tile_bounds(ROOT, "21") == (4.0, 2.0, 6.0, 4.0)  # SE-Viertel des NW-Viertels
+    leaves = {"0": 1, "1": 1, "20": 1, "21": 1, "22": 1, "23": 1, "3": 1}
+    assert tiling.locate(ROOT, leaves, 5.0, 3.0) == "21"
+    assert tiling.locate(ROOT, leaves, 7.0, 3.0) == "23"
+    assert tiling.locate(ROOT, leaves, 1.0, 7.0) == "1"
+    assert tiling.locate(ROOT, leaves, 9.0, 1.0) is None
+
+
+def test_cover_splits_tiles_at_cap_until_complete():
+    points = make_points()
+    api = FakeApi(points)
+
+    stations, leaves, n_requests = tiling.cover(ROOT, api, CAP, workers=2)
+
+    assert {d["ID"] for d in stations} == {sid for sid, _, _ in points}
+    assert n_requests == len(api.calls)
+    assert all(n < CAP for n in leaves.values())
+    assert max(len(q) for q in leaves) > max(len(q) for q in leaves if q.startswith("3"))  # dichter SW-Teil
+    # Die Blätter decken die Wurzel lückenlos und überschneidungsfrei ab
+    area = sum((n - s) * (e - w) for s, w, n, e in (tiling.tile_bounds(ROOT, q) for q in leaves))
+    assert area == pytest.approx(64.0)
+    assert all(not a.startswith(b) for a in leaves for b in leaves if a != b)
+
+
+def test_cover_reuses_stored_layout(conn):
+    points = make_points()
+    _, leaves, first_requests = tiling.cover(ROOT, FakeApi(points), CAP)
+    c = conn.cursor()
+    tiling.save_layout(c, leaves)
+    conn.commit()
+
+    start = tiling.plan_tiles(tiling.load_layout(c), CAP)
+    api = FakeApi(points)
+    stations, again, n_requests = tiling.cover(ROOT, api, CAP, start=start)
+
+    assert again == leaves
+    assert n_requests == len(leaves) < first_requests  # keine Requests für Kacheln, die ohnehin geteilt würden
+    assert {d["ID"] for d in stations} == {sid for sid, _, _ in points}
+
+
+def test_plan_tiles_merges_sparse_siblings():
+    layout = {"00": 1, "01": 1, "02": 1, "03": 1, "1": 8, "2": 3, "30": 6, "31": 0, "32": 0, "33": 0}
+    assert tiling.plan_tiles(layout, CAP) == {"0": 4, "1": 8, "2": 3, "30": 6, "31": 0, "32": 0, "33": 0}
+    assert tiling.plan_tiles({}, CAP) == {"": 0}
+
+
+def test_unchanged_leaf_keeps_count_and_is_reported():
+    points = make_points()
+    _, leaves, _ = tiling.cover(ROOT, FakeApi(points), CAP)
+    unchanged = sorted(leaves)[:3]
+    api = FakeApi(points, unchanged)
+    reported = []
+    emitted = []
+
+    stations, again, _ = tiling.cover(ROOT, api, CAP, start=leaves, on_unchanged=reported.append,
+                                      on_leaf=lambda q, data: emitted.append(q))
+
+    assert sorted(reported) == unchanged
+    assert again == leaves  # 304 übernimmt die Trefferzahl aus dem Plan
+    assert stations == []
+    assert set(emitted) == set(leaves) - set(unchanged)  # für 304-Blätter kommen keine POIs
+
+
+def test_cover_with_counts_from_streaming():
+    points = make_points()
+    api = FakeApi(points)
+    streamed = []
+
+    def stream_tile(bbox):
+        data = api(bbox)
+        streamed.extend(data)
+        return len(data)
+
+    stations, leaves, _ = tiling.cover(ROOT, stream_tile, CAP)
+
+    assert stations == []
+    assert {d["ID"] for d in streamed} == {sid for sid, _, _ in points}
+    assert all(n < CAP for n in leaves.values())